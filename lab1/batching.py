@@ -0,0 +1,33 @@
+"""Помощники пакетного режима main.py.
+
+Такой же модуль лежит в lab2: лабораторные запускаются каждая из своего
+каталога и не импортируют код друг друга.
+
+Ввод читается пачками пронумерованных строк, пачки обрабатываются в пуле
+процессов, а результаты отдаются в исходном порядке при ограниченном числе
+задач в работе – память не растёт с размером входного файла.
+"""
+from collections import deque
+from itertools import islice
+
+
+def read_chunks(stream, chunk_size):
+    """Пачки по chunk_size пар (номер строки, строка), в памяти одновременно только одна пачка"""
+    numbered = enumerate(stream, start=1)
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def ordered_map(executor, func, items, window):
+    """Аналог executor.map, который держит в работе не больше window задач
+       и отдаёт результаты в исходном порядке"""
+    pending = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,263 @@
+"""Замеры производительности арифметических примитивов из run.py.
+
+Набор прогоняет преобразования, сложение, умножение, деление и IEEE-754
+по разрядностям от 8 до 65536 бит (и пакетные функции по размерам пакета),
+для каждого случая считает операций в секунду, процентили задержки одной
+операции и пиковую память, сравнивает с тем же вычислением на встроенных int
+и сохраняет результаты в JSON, чтобы сравнивать выпуски между собой.
+
+Запуск: python benchmark.py [--quick] [--save baseline.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import math
+import platform
+import random
+import struct
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import ieee754
+import softfloat
+from run import (
+    np, decimal_to_binary, binary_add, binary_subtract, binary_compare,
+    add_in_additional_code, multiply_in_direct_code, divide_in_direct_code,
+    convert_float_to_ieee754, add_ieee754, add_in_additional_code_batch, MULTIPLICATION_METHODS,
+)
+
+
+WIDTHS = [1 << k for k in range(3, 17)]
+QUICK_WIDTHS = [8, 64, 512, 4096]
+BATCH_SIZES = [1000, 10000, 100000, 1000000]
+QUICK_BATCH_SIZES = [1000, 100000]
+FLOAT_FORMATS = {16: 'binary16', 32: 'binary32', 64: 'binary64'}
+STRUCT_CODES = {'binary16': '>e', 'binary32': '>f', 'binary64': '>d'}
+
+
+def random_operand(width, rng):
+    """Случайная двоичная строка ровно из width разрядов (старший разряд = 1)"""
+    return '1' + format(rng.getrandbits(width - 1), f'0{width - 1}b')
+
+
+def random_magnitude(width, rng):
+    """Случайное неотрицательное целое ровно из width разрядов"""
+    return rng.getrandbits(width - 1) | (1 << (width - 1))
+
+
+def random_signed(width, rng):
+    """Случайное целое, представимое в width-разрядном дополнительном коде"""
+    return rng.randint(-(1 << (width - 1)), (1 << (width - 1)) - 1)
+
+
+def scaling_exponent(samples):
+    """Показатель k в T(n) ~ n ** k по методу наименьших квадратов в логарифмическом масштабе"""
+    xs = [math.log(width) for width, _ in samples]
+    ys = [math.log(seconds) for _, seconds in samples]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    num = sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+    den = sum((x - mean_x) ** 2 for x in xs)
+    return num / den
+
+
+def percentile(sorted_values, fraction):
+    """Процентиль отсортированного списка (ближайший ранг)"""
+    index = min(len(sorted_values) - 1, max(0, math.ceil(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def measure(func, ops_per_call=1, min_time=0.2, max_samples=200):
+    """Замер вызова func() без аргументов.
+       Каждая выборка – серия вызовов длительностью не меньше ~20 мкс, задержка операции
+       равна времени серии, делённому на число операций в ней."""
+    start = time.perf_counter_ns()
+    func()
+    first = time.perf_counter_ns() - start
+    inner = max(1, 20000 // max(first, 1))
+    latencies = []
+    total_ns = 0
+    while len(latencies) < max_samples and (total_ns < min_time * 1e9 or len(latencies) < 5):
+        start = time.perf_counter_ns()
+        for _ in range(inner):
+            func()
+        elapsed = time.perf_counter_ns() - start
+        total_ns += elapsed
+        latencies.append(elapsed / (inner * ops_per_call))
+    latencies.sort()
+    return {
+        'ops_per_sec': len(latencies) * inner * ops_per_call / (total_ns / 1e9),
+        'p50_ns': percentile(latencies, 0.50),
+        'p90_ns': percentile(latencies, 0.90),
+        'p99_ns': percentile(latencies, 0.99),
+    }
+
+
+def peak_memory(func):
+    """Пиковый объём памяти, выделенной за один вызов func(), в байтах"""
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def width_cases(width, rng):
+    """Пары (имя, вызов run.py, эквивалент на встроенных int) для разрядности width"""
+    a_str, b_str = random_operand(width, rng), random_operand(width, rng)
+    x, y = int(a_str, 2), int(b_str, 2)
+    a, b = random_signed(width, rng), random_signed(width, rng) or 1
+    mask = (1 << width) - 1
+    cases = [
+        ('decimal_to_binary', lambda: decimal_to_binary(x, width), lambda: format(x, 'b')),
+        ('binary_add', lambda: binary_add(a_str, b_str), lambda: x + y),
+        ('binary_subtract', lambda: binary_subtract(a_str, b_str), lambda: x - y),
+        ('binary_compare', lambda: binary_compare(a_str, b_str), lambda: x > y),
+        ('add_in_additional_code', lambda: add_in_additional_code(a, b, width), lambda: (a + b) & mask),
+        ('multiply_in_direct_code', lambda: multiply_in_direct_code(a, b, width),
+         lambda: (abs(a) * abs(b)) & (mask >> 1)),
+        ('divide_in_direct_code', lambda: divide_in_direct_code(a, b, width, width),
+         lambda: (abs(a) << width) // abs(b)),
+    ]
+    # Каждый метод умножения отдельно, чтобы показатели роста сдвигово-сложения,
+    # Бута и Карацубы сравнивались между собой
+    # (свои имена операндов: x и y уже захвачены замыканиями выше)
+    u, v = random_magnitude(width, rng), random_magnitude(width, rng)
+    for method in MULTIPLICATION_METHODS:
+        cases.append((f'multiply_in_direct_code[{method}]',
+                      lambda method=method: multiply_in_direct_code(u, v, width + 1, method),
+                      lambda: u * v))
+    if width in FLOAT_FORMATS:
+        fmt = FLOAT_FORMATS[width]
+        code = STRUCT_CODES[fmt]
+        value, other = rng.uniform(-1e3, 1e3), rng.uniform(-1e3, 1e3)
+        bits, other_bits = convert_float_to_ieee754(value, fmt), convert_float_to_ieee754(other, fmt)
+        cases.append(('convert_float_to_ieee754', lambda: convert_float_to_ieee754(value, fmt),
+                      lambda: struct.pack(code, value)))
+        cases.append(('add_ieee754', lambda: add_ieee754(bits, other_bits), lambda: value + other))
+    return cases
+
+
+def batch_cases(size, rng):
+    """Пакетные функции над size элементами и их эквиваленты на массивах NumPy"""
+    if np is None:
+        return []
+    generator = np.random.default_rng(rng.getrandbits(32))
+    a = generator.integers(-(1 << 31), 1 << 31, size, dtype=np.int64)
+    b = generator.integers(-(1 << 31), 1 << 31, size, dtype=np.int64)
+    fa = generator.standard_normal(size).astype(np.float32)
+    fb = generator.standard_normal(size).astype(np.float32)
+    ua, ub = fa.view(np.uint32), fb.view(np.uint32)
+    return [
+        ('add_in_additional_code_batch', lambda: add_in_additional_code_batch(a, b, 32),
+         lambda: (a + b) & 0xFFFFFFFF),
+        ('ieee754.unpack_fields', lambda: ieee754.unpack_fields(fa, 'binary32'), lambda: fa.view(np.uint32) >> 23),
+        ('softfloat.add_batch', lambda: softfloat.add_batch(ua, ub, 'binary32'), lambda: fa + fb),
+        ('softfloat.div_batch', lambda: softfloat.div_batch(ua, ub, 'binary32'), lambda: fa / fb),
+    ]
+
+
+def run_case(name, func, native, width=None, batch=1, min_time=0.2):
+    result = {'name': name, 'width': width, 'batch': batch}
+    result.update(measure(func, batch, min_time))
+    result['peak_bytes'] = peak_memory(func)
+    result['native_ops_per_sec'] = measure(native, batch, min_time / 4)['ops_per_sec']
+    result['slowdown'] = result['native_ops_per_sec'] / result['ops_per_sec']
+    return result
+
+
+def run_suite(widths=WIDTHS, batch_sizes=BATCH_SIZES, min_time=0.2, seed=0, progress=None):
+    """Полный прогон набора; возвращает словарь с метаданными и списком результатов"""
+    rng = random.Random(seed)
+    results = []
+    for width in widths:
+        for name, func, native in width_cases(width, rng):
+            results.append(run_case(name, func, native, width=width, min_time=min_time))
+            if progress:
+                progress(results[-1])
+    for size in batch_sizes:
+        for name, func, native in batch_cases(size, rng):
+            results.append(run_case(name, func, native, batch=size, min_time=min_time))
+            if progress:
+                progress(results[-1])
+    return {
+        'meta': {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__ if np is not None else None,
+            'platform': platform.platform(),
+            'widths': list(widths),
+            'batch_sizes': list(batch_sizes),
+        },
+        'results': results,
+    }
+
+
+def growth_exponents(suite):
+    """Показатель роста медианной задержки по разрядности для каждой функции"""
+    by_name = {}
+    for result in suite['results']:
+        if result['width'] is not None and result['batch'] == 1:
+            by_name.setdefault(result['name'], []).append((result['width'], result['p50_ns']))
+    return {name: scaling_exponent(samples) for name, samples in by_name.items() if len(samples) >= 3}
+
+
+def compare(baseline, current, threshold=0.25):
+    """Случаи, в которых медианная задержка выросла больше чем на threshold относительно baseline"""
+    previous = {(r['name'], r['width'], r['batch']): r for r in baseline['results']}
+    regressions = []
+    for result in current['results']:
+        old = previous.get((result['name'], result['width'], result['batch']))
+        if old is None:
+            continue
+        ratio = result['p50_ns'] / old['p50_ns']
+        if ratio > 1 + threshold:
+            regressions.append((result, old, ratio))
+    return regressions
+
+
+def format_result(result):
+    scale = f"{result['width']} бит" if result['width'] is not None else f"пакет {result['batch']}"
+    return (f"{result['name']:<30} {scale:>14} {result['ops_per_sec']:>14.0f} оп/с"
+            f"  p50 {result['p50_ns']:>12.0f} нс  p99 {result['p99_ns']:>12.0f} нс"
+            f"  память {result['peak_bytes']:>10} Б  x{result['slowdown']:.1f} к int")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Набор замеров производительности lab1")
+    parser.add_argument('--quick', action='store_true', help="сокращённый набор разрядностей и пакетов")
+    parser.add_argument('--save', metavar='FILE', help="сохранить результаты в JSON")
+    parser.add_argument('--compare', metavar='FILE', help="сравнить с сохранённой базой")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="допустимый рост медианной задержки (доля, по умолчанию 0.25)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="минимальное время замера одного случая, с")
+    args = parser.parse_args(argv)
+
+    widths = QUICK_WIDTHS if args.quick else WIDTHS
+    batch_sizes = QUICK_BATCH_SIZES if args.quick else BATCH_SIZES
+    suite = run_suite(widths, batch_sizes, args.min_time, progress=lambda r: print(format_result(r)))
+
+    print("\nПоказатели роста по разрядности:")
+    for name, exponent in growth_exponents(suite).items():
+        print(f"  {name:<30} n^{exponent:.2f}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(suite, f, ensure_ascii=False, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, suite, args.threshold)
+        for result, old, ratio in regressions:
+            scale = result['width'] if result['width'] is not None else result['batch']
+            print(f"Регрессия: {result['name']} [{scale}] p50 {old['p50_ns']:.0f} -> {result['p50_ns']:.0f} нс"
+                  f" (x{ratio:.2f})")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,213 @@
+"""Двоично-десятичные коды (8421 и с избытком 3) и отражённый код Грея.
+
+Скалярные функции работают со строками разрядов в тех же соглашениях, что
+decimal_to_binary: неотрицательные числа, необязательная фиксированная длина.
+Пакетные функции работают с целочисленными массивами NumPy: тетрады BCD
+собираются по таблице на четыре десятичных цифры, код Грея – сдвигами и XOR.
+"""
+try:
+    import numpy as np
+except ImportError:  # пакетные функции требуют NumPy
+    np = None
+
+
+# Смещение тетрады: 8421 хранит цифру как есть, код с избытком 3 – цифру + 3
+BCD_OFFSETS = {'8421': 0, 'excess3': 3}
+
+# Наибольшее число цифр, тетрады которых помещаются в uint64
+MAX_BATCH_DIGITS = 16
+
+
+def _offset(code):
+    if code not in BCD_OFFSETS:
+        raise ValueError(f"Неизвестный двоично-десятичный код: {code}")
+    return BCD_OFFSETS[code]
+
+
+def encode_bcd(n, code='8421', digits=None):
+    """Тетрады числа n как целое (младшая цифра – в младших четырёх разрядах).
+       При заданном digits старшие цифры дополняются нулями (в коде с избытком 3 это 0011)"""
+    if n < 0:
+        raise ValueError("Ожидается неотрицательное число")
+    offset = _offset(code)
+    text = str(n)
+    if digits:
+        if len(text) > digits:
+            raise ValueError(f"Число {n} не помещается в {digits} десятичных разрядов")
+        text = text.zfill(digits)
+    bits = 0
+    for char in text:
+        bits = (bits << 4) | (ord(char) - 48 + offset)
+    return bits
+
+
+def decode_bcd(bits, code='8421', digits=None):
+    """Число по тетрадам; недопустимая тетрада – ValueError"""
+    offset = _offset(code)
+    digits = digits or max(1, (bits.bit_length() + 3) // 4)
+    value = 0
+    for position in range(digits - 1, -1, -1):
+        digit = ((bits >> (4 * position)) & 0xF) - offset
+        if not 0 <= digit <= 9:
+            raise ValueError(f"Недопустимая тетрада {(digit + offset):04b} в коде {code}")
+        value = value * 10 + digit
+    return value
+
+
+def decimal_to_bcd(n, code='8421', digits=None):
+    """Строка тетрад числа n (по 4 разряда на десятичную цифру)"""
+    bits = encode_bcd(n, code, digits)
+    return format(bits, f'0{4 * (digits or len(str(n)))}b')
+
+
+def bcd_to_decimal(bcd_str, code='8421'):
+    """Число по строке тетрад; длина строки должна быть кратна 4"""
+    if len(bcd_str) % 4:
+        raise ValueError("Длина строки двоично-десятичного кода должна быть кратна 4")
+    return decode_bcd(int(bcd_str, 2) if bcd_str else 0, code, len(bcd_str) // 4)
+
+
+def encode_gray(n):
+    """Отражённый код Грея: соседние числа отличаются ровно одним разрядом"""
+    if n < 0:
+        raise ValueError("Ожидается неотрицательное число")
+    return n ^ (n >> 1)
+
+
+def decode_gray(g):
+    """Число по коду Грея: префиксный XOR разрядов за log2(разрядности) сдвигов"""
+    shift = 1
+    while g >> shift:
+        g ^= g >> shift
+        shift <<= 1
+    return g
+
+
+def decimal_to_gray(n, bit_length=None):
+    """Строка кода Грея числа n, при заданном bit_length дополненная нулями слева"""
+    gray_str = format(encode_gray(n), 'b')
+    if bit_length:
+        gray_str = gray_str.zfill(bit_length)
+    return gray_str
+
+
+def gray_to_decimal(gray_str):
+    return decode_gray(int(gray_str, 2)) if gray_str else 0
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Пакетные функции требуют NumPy")
+
+
+def _unsigned(values, limit, what):
+    """Массив uint64 из неотрицательных целых, меньших limit"""
+    array = np.asarray(values)
+    if array.dtype.kind not in 'iu':
+        raise ValueError("Ожидается массив целых чисел")
+    if array.size and (array.min() < 0 or (limit is not None and array.max() >= limit)):
+        raise ValueError(f"Значения должны быть неотрицательными и помещаться в {what}")
+    return array.astype(np.uint64, copy=False)
+
+
+_ENCODE_TABLES = {}
+_DECODE_TABLES = {}
+
+
+def _encode_table(offset):
+    """Тетрады всех четырёхзначных групп 0000..9999 (uint64, по 16 разрядов)"""
+    if offset not in _ENCODE_TABLES:
+        group = np.arange(10000, dtype=np.uint64)
+        table = np.zeros(10000, dtype=np.uint64)
+        for position in range(4):
+            table |= (group % np.uint64(10) + np.uint64(offset)) << np.uint64(4 * position)
+            group //= np.uint64(10)
+        _ENCODE_TABLES[offset] = table
+    return _ENCODE_TABLES[offset]
+
+
+def _decode_table(offset):
+    """Значение каждой 16-разрядной группы из четырёх тетрад, -1 для недопустимых групп"""
+    if offset not in _DECODE_TABLES:
+        table = np.full(1 << 16, -1, dtype=np.int64)
+        table[_encode_table(offset)] = np.arange(10000, dtype=np.int64)
+        _DECODE_TABLES[offset] = table
+    return _DECODE_TABLES[offset]
+
+
+def _batch_digits(array, digits):
+    if digits is None:
+        largest = int(array.max()) if array.size else 0
+        digits = len(str(largest))
+    if not 1 <= digits <= MAX_BATCH_DIGITS:
+        raise ValueError(f"Пакетный код BCD поддерживает от 1 до {MAX_BATCH_DIGITS} десятичных разрядов")
+    return digits
+
+
+def encode_bcd_batch(values, code='8421', digits=None):
+    """Тетрады массива чисел как массив uint64 (значения как у encode_bcd).
+       digits по умолчанию – число цифр наибольшего элемента пакета"""
+    _require_numpy()
+    offset = _offset(code)
+    array = _unsigned(values, 10 ** MAX_BATCH_DIGITS, f"{MAX_BATCH_DIGITS} десятичных разрядов")
+    digits = _batch_digits(array, digits)
+    if array.size and int(array.max()) >= 10 ** digits:
+        raise ValueError(f"Значения должны помещаться в {digits} десятичных разрядов")
+    table = _encode_table(offset)
+    result = np.zeros(array.shape, dtype=np.uint64)
+    rest = array.copy()
+    for group in range(0, digits, 4):
+        result |= table[(rest % np.uint64(10000)).astype(np.intp)] << np.uint64(4 * group)
+        rest //= np.uint64(10000)
+    # Старшие тетрады последней группы сверх digits отбрасываются (в коде с избытком 3 они ненулевые)
+    if digits < MAX_BATCH_DIGITS:
+        result &= np.uint64((1 << (4 * digits)) - 1)
+    return result
+
+
+def decode_bcd_batch(codes, code='8421', digits=None):
+    """Числа по массиву тетрад (int64); недопустимая тетрада в любом элементе – ValueError.
+       digits по умолчанию – число тетрад наибольшего кода пакета"""
+    _require_numpy()
+    offset = _offset(code)
+    codes = np.asarray(codes, dtype=np.uint64)
+    if digits is None:
+        largest = int(codes.max()) if codes.size else 0
+        digits = max(1, (largest.bit_length() + 3) // 4)
+    if not 1 <= digits <= MAX_BATCH_DIGITS:
+        raise ValueError(f"Пакетный код BCD поддерживает от 1 до {MAX_BATCH_DIGITS} десятичных разрядов")
+    if digits < MAX_BATCH_DIGITS and codes.size and int(codes.max()) >> (4 * digits):
+        raise ValueError(f"Коды должны помещаться в {digits} тетрад")
+    # Недостающие до полной группы старшие тетрады дополняются нулевыми цифрами
+    padding = -digits % 4
+    if offset and padding:
+        filler = 0
+        for _ in range(padding):
+            filler = (filler << 4) | offset
+        codes = codes | np.uint64(filler << (4 * digits))
+    table = _decode_table(offset)
+    value = np.zeros(codes.shape, dtype=np.int64)
+    for group in range((digits + padding) // 4 - 1, -1, -1):
+        part = table[((codes >> np.uint64(16 * group)) & np.uint64(0xFFFF)).astype(np.intp)]
+        if (part < 0).any():
+            raise ValueError(f"Недопустимая тетрада в коде {code}")
+        value = value * 10000 + part
+    return value
+
+
+def encode_gray_batch(values, bit_length=64):
+    """Коды Грея массива неотрицательных чисел (uint64)"""
+    _require_numpy()
+    if not 1 <= bit_length <= 64:
+        raise ValueError("Пакетная разрядность должна быть от 1 до 64 бит")
+    array = _unsigned(values, (1 << bit_length) if bit_length < 64 else None, f"{bit_length} бит")
+    return array ^ (array >> np.uint64(1))
+
+
+def decode_gray_batch(codes):
+    """Числа по массиву кодов Грея: префиксный XOR за шесть сдвигов"""
+    _require_numpy()
+    value = np.array(codes, dtype=np.uint64)
+    for shift in (1, 2, 4, 8, 16, 32):
+        value ^= value >> np.uint64(shift)
+    return value
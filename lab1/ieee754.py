@@ -0,0 +1,189 @@
+"""Кодек IEEE-754 для форматов binary16, binary32 и binary64.
+
+Скалярный путь работает с целыми числами и дробями и округляет точно
+(к ближайшему, при равенстве – к чётному), пакетный путь переинтерпретирует
+массивы NumPy без копирования (view) и разбирает поля векторно.
+"""
+import math
+from collections import namedtuple
+from fractions import Fraction
+
+try:
+    import numpy as np
+except ImportError:  # пакетные функции требуют NumPy
+    np = None
+
+
+FloatFormat = namedtuple('FloatFormat', 'name exponent_bits mantissa_bits float_dtype uint_dtype')
+
+FORMATS = {
+    'binary16': FloatFormat('binary16', 5, 10, 'float16', 'uint16'),
+    'binary32': FloatFormat('binary32', 8, 23, 'float32', 'uint32'),
+    'binary64': FloatFormat('binary64', 11, 52, 'float64', 'uint64'),
+}
+
+FORMATS_BY_WIDTH = {1 + f.exponent_bits + f.mantissa_bits: f for f in FORMATS.values()}
+
+
+def get_format(fmt):
+    """Описание формата по имени ('binary32') или по самому FloatFormat"""
+    if isinstance(fmt, FloatFormat):
+        return fmt
+    if fmt not in FORMATS:
+        raise ValueError(f"Неизвестный формат IEEE-754: {fmt}")
+    return FORMATS[fmt]
+
+
+def width(fmt):
+    f = get_format(fmt)
+    return 1 + f.exponent_bits + f.mantissa_bits
+
+
+def bias(fmt):
+    return (1 << (get_format(fmt).exponent_bits - 1)) - 1
+
+
+def split_fields(bits, fmt='binary32'):
+    """Поля (знак, смещённая экспонента, мантисса) из целого с разрядами числа"""
+    f = get_format(fmt)
+    return (bits >> (f.exponent_bits + f.mantissa_bits),
+            (bits >> f.mantissa_bits) & ((1 << f.exponent_bits) - 1),
+            bits & ((1 << f.mantissa_bits) - 1))
+
+
+def join_fields(sign, exponent, mantissa, fmt='binary32'):
+    """Целое с разрядами числа из полей (знак, смещённая экспонента, мантисса)"""
+    f = get_format(fmt)
+    return (sign << (f.exponent_bits + f.mantissa_bits)) | (exponent << f.mantissa_bits) | mantissa
+
+
+def classify(bits, fmt='binary32'):
+    """Класс числа: 'zero', 'subnormal', 'normal', 'infinite' или 'nan'"""
+    f = get_format(fmt)
+    _, exponent, mantissa = split_fields(bits, f)
+    if exponent == 0:
+        return 'subnormal' if mantissa else 'zero'
+    if exponent == (1 << f.exponent_bits) - 1:
+        return 'nan' if mantissa else 'infinite'
+    return 'normal'
+
+
+def to_bit_string(bits, fmt='binary32'):
+    return format(bits, f'0{width(fmt)}b')
+
+
+def encode(value, fmt='binary32'):
+    """Точное кодирование числа (float, int, Fraction, Decimal или десятичной строки)
+       в разряды формата fmt с округлением к ближайшему чётному"""
+    f = get_format(fmt)
+    max_exponent = (1 << f.exponent_bits) - 1
+    m = f.mantissa_bits
+
+    sign = None
+    if isinstance(value, float):
+        # copysign сохраняет знак отрицательного нуля
+        sign = 1 if math.copysign(1.0, value) < 0 else 0
+        if math.isnan(value):
+            return join_fields(sign, max_exponent, 1 << (m - 1), f)
+        if math.isinf(value):
+            return join_fields(sign, max_exponent, 0, f)
+    x = Fraction(value)
+    if sign is None:
+        sign = 1 if x < 0 else 0
+    x = abs(x)
+    if x == 0:
+        return join_fields(sign, 0, 0, f)
+
+    num, den = x.numerator, x.denominator
+    # Порядок e: 2 ** e <= x < 2 ** (e + 1)
+    e = num.bit_length() - den.bit_length()
+    if (num << max(0, -e)) < (den << max(0, e)):
+        e -= 1
+    min_exponent = 1 - bias(f)
+    # Ниже минимального порядка число становится денормализованным
+    e = max(e, min_exponent)
+
+    shift = e - m
+    if shift >= 0:
+        den <<= shift
+    else:
+        num <<= -shift
+    significand, remainder = divmod(num, den)
+    if 2 * remainder > den or (2 * remainder == den and significand & 1):
+        significand += 1
+    if significand == 1 << (m + 1):
+        significand >>= 1
+        e += 1
+
+    if e + bias(f) >= max_exponent:
+        return join_fields(sign, max_exponent, 0, f)
+    if significand < 1 << m:
+        return join_fields(sign, 0, significand, f)
+    return join_fields(sign, e + bias(f), significand - (1 << m), f)
+
+
+def decode_exact(bits, fmt='binary32'):
+    """Точное значение конечного числа как fractions.Fraction"""
+    f = get_format(fmt)
+    sign, exponent, mantissa = split_fields(bits, f)
+    if exponent == (1 << f.exponent_bits) - 1:
+        raise ValueError("Бесконечность и NaN не имеют точного рационального значения")
+    if exponent == 0:
+        value = Fraction(mantissa) / (1 << (bias(f) - 1 + f.mantissa_bits))
+    else:
+        value = Fraction(mantissa | (1 << f.mantissa_bits)) * Fraction(2) ** (exponent - bias(f) - f.mantissa_bits)
+    return -value if sign else value
+
+
+def decode(bits, fmt='binary32'):
+    """Значение числа как float (binary16/32/64 представимы в float без потерь)"""
+    f = get_format(fmt)
+    sign, exponent, mantissa = split_fields(bits, f)
+    if exponent == (1 << f.exponent_bits) - 1:
+        value = math.nan if mantissa else math.inf
+    else:
+        value = float(abs(decode_exact(bits, f)))
+    return -value if sign else value
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Пакетные функции требуют NumPy")
+
+
+def encode_batch(values, fmt='binary32'):
+    """Разряды массива чисел как массив uint16/32/64.
+       Если values уже имеет нужный dtype, результат – представление без копирования"""
+    _require_numpy()
+    f = get_format(fmt)
+    return np.asarray(values, dtype=f.float_dtype).view(f.uint_dtype)
+
+
+def decode_batch(bits, fmt='binary32'):
+    """Массив чисел из массива разрядов (представление без копирования)"""
+    _require_numpy()
+    f = get_format(fmt)
+    return np.asarray(bits, dtype=f.uint_dtype).view(f.float_dtype)
+
+
+def unpack_fields(values, fmt='binary32'):
+    """Поля (знак, экспонента, мантисса) массива чисел формата fmt.
+       Подходит и для np.memmap – разбор идёт без промежуточной копии данных"""
+    f = get_format(fmt)
+    bits = encode_batch(values, f)
+    dtype = bits.dtype.type
+    sign = bits >> dtype(f.exponent_bits + f.mantissa_bits)
+    exponent = (bits >> dtype(f.mantissa_bits)) & dtype((1 << f.exponent_bits) - 1)
+    mantissa = bits & dtype((1 << f.mantissa_bits) - 1)
+    return sign, exponent, mantissa
+
+
+def pack_fields(sign, exponent, mantissa, fmt='binary32'):
+    """Массив чисел формата fmt из массивов полей"""
+    _require_numpy()
+    f = get_format(fmt)
+    dtype = np.dtype(f.uint_dtype).type
+    bits = ((np.asarray(sign, dtype=dtype) << dtype(f.exponent_bits + f.mantissa_bits))
+            | (np.asarray(exponent, dtype=dtype) << dtype(f.mantissa_bits))
+            | np.asarray(mantissa, dtype=dtype))
+    return bits.view(f.float_dtype)
@@ -1,7 +1,111 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from batching import read_chunks, ordered_map
 from run import *
 
 
-def main():
+FIELDS = [
+    'line', 'a', 'b', 'kind',
+    'a_direct', 'a_reverse', 'a_additional', 'b_direct', 'b_reverse', 'b_additional',
+    'sum_code', 'sum', 'difference_code', 'difference',
+    'product_code', 'product', 'quotient_code', 'quotient',
+    'a_ieee754', 'b_ieee754', 'sum_ieee754', 'error',
+]
+
+
+def direct_code_to_decimal(direct_str):
+    if direct_str[0] == '0':
+        return binary_to_decimal(direct_str[1:])
+    else:
+        return -binary_to_decimal(direct_str[1:])
+
+
+def parse_operand(token):
+    """Целое, если токен записан как целое, иначе число с плавающей точкой"""
+    try:
+        return int(token)
+    except ValueError:
+        return float(token)
+
+
+def process_pair(a, b, bit_length, precision):
+    """Все представления и результаты операций для пары операндов в виде словаря"""
+    if isinstance(a, int) and isinstance(b, int):
+        record = {'a': a, 'b': b, 'kind': 'int'}
+        for name, n in (('a', a), ('b', b)):
+            record[f'{name}_direct'] = get_positive_code(n, bit_length) if n >= 0 else get_negative_code(n, bit_length)
+            record[f'{name}_reverse'] = get_reverse_code(n, bit_length)
+            record[f'{name}_additional'] = get_additional_code(n, bit_length)
+        record['sum_code'] = add_in_additional_code(a, b, bit_length)
+        record['sum'] = twos_complement_to_decimal(record['sum_code'])
+        record['difference_code'] = subtract_in_additional_code(a, b, bit_length)
+        record['difference'] = twos_complement_to_decimal(record['difference_code'])
+        record['product_code'] = multiply_in_direct_code(a, b, bit_length)
+        record['product'] = direct_code_to_decimal(record['product_code'])
+        record['quotient_code'], record['quotient'] = divide_in_direct_code(a, b, precision, bit_length)
+        return record
+
+    a, b = float(a), float(b)
+    record = {'a': a, 'b': b, 'kind': 'float'}
+    record['a_ieee754'] = convert_float_to_ieee754(a)
+    record['b_ieee754'] = convert_float_to_ieee754(b)
+    record['sum_ieee754'] = add_ieee754(record['a_ieee754'], record['b_ieee754'])
+    record['sum'] = ieee754_to_decimal(record['sum_ieee754'])
+    return record
+
+
+def format_records(records, output_format):
+    """Записи в виде текста: JSON-строки или строки CSV без заголовка"""
+    if output_format == 'jsonl':
+        return ''.join(json.dumps(record, ensure_ascii=False) + '\n' for record in records)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=FIELDS, lineterminator='\n')
+    writer.writerows(records)
+    return buffer.getvalue()
+
+
+def process_chunk(chunk, bit_length, precision, output_format):
+    """Обработка пачки пронумерованных строк ввода; ошибки попадают в поле error записи"""
+    records = []
+    for line_number, line in chunk:
+        tokens = line.replace(',', ' ').split()
+        if not tokens:
+            continue
+        try:
+            if len(tokens) != 2:
+                raise ValueError(f"ожидается два операнда, получено {len(tokens)}")
+            record = process_pair(parse_operand(tokens[0]), parse_operand(tokens[1]), bit_length, precision)
+        except (ValueError, OverflowError) as e:
+            record = {'error': str(e)}
+        records.append({'line': line_number, **record})
+    return format_records(records, output_format)
+
+
+def run_batch(input_stream, output_stream, bit_length=8, precision=5, output_format='jsonl',
+              workers=None, chunk_size=10000):
+    """Потоковая обработка пар операндов из input_stream с записью результатов в output_stream"""
+    if output_format == 'csv':
+        csv.DictWriter(output_stream, fieldnames=FIELDS, lineterminator='\n').writeheader()
+    chunks = read_chunks(input_stream, chunk_size)
+    job = partial(process_chunk, bit_length=bit_length, precision=precision, output_format=output_format)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for text in map(job, chunks):
+            output_stream.write(text)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        for text in ordered_map(executor, job, chunks, window=2 * workers):
+            output_stream.write(text)
+
+
+def interactive():
     print("Введите два целых числа для анализа")
 
     # Ввод первого числа
@@ -59,13 +163,6 @@ def main():
     print("\nТестирование умножения в прямом коде:")
     mul_code = multiply_in_direct_code(num1, num2, 8)
 
-    def direct_code_to_decimal(direct_str):
-        bit_length = len(direct_str)
-        if direct_str[0] == '0':
-            return binary_to_decimal(direct_str[1:])
-        else:
-            return -binary_to_decimal(direct_str[1:])
-
     print(f"Умножение {num1} и {num2}:")
     print(f"Результат (bin): {mul_code}")
     print(f"Результат (dec): {direct_code_to_decimal(mul_code)}")
@@ -102,5 +199,33 @@ def main():
     print(dec_result)
 
 
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Представления чисел и арифметика в прямом, обратном и дополнительном кодах")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="пакетный режим: файл с парами операндов по строкам ('-' – стандартный ввод)")
+    parser.add_argument('--output', metavar='FILE', help="файл результатов (по умолчанию стандартный вывод)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'), default='jsonl', dest='output_format')
+    parser.add_argument('--bit-length', type=int, default=8)
+    parser.add_argument('--precision', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию – число ядер)")
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args(argv)
+
+    if args.batch is None:
+        interactive()
+        return
+
+    input_stream = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+    output_stream = sys.stdout if args.output is None else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        run_batch(input_stream, output_stream, args.bit_length, args.precision, args.output_format,
+                  args.workers, args.chunk_size)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
+
+
 if __name__ == "__main__":
     main()
@@ -1,12 +1,127 @@
+from collections import OrderedDict
+from fractions import Fraction
+
+try:
+    import numpy as np
+except ImportError:  # пакетные функции требуют NumPy, остальной модуль работает без него
+    np = None
+
+import codes
+import ieee754
+import softfloat
+import tracing
+# Строковые преобразования в двоично-десятичные коды и код Грея – рядом с decimal_to_binary
+from codes import decimal_to_bcd, bcd_to_decimal, decimal_to_gray, gray_to_decimal
+
+
+class Word:
+    """Машинное слово фиксированной разрядности.
+       Разряды хранятся целым числом value (по модулю 2 ** width),
+       строки прямого, обратного и дополнительного кода строятся только по запросу."""
+    __slots__ = ('value', 'width')
+
+    def __init__(self, value, width):
+        if width <= 0:
+            raise ValueError("Разрядность слова должна быть положительной")
+        self.width = width
+        self.value = value & ((1 << width) - 1)
+
+    @classmethod
+    def from_bits(cls, binary_str):
+        """Слово из строки разрядов дополнительного кода"""
+        return cls(int(binary_str, 2), len(binary_str))
+
+    def signed(self):
+        """Знаковое значение слова (интерпретация в дополнительном коде)"""
+        if self.value >> (self.width - 1):
+            return self.value - (1 << self.width)
+        return self.value
+
+    def direct_code(self):
+        """Прямой код значения слова"""
+        n = self.signed()
+        return get_positive_code(n, self.width) if n >= 0 else get_negative_code(n, self.width)
+
+    def reverse_code(self):
+        """Обратный код значения слова"""
+        return get_reverse_code(self.signed(), self.width)
+
+    def additional_code(self):
+        """Дополнительный код – это сами разряды слова"""
+        return format(self.value, f'0{self.width}b')
+
+    def _operand(self, other):
+        if isinstance(other, Word):
+            if other.width != self.width:
+                raise ValueError("Разрядности слов не совпадают")
+            return other.signed()
+        if isinstance(other, int):
+            return other
+        return None
+
+    def __add__(self, other):
+        b = self._operand(other)
+        if b is None:
+            return NotImplemented
+        return Word(self.value + b, self.width)
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        b = self._operand(other)
+        if b is None:
+            return NotImplemented
+        return Word(self.value - b, self.width)
+
+    def __rsub__(self, other):
+        b = self._operand(other)
+        if b is None:
+            return NotImplemented
+        return Word(b - self.value, self.width)
+
+    def __mul__(self, other):
+        b = self._operand(other)
+        if b is None:
+            return NotImplemented
+        return Word(self.signed() * b, self.width)
+
+    __rmul__ = __mul__
+
+    def __floordiv__(self, other):
+        """Целочисленное деление с отбрасыванием дробной части (к нулю), как в аппаратном делителе"""
+        b = self._operand(other)
+        if b is None:
+            return NotImplemented
+        a = self.signed()
+        q = abs(a) // abs(b)
+        return Word(q if (a < 0) == (b < 0) else -q, self.width)
+
+    def __neg__(self):
+        return Word(-self.value, self.width)
+
+    def __int__(self):
+        return self.signed()
+
+    def __eq__(self, other):
+        if not isinstance(other, Word):
+            return NotImplemented
+        return self.value == other.value and self.width == other.width
+
+    def __hash__(self):
+        return hash((self.value, self.width))
+
+    def __str__(self):
+        return self.additional_code()
+
+    def __repr__(self):
+        return f"Word({self.signed()}, {self.width})"
+
+
 def decimal_to_binary(n, bit_length=None):
     """Перевод неотрицательного целого числа в двоичную строку (без знака)"""
-    if n == 0:
-        return '0'.zfill(bit_length) if bit_length else '0'
-    binary = []
-    while n > 0:
-        binary.append(str(n % 2))
-        n //= 2
-    binary_str = ''.join(reversed(binary))
+    if n < 0:
+        raise ValueError("Ожидается неотрицательное число")
+    binary_str = format(n, 'b')
     if bit_length:
         binary_str = binary_str.zfill(bit_length)
     return binary_str
@@ -14,83 +129,182 @@ def decimal_to_binary(n, bit_length=None):
 
 def binary_to_decimal(binary_str):
     """Перевод двоичной строки (представляющей неотрицательное число) в десятичное"""
-    decimal = 0
-    for i, bit in enumerate(reversed(binary_str)):
-        decimal += int(bit) * (2 ** i)
-    return decimal
-    # return int(binary_str, 2)
+    return int(binary_str, 2) if binary_str else 0
 
 
 def twos_complement_to_decimal(binary_str):
     """Преобразование числа в дополнительном (двоичном) коде (как строка) в знаковое целое"""
-    bit_length = len(binary_str)
-    unsigned_val = binary_to_decimal(binary_str)
-    if binary_str[0] == '0':
-        return unsigned_val
-    else:
-        return unsigned_val - (1 << bit_length)
+    return Word.from_bits(binary_str).signed()
+
+
+def _positive_code(n, bit_length):
+    return '0' + decimal_to_binary(n, bit_length - 1)
+
+
+def _negative_code(n, bit_length):
+    return '1' + decimal_to_binary(abs(n), bit_length - 1)
+
+
+def _reverse_code(n, bit_length):
+    if n >= 0:
+        return _positive_code(n, bit_length)
+    magnitude = -n
+    length = max(bit_length - 1, magnitude.bit_length())
+    inverted = magnitude ^ ((1 << length) - 1)
+    return '1' + format(inverted, f'0{length}b')
+
+
+def _additional_code(n, bit_length):
+    if n >= 0:
+        return _positive_code(n, bit_length)
+    return Word(n, bit_length).additional_code()
+
+
+class CodeCache:
+    """Кэш строк прямого, обратного и дополнительного кода.
+       Для разрядностей до table_max_width лениво строится полная таблица по всем
+       значениям [-2 ** (w-1), 2 ** (w-1)), остальные запросы проходят через LRU-кэш
+       на lru_size записей."""
+
+    COMPUTE = {
+        'positive': _positive_code,
+        'negative': _negative_code,
+        'reverse': _reverse_code,
+        'additional': _additional_code,
+    }
+
+    def __init__(self, table_max_width=16, lru_size=4096):
+        self.table_max_width = table_max_width
+        self.lru_size = lru_size
+        self._tables = {}
+        self._lru = OrderedDict()
+        self.table_hits = 0
+        self.lru_hits = 0
+        self.misses = 0
+
+    def _build_table(self, kind, bit_length):
+        compute = self.COMPUTE[kind]
+        half = 1 << (bit_length - 1)
+        table = []
+        for n in range(-half, half):
+            try:
+                table.append(compute(n, bit_length))
+            except ValueError:
+                # Значение вне области функции (например, прямой код положительного для n < 0)
+                table.append(None)
+        self._tables[kind, bit_length] = table
+        return table
+
+    def lookup(self, kind, n, bit_length):
+        """Код числа n вида kind ('positive', 'negative', 'reverse', 'additional')"""
+        half = 1 << (bit_length - 1)
+        if bit_length <= self.table_max_width and -half <= n < half:
+            table = self._tables.get((kind, bit_length))
+            if table is None:
+                self.misses += 1
+                table = self._build_table(kind, bit_length)
+            else:
+                self.table_hits += 1
+            code = table[n + half]
+            return code if code is not None else self.COMPUTE[kind](n, bit_length)
+
+        key = (kind, n, bit_length)
+        code = self._lru.get(key)
+        if code is not None:
+            self.lru_hits += 1
+            self._lru.move_to_end(key)
+            return code
+        self.misses += 1
+        code = self.COMPUTE[kind](n, bit_length)
+        self._lru[key] = code
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+        return code
+
+    def warm(self, bit_length, kinds=None):
+        """Заранее строит таблицы разрядности bit_length (по умолчанию для всех видов кода)"""
+        if bit_length > self.table_max_width:
+            raise ValueError(f"Таблицы строятся только для разрядностей до {self.table_max_width} бит")
+        for kind in kinds or self.COMPUTE:
+            if (kind, bit_length) not in self._tables:
+                self._build_table(kind, bit_length)
+
+    def drop(self, bit_length=None):
+        """Удаляет таблицы разрядности bit_length (или все таблицы и LRU-кэш, если она не задана)"""
+        if bit_length is None:
+            self._tables.clear()
+            self._lru.clear()
+            return
+        for key in [key for key in self._tables if key[1] == bit_length]:
+            del self._tables[key]
+
+    def stats(self):
+        """Статистика обращений и занятого места"""
+        return {
+            'table_hits': self.table_hits,
+            'lru_hits': self.lru_hits,
+            'misses': self.misses,
+            'tables': sorted(self._tables),
+            'lru_entries': len(self._lru),
+        }
+
+
+CODE_CACHE = CodeCache()
 
 
 def get_positive_code(n, bit_length):
     """Прямой (знаковый) код для положительного числа.
        bit_length включает бит знака (старший бит = 0)"""
-    binary_str = decimal_to_binary(n, bit_length - 1)
-    return '0' + binary_str
+    return CODE_CACHE.lookup('positive', n, bit_length)
 
 
 def get_negative_code(n, bit_length):
     """Прямой (знаковый) код для отрицательного числа.
        Представление: старший бит = 1, а остальные – двоичное представление модуля,
        дополненное нулями до (bit_length-1) разрядов."""
-    binary_str = decimal_to_binary(abs(n), bit_length - 1)
-    return '1' + binary_str
+    return CODE_CACHE.lookup('negative', n, bit_length)
 
 
 def get_reverse_code(n, bit_length):
     """Обратный код.
        Для положительных чисел – тот же прямой код,
        для отрицательных – инвертируем все разряды величины (но сохраняем знак = 1)."""
-    if n >= 0:
-        return get_positive_code(n, bit_length)
-    pos_code = decimal_to_binary(abs(n), bit_length - 1)
-    pos_code = '0' + pos_code  # знак 0
-    inverted = ''.join('1' if bit == '0' else '0' for bit in pos_code[1:])
-    return '1' + inverted
+    return CODE_CACHE.lookup('reverse', n, bit_length)
 
 
 def get_additional_code(n, bit_length):
     """Дополнительный (двоичный) код.
        Для положительных чисел – прямой код;
        для отрицательных – обратный код плюс 1."""
-    if n >= 0:
-        return get_positive_code(n, bit_length)
-    rev = get_reverse_code(n, bit_length)
-    carry = 1
-    additional = []
-    for bit in reversed(rev):
-        total = int(bit) + carry
-        additional.append(str(total % 2))
-        carry = total // 2
-    result = ''.join(reversed(additional))
-    return result[-bit_length:]
+    return CODE_CACHE.lookup('additional', n, bit_length)
 
 
 def add_in_additional_code(a, b, bit_length):
     """Сложение двух чисел в дополнительном коде с фиксированной длиной bit_length.
        Результат возвращается в виде двоичной строки (дополнительного кода).
        Для проверки десятичное значение получается с помощью twos_complement_to_decimal()."""
-    a_code = get_additional_code(a, bit_length).zfill(bit_length)
-    b_code = get_additional_code(b, bit_length).zfill(bit_length)
-    result = []
+    x, y = Word(a, bit_length), Word(b, bit_length)
+    if tracing.HOOKS:
+        _traced_ripple_add(x.value, y.value, bit_length, tracing.emitter('adder'))
+    return (x + y).additional_code()
+
+
+def _traced_ripple_add(a_code, b_code, bit_length, emit):
+    """Сложение кодов сумматором со сквозным переносом: по событию на каждый разряд"""
+    emit('operands', a=a_code, b=b_code, bit_length=bit_length)
     carry = 0
-    for i in range(bit_length - 1, -1, -1):
-        total = int(a_code[i]) + int(b_code[i]) + carry
-        result.append(str(total % 2))
-        carry = total // 2
-    result_str = ''.join(reversed(result))
-    if len(result_str) > bit_length:
-        result_str = result_str[-bit_length:]
-    return result_str
+    carries = 0
+    for position in range(bit_length):
+        x, y = (a_code >> position) & 1, (b_code >> position) & 1
+        total = x + y + carry
+        emit('bit', position=position, a=x, b=y, carry_in=carry, sum=total & 1, carry_out=total >> 1)
+        carry = total >> 1
+        carries += carry
+    sign = 1 << (bit_length - 1)
+    result = (a_code + b_code) & ((1 << bit_length) - 1)
+    overflow = ((a_code ^ result) & (b_code ^ result) & sign) != 0
+    emit('result', code=result, carry_out=carry, overflow=overflow)
+    emit('counts', additions=1, carries_propagated=carries, overflows=int(overflow))
 
 
 def subtract_in_additional_code(a, b, bit_length):
@@ -98,45 +312,97 @@ def subtract_in_additional_code(a, b, bit_length):
     return add_in_additional_code(a, -b, bit_length)
 
 
+def _batch_operands(a, b, bit_length):
+    """Разряды дополнительного кода операндов пакета как массивы uint64 и маски разрядности"""
+    if np is None:
+        raise ImportError("Пакетные функции требуют NumPy")
+    if not 1 <= bit_length <= 64:
+        raise ValueError("Пакетная разрядность должна быть от 1 до 64 бит")
+    mask = np.uint64((1 << bit_length) - 1)
+    sign = np.uint64(1 << (bit_length - 1))
+    # Представление int64 в uint64 – это и есть 64-разрядный дополнительный код
+    a_code = np.asarray(a, dtype=np.int64).view(np.uint64) & mask
+    b_code = np.asarray(b, dtype=np.int64).view(np.uint64) & mask
+    return a_code, b_code, mask, sign
+
+
+def codes_to_bit_matrix(codes, bit_length):
+    """Матрица байтов b'0'/b'1' формы (n, bit_length), старший разряд слева:
+       строка i.tobytes() совпадает со строкой скалярной функции"""
+    shifts = np.arange(bit_length - 1, -1, -1, dtype=np.uint64)
+    bits = (np.asarray(codes, dtype=np.uint64)[:, None] >> shifts) & np.uint64(1)
+    return bits.astype(np.uint8) + np.uint8(ord('0'))
+
+
+def _emit_batch_counts(a_code, b_code, result, mask, sign):
+    """Счётчики пакетного сумматора: число переносов из разрядов и переполнений по всему пакету"""
+    # Перенос в разряд i восстанавливается по разрядам слагаемых и суммы
+    carry_in = a_code ^ b_code ^ result
+    carry_out = ((a_code & b_code) | ((a_code ^ b_code) & carry_in)) & mask
+    overflow = ((a_code ^ result) & (b_code ^ result) & sign) != 0
+    tracing.emit('adder', 'counts', additions=int(result.size),
+                 carries_propagated=int(np.unpackbits(carry_out.view(np.uint8)).sum()),
+                 overflows=int(overflow.sum()))
+
+
+def twos_complement_to_decimal_batch(codes, bit_length):
+    """Знаковые значения пакета кодов разрядности bit_length (массив int64)"""
+    codes = np.asarray(codes, dtype=np.uint64)
+    if bit_length == 64:
+        return codes.view(np.int64)
+    sign = np.int64(1 << (bit_length - 1))
+    return (codes.astype(np.int64) ^ sign) - sign
+
+
+def add_in_additional_code_batch(a, b, bit_length, with_bits=False):
+    """Пакетное сложение в дополнительном коде над массивами целых.
+       Возвращает (коды результата uint64, флаги переполнения bool, матрица разрядов или None);
+       коды совпадают с int(add_in_additional_code(a[i], b[i], bit_length), 2)"""
+    a_code, b_code, mask, sign = _batch_operands(a, b, bit_length)
+    result = (a_code + b_code) & mask
+    # Переполнение: знаки слагаемых совпадают, а знак суммы отличается
+    overflow = ((a_code ^ result) & (b_code ^ result) & sign) != 0
+    if tracing.HOOKS:
+        _emit_batch_counts(a_code, b_code, result, mask, sign)
+    bit_matrix = codes_to_bit_matrix(result, bit_length) if with_bits else None
+    return result, overflow, bit_matrix
+
+
+def subtract_in_additional_code_batch(a, b, bit_length, with_bits=False):
+    """Пакетное вычитание a - b в дополнительном коде, результат как у add_in_additional_code_batch"""
+    a_code, b_code, mask, sign = _batch_operands(a, b, bit_length)
+    result = (a_code - b_code) & mask
+    # Переполнение: знаки операндов различны, и знак разности не совпадает со знаком a
+    overflow = ((a_code ^ b_code) & (a_code ^ result) & sign) != 0
+    if tracing.HOOKS:
+        # Вычитатель – это сумматор, складывающий a с инверсией b и входным переносом 1
+        _emit_batch_counts(a_code, ~b_code & mask, result, mask, sign)
+    bit_matrix = codes_to_bit_matrix(result, bit_length) if with_bits else None
+    return result, overflow, bit_matrix
+
+
 def binary_add(a, b):
     """
     Сложение двух двоичных чисел, заданных в виде строк (без знака).
     Возвращает строку с результатом.
+    Строки переводятся в целые (лимбы по 30 бит), поэтому время линейно по разрядности.
     """
     max_len = max(len(a), len(b))
-    a = a.zfill(max_len)
-    b = b.zfill(max_len)
-    carry = 0
-    result = ""
-    for i in range(max_len - 1, -1, -1):
-        sum_bit = (1 if a[i] == '1' else 0) + (1 if b[i] == '1' else 0) + carry
-        result = ('1' if sum_bit % 2 == 1 else '0') + result
-        carry = 1 if sum_bit >= 2 else 0
-    if carry:
-        result = '1' + result
-    return result
+    if max_len == 0:
+        return ""
+    total = binary_to_decimal(a) + binary_to_decimal(b)
+    return format(total, f'0{max_len}b')
 
 
 def binary_subtract(a, b):
     """
     Вычитание b из a (a >= b) для двоичных чисел в виде строк (без знака).
     Возвращает результат в виде строки.
+    При a < b результат, как и у поразрядного вычитателя, берётся по модулю 2 ** max(len(a), len(b)).
     """
     max_len = max(len(a), len(b))
-    a = a.zfill(max_len)
-    b = b.zfill(max_len)
-    result = ""
-    borrow = 0
-    for i in range(max_len - 1, -1, -1):
-        diff = (1 if a[i] == '1' else 0) - (1 if b[i] == '1' else 0) - borrow
-        if diff < 0:
-            diff += 2
-            borrow = 1
-        else:
-            borrow = 0
-        result = ('1' if diff == 1 else '0') + result
-    result = result.lstrip('0')
-    return result if result != "" else "0"
+    diff = (binary_to_decimal(a) - binary_to_decimal(b)) & ((1 << max_len) - 1)
+    return format(diff, 'b')
 
 
 def binary_compare(a, b):
@@ -144,225 +410,323 @@ def binary_compare(a, b):
     Сравнение двух двоичных чисел (без знака), заданных строками.
     Возвращает 1, если a > b, 0 если равны, -1 если a < b.
     """
-    a = a.lstrip('0')
-    b = b.lstrip('0')
-    if len(a) > len(b):
-        return 1
-    elif len(a) < len(b):
-        return -1
-    else:
-        if a > b:
-            return 1
-        elif a < b:
-            return -1
-        else:
-            return 0
-
-
-def multiply_in_direct_code(a, b, bit_length):
+    x = binary_to_decimal(a)
+    y = binary_to_decimal(b)
+    return (x > y) - (x < y)
+
+
+# Ширина модулей, до которой Карацуба не делит сомножители, а умножает сдвигом и сложением.
+# В чистом Python сдвиг-сложение быстрее Бута на всех измеренных ширинах (8 – 16384 бит),
+# а Карацуба с таким листом обгоняет его начиная примерно с 4096 бит (замеры lab1.benchmark)
+KARATSUBA_THRESHOLD = 2048
+
+
+def _shift_add_multiply(x, y):
+    """Умножение сдвигом и сложением: по одному частичному произведению на каждую единицу множителя"""
+    product = 0
+    for shift, bit in enumerate(reversed(format(y, 'b'))):
+        if bit == '1':
+            product += x << shift
+    return product
+
+
+def _traced_shift_add_multiply(x, y, emit):
+    """_shift_add_multiply с событием на каждое частичное произведение"""
+    product = 0
+    partials = 0
+    for shift, bit in enumerate(reversed(format(y, 'b'))):
+        if bit == '1':
+            product += x << shift
+            partials += 1
+            emit('partial_product', shift=shift, digit=1, partial=x << shift, accumulator=product)
+    emit('counts', partial_products=partials, additions=partials)
+    return product
+
+
+# Цифра Бута по основанию 4 для окна (y[2i+1], y[2i], y[2i-1])
+_BOOTH_DIGITS = (0, 1, 1, 2, -2, -1, -1, 0)
+
+
+def _booth_radix4_multiply(x, y):
+    """Умножение с перекодировкой Бута по основанию 4: цифры множителя из {-2, -1, 0, 1, 2},
+       частичных произведений вдвое меньше, чем разрядов"""
+    multiples = {1: x, 2: x << 1, -1: -x, -2: -(x << 1)}
+    bits = format(y, 'b')
+    # Ведущий ноль делает перекодировку беззнакового множителя корректной
+    bits = bits.zfill(len(bits) + 1 + (len(bits) + 1) % 2)
+    product = 0
+    prev = 0
+    shift = 0
+    for i in range(len(bits) - 1, 0, -2):
+        high = bits[i - 1] == '1'
+        digit = _BOOTH_DIGITS[(high << 2) | ((bits[i] == '1') << 1) | prev]
+        if digit:
+            product += multiples[digit] << shift
+        prev = high
+        shift += 2
+    return product
+
+
+def _traced_booth_radix4_multiply(x, y, emit):
+    """_booth_radix4_multiply с событием на каждую цифру Бута"""
+    multiples = {0: 0, 1: x, 2: x << 1, -1: -x, -2: -(x << 1)}
+    bits = format(y, 'b')
+    bits = bits.zfill(len(bits) + 1 + (len(bits) + 1) % 2)
+    product = 0
+    prev = 0
+    shift = 0
+    partials = 0
+    for i in range(len(bits) - 1, 0, -2):
+        high = bits[i - 1] == '1'
+        digit = _BOOTH_DIGITS[(high << 2) | ((bits[i] == '1') << 1) | prev]
+        if digit:
+            product += multiples[digit] << shift
+            partials += 1
+        emit('partial_product', shift=shift, digit=digit, partial=multiples[digit] << shift, accumulator=product)
+        prev = high
+        shift += 2
+    emit('counts', booth_digits=(len(bits) - 1) // 2, partial_products=partials, additions=partials)
+    return product
+
+
+def _karatsuba_multiply(x, y, emit=None):
+    """Умножение Карацубы: три рекурсивных умножения половин вместо четырёх,
+       узкие модули (до KARATSUBA_THRESHOLD бит) умножаются сдвигом и сложением"""
+    n = max(x.bit_length(), y.bit_length())
+    if n <= KARATSUBA_THRESHOLD:
+        if emit is None:
+            return _shift_add_multiply(x, y)
+        return _traced_shift_add_multiply(x, y, emit)
+    half = n // 2
+    mask = (1 << half) - 1
+    x_high, x_low = x >> half, x & mask
+    y_high, y_low = y >> half, y & mask
+    if emit is not None:
+        emit('split', bits=n, half=half)
+        emit('counts', karatsuba_splits=1)
+    high = _karatsuba_multiply(x_high, y_high, emit)
+    low = _karatsuba_multiply(x_low, y_low, emit)
+    middle = _karatsuba_multiply(x_high + x_low, y_high + y_low, emit) - high - low
+    return (high << (2 * half)) + (middle << half) + low
+
+
+MULTIPLICATION_METHODS = {
+    'shift_add': _shift_add_multiply,
+    'booth': _booth_radix4_multiply,
+    'karatsuba': _karatsuba_multiply,
+}
+
+# Те же умножители, сообщающие о своих шагах: вызываются с третьим аргументом emit
+TRACED_MULTIPLICATION_METHODS = {
+    'shift_add': _traced_shift_add_multiply,
+    'booth': _traced_booth_radix4_multiply,
+    'karatsuba': _karatsuba_multiply,
+}
+
+
+def multiply_in_direct_code(a, b, bit_length, method='karatsuba'):
     """
     Умножение двух чисел в прямом (знаковом) коде.
+    method выбирает умножитель модулей: 'shift_add', 'booth' (Бут по основанию 4)
+    или 'karatsuba'. По умолчанию ('karatsuba') модули до KARATSUBA_THRESHOLD бит
+    умножаются сдвигом и сложением, а более широкие делятся пополам по Карацубе;
+    Бут медленнее сдвига-сложения на всех ширинах и выполняется только по явному
+    method='booth'. Произведение модулей усекается до младших (bit_length - 1) разрядов.
     """
-    sign_a = '0' if a >= 0 else '1'
-    sign_b = '0' if b >= 0 else '1'
-    mag_a = decimal_to_binary(abs(a), bit_length - 1)
-    mag_b = decimal_to_binary(abs(b), bit_length - 1)
-
-    product = "0"
-    for i in range(len(mag_b) - 1, -1, -1):
-        if mag_b[i] == '1':
-            partial = mag_a + "0" * (len(mag_b) - 1 - i)
-            product = binary_add(product, partial)
-    if len(product) > bit_length - 1:
-        product = product[-(bit_length - 1):]
+    if method not in MULTIPLICATION_METHODS:
+        raise ValueError(f"Неизвестный метод умножения: {method}")
+    width = bit_length - 1
+    mask = (1 << width) - 1
+    # Старшие разряды сомножителей не влияют на усечённое произведение
+    x, y = abs(a) & mask, abs(b) & mask
+    result_sign = '0' if (a >= 0) == (b >= 0) else '1'
+    if tracing.HOOKS:
+        emit = tracing.emitter('multiplier')
+        emit('operands', a=x, b=y, bit_length=bit_length, method=method)
+        product = TRACED_MULTIPLICATION_METHODS[method](x, y, emit) & mask
+        emit('result', sign=int(result_sign), product=product)
+    elif method == 'karatsuba' and width <= KARATSUBA_THRESHOLD:
+        # Модули не шире листа Карацубы: сразу сдвиг-сложение, без рекурсивного вызова
+        product = _shift_add_multiply(x, y) & mask
     else:
-        product = product.zfill(bit_length - 1)
+        product = MULTIPLICATION_METHODS[method](x, y) & mask
+    return result_sign + decimal_to_binary(product, width)
 
-    result_sign = '0' if sign_a == sign_b else '1'
-    return result_sign + product
 
+NEWTON_THRESHOLD = 32
+NEWTON_BASE_BITS = 64
 
-def divide_in_direct_code(a, b, precision=5, int_bit_length=8):
-    """деление в прямом коде"""
-    if b == 0:
-        return "Ошибка: деление на ноль", None
 
-    result_sign = '0' if (a >= 0 and b > 0) or (a < 0 and b < 0) else '1'
-    dividend = decimal_to_binary(abs(a))
-    divisor = decimal_to_binary(abs(b))
-
-    quotient = ""
-    temp = ""
-    for bit in dividend:
-        temp += bit
-        temp = temp.lstrip('0')
-        if temp == "":
-            temp = "0"
-        if binary_compare(temp, divisor) >= 0:
-            quotient += "1"
-            temp = binary_subtract(temp, divisor)
+def _nonrestoring_divide(n, d):
+    """Деление без восстановления остатка: по одному разряду частного за шаг,
+       отрицательный остаток не восстанавливается, а компенсируется сложением на следующем шаге"""
+    remainder = 0
+    digits = []
+    for bit in format(n, 'b'):
+        if remainder >= 0:
+            remainder = (remainder << 1) + (bit == '1') - d
         else:
-            quotient += "0"
-    quotient = quotient.lstrip('0')
-    if quotient == "":
-        quotient = "0"
-    remainder = temp
-
-    fractional = ""
-    for _ in range(precision):
-        remainder = remainder + "0"
-        remainder = remainder.lstrip('0')
-        if remainder == "":
-            remainder = "0"
-        if binary_compare(remainder, divisor) >= 0:
-            fractional += "1"
-            remainder = binary_subtract(remainder, divisor)
+            remainder = (remainder << 1) + (bit == '1') + d
+        digits.append('1' if remainder >= 0 else '0')
+    if remainder < 0:
+        remainder += d
+    return int(''.join(digits), 2), remainder
+
+
+def _traced_nonrestoring_divide(n, d, emit):
+    """_nonrestoring_divide с событием на каждый разряд частного"""
+    remainder = 0
+    digits = []
+    subtractions = additions = 0
+    for position, bit in enumerate(format(n, 'b')):
+        if remainder >= 0:
+            remainder = (remainder << 1) + (bit == '1') - d
+            operation = 'subtract'
+            subtractions += 1
         else:
-            fractional += "0"
+            remainder = (remainder << 1) + (bit == '1') + d
+            operation = 'add'
+            additions += 1
+        digits.append('1' if remainder >= 0 else '0')
+        emit('step', position=position, operation=operation, remainder=remainder, digit=int(digits[-1]))
+    corrections = 0
+    if remainder < 0:
+        remainder += d
+        corrections = 1
+        emit('correction', remainder=remainder)
+    emit('counts', subtractions=subtractions, additions=additions, corrections=corrections)
+    return int(''.join(digits), 2), remainder
+
+
+def _reciprocal(d, precision, emit=None):
+    """Приближение 2 ** (d.bit_length() + precision) // d методом Ньютона–Рафсона
+       (точность удваивается на каждой итерации, ошибка – несколько единиц младшего разряда)"""
+    size = d.bit_length()
+    # Младшие разряды делителя не влияют на первые precision разрядов обратной величины
+    kept = min(size, precision + 8)
+    d_top = d >> (size - kept)
+    scale = kept + precision
+    if precision <= NEWTON_BASE_BITS:
+        seed = (1 << scale) // d_top
+        if emit is not None:
+            emit('seed', precision=precision, approximation=seed)
+        return seed
+    half = precision // 2 + 2
+    x = _reciprocal(d, half, emit) << (precision - half)
+    # x' = x * (2 - d * x): невязка поправляет приближение, удваивая число верных разрядов
+    residual = (1 << scale) - d_top * x
+    x += (x * residual) >> scale
+    if emit is not None:
+        emit('newton_iteration', precision=precision, residual=residual, approximation=x)
+        emit('counts', newton_iterations=1)
+    return x
+
+
+def _newton_divide(n, d, emit=None):
+    """Деление через обратную величину: частное = n * (1 / d) с последующей коррекцией"""
+    size = d.bit_length()
+    precision = n.bit_length() - size + 3
+    if precision <= 2:
+        return _nonrestoring_divide(n, d) if emit is None else _traced_nonrestoring_divide(n, d, emit)
+    quotient = (n * _reciprocal(d, precision, emit)) >> (size + precision)
+    remainder = n - quotient * d
+    corrections = 0
+    while remainder < 0:
+        quotient -= 1
+        remainder += d
+        corrections += 1
+    while remainder >= d:
+        quotient += 1
+        remainder -= d
+        corrections += 1
+    if emit is not None:
+        emit('correction', quotient=quotient, remainder=remainder, steps=corrections)
+        emit('counts', subtractions=1, multiplications=2, corrections=corrections)
+    return quotient, remainder
+
+
+def _auto_divide(n, d, emit=None):
+    """Короткие частные – делением без восстановления, длинные – через Ньютона–Рафсона"""
+    if n.bit_length() - d.bit_length() <= NEWTON_THRESHOLD:
+        return _nonrestoring_divide(n, d) if emit is None else _traced_nonrestoring_divide(n, d, emit)
+    return _newton_divide(n, d, emit)
+
+
+DIVISION_METHODS = {
+    'nonrestoring': _nonrestoring_divide,
+    'newton': _newton_divide,
+    'auto': _auto_divide,
+}
+
+TRACED_DIVISION_METHODS = {
+    'nonrestoring': _traced_nonrestoring_divide,
+    'newton': _newton_divide,
+    'auto': _auto_divide,
+}
+
+
+def divide_in_direct_code(a, b, precision=5, int_bit_length=8, method='auto', exact=False):
+    """деление в прямом коде
+       method выбирает делитель модулей: 'nonrestoring', 'newton' или 'auto'.
+       Дробная часть содержит ровно precision разрядов (с отбрасыванием остатка);
+       при exact=True вместо float возвращается точное значение fractions.Fraction"""
+    if b == 0:
+        return "Ошибка: деление на ноль", None
+    if method not in DIVISION_METHODS:
+        raise ValueError(f"Неизвестный метод деления: {method}")
+
+    result_sign = '0' if (a >= 0) == (b > 0) else '1'
+    # Целая и дробная части частного получаются одним делением |a| * 2 ** precision на |b|
+    if tracing.HOOKS:
+        emit = tracing.emitter('divider')
+        emit('operands', dividend=abs(a) << precision, divisor=abs(b), method=method)
+        quotient, remainder = TRACED_DIVISION_METHODS[method](abs(a) << precision, abs(b), emit)
+        emit('result', sign=int(result_sign), quotient=quotient, remainder=remainder)
+    else:
+        quotient, _ = DIVISION_METHODS[method](abs(a) << precision, abs(b))
+    int_part = quotient >> precision
+    fractional = format(quotient & ((1 << precision) - 1), f'0{precision}b') if precision else ""
 
-    int_part = quotient.zfill(int_bit_length - 1)
-    direct_int = result_sign + int_part
+    direct_int = result_sign + decimal_to_binary(int_part, int_bit_length - 1)
     final_result = direct_int + "." + fractional
 
-    dec_int = binary_to_decimal(quotient) if quotient != "" else 0
-    frac_val = 0
-    for i, bit in enumerate(fractional):
-        if bit == "1":
-            frac_val += 1 / (2 ** (i + 1))
-    dec_result = dec_int + frac_val
+    dec_result = Fraction(quotient, 1 << precision)
     if result_sign == '1':
         dec_result = -dec_result
-    return final_result, dec_result
+    return final_result, dec_result if exact else float(dec_result)
 
 
-def convert_float_to_ieee754(num):
+def convert_float_to_ieee754(num, fmt='binary32'):
     """
-    Преобразует десятичное число с плавающей точкой в 32-битовое представление IEEE-754.
-    Для отрицательных чисел вычисляется представление для abs(num), а затем меняется знак
-    (первый бит становится '1').
+    Преобразует десятичное число с плавающей точкой в представление IEEE-754 (по умолчанию 32 бита).
+    Мантисса округляется к ближайшему чётному, поддерживаются денормализованные числа,
+    бесконечности и NaN; fmt – 'binary16', 'binary32' или 'binary64'.
     """
-    sign_bit = "0"
-    if num < 0:
-        sign_bit = "1"
-        num = -num
-    int_part = int(num)
-    frac_part = num - int_part
-    bin_int = ""
-    if int_part == 0:
-        bin_int = "0"
-    else:
-        temp = int_part
-        while temp > 0:
-            bin_int = str(temp % 2) + bin_int
-            temp //= 2
-    bin_frac = ""
-    temp_frac = frac_part
-    for _ in range(30):
-        temp_frac *= 2
-        if temp_frac >= 1:
-            bin_frac += "1"
-            temp_frac -= 1
-        else:
-            bin_frac += "0"
-    if bin_int != "0":
-        exponent = len(bin_int) - 1
-        mantissa = (bin_int[1:] + bin_frac)[:23]
-        mantissa = mantissa.ljust(23, "0")
-    else:
-        index = 0
-        while index < len(bin_frac) and bin_frac[index] == "0":
-            index += 1
-        if index == len(bin_frac):
-            exponent = -127
-            mantissa = "0" * 23
-        else:
-            exponent = -(index + 1)
-            mantissa = bin_frac[index + 1:index + 1 + 23]
-            mantissa = mantissa.ljust(23, "0")
-    exp_val = exponent + 127
-    exp_bits = ""
-    temp_exp = exp_val
-    for _ in range(8):
-        exp_bits = str(temp_exp % 2) + exp_bits
-        temp_exp //= 2
-
-    ieee = sign_bit + exp_bits + mantissa
-    return ieee
+    return ieee754.to_bit_string(ieee754.encode(num, fmt), fmt)
 
 
 def ieee754_to_decimal(ieee):
     """
-    Преобразует 32-битовое представление IEEE-754 (строка) в десятичное число.
-    Извлекается знак, экспонента и мантисса, затем вычисляется итоговое значение.
+    Преобразует представление IEEE-754 (строка из 16, 32 или 64 бит) в десятичное число.
+    Формат определяется по длине строки.
     """
-    sign = 1 if ieee[0] == "0" else -1
-    exponent = 0
-    for bit in ieee[1:9]:
-        exponent = exponent * 2 + (1 if bit == "1" else 0)
-    exponent = exponent - 127
-    mantissa = 1.0
-    frac_bits = ieee[9:]
-    power = 0.5
-    for bit in frac_bits:
-        if bit == "1":
-            mantissa += power
-        power /= 2
-    return sign * mantissa * (2 ** exponent)
-
-
-def add_ieee754(bin1, bin2):
+    if len(ieee) not in ieee754.FORMATS_BY_WIDTH:
+        raise ValueError(f"Неподдерживаемая длина представления IEEE-754: {len(ieee)}")
+    return ieee754.decode(int(ieee, 2), ieee754.FORMATS_BY_WIDTH[len(ieee)])
+
+
+def add_ieee754(bin1, bin2, rounding='nearest_even'):
     """
-    Складывает два числа, представленных в формате IEEE-754 (32 бита), с корректной обработкой знака.
+    Складывает два числа, представленных в формате IEEE-754 (16, 32 или 64 бита), с корректной обработкой знака.
+    Сумма округляется через guard/round/sticky разряды в режиме rounding (см. softfloat.ROUNDING_MODES).
     """
-    sign1 = 0 if bin1[0] == '0' else 1
-    sign2 = 0 if bin2[0] == '0' else 1
-
-    exp1 = 0
-    for bit in bin1[1:9]:
-        exp1 = exp1 * 2 + (1 if bit == "1" else 0)
-    exp2 = 0
-    for bit in bin2[1:9]:
-        exp2 = exp2 * 2 + (1 if bit == "1" else 0)
-
-    mant1 = (1 << 23) + int(bin1[9:], 2)
-    mant2 = (1 << 23) + int(bin2[9:], 2)
-    exp = exp1
-    if exp1 > exp2:
-        shift = exp1 - exp2
-        mant2 >>= shift
-    elif exp2 > exp1:
-        shift = exp2 - exp1
-        mant1 >>= shift
-        exp = exp2
-
-    if sign1 == sign2:
-        result_mant = mant1 + mant2
-        result_sign = sign1
+    if len(bin1) != len(bin2) or len(bin1) not in ieee754.FORMATS_BY_WIDTH:
+        raise ValueError("Слагаемые должны быть представлены в одном формате IEEE-754")
+    fmt = ieee754.FORMATS_BY_WIDTH[len(bin1)]
+    if tracing.HOOKS:
+        emit = tracing.emitter('ieee_adder')
+        result = softfloat.add(int(bin1, 2), int(bin2, 2), fmt, rounding, emit)
+        emit('result', bits=result, rounding=rounding)
     else:
-        if mant1 >= mant2:
-            result_mant = mant1 - mant2
-            result_sign = sign1
-        else:
-            result_mant = mant2 - mant1
-            result_sign = sign2
-    if result_mant == 0:
-        return "0" * 32
-    while result_mant >= (1 << 24):
-        result_mant >>= 1
-        exp += 1
-    while result_mant < (1 << 23):
-        result_mant <<= 1
-        exp -= 1
-    frac = result_mant - (1 << 23)
-    exp_bits = ""
-    temp_exp = exp
-    for _ in range(8):
-        exp_bits = ("1" if (temp_exp % 2) == 1 else "0") + exp_bits
-        temp_exp //= 2
-    frac_bits = ""
-    for i in range(23):
-        bit = (frac >> (22 - i)) & 1
-        frac_bits += "1" if bit == 1 else "0"
-
-    result_ieee = ("0" if result_sign == 0 else "1") + exp_bits + frac_bits
-    return result_ieee
+        result = softfloat.add(int(bin1, 2), int(bin2, 2), fmt, rounding)
+    return ieee754.to_bit_string(result, fmt)
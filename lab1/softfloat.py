@@ -0,0 +1,471 @@
+"""Программная арифметика с плавающей точкой над разрядами IEEE-754.
+
+Сложение, вычитание, умножение, деление и квадратный корень с округлением
+через защитный (guard), округляющий (round) и липкий (sticky) разряды во всех
+четырёх режимах IEEE. Скалярные функции принимают и возвращают целые с
+разрядами числа, пакетные – массивы uint32/uint64 и дают те же разряды.
+"""
+from math import isqrt
+
+from ieee754 import get_format, split_fields, join_fields, bias
+
+try:
+    import numpy as np
+except ImportError:  # пакетные функции требуют NumPy
+    np = None
+
+
+ROUNDING_MODES = ('nearest_even', 'toward_zero', 'upward', 'downward')
+
+
+def _check_rounding(rounding):
+    if rounding not in ROUNDING_MODES:
+        raise ValueError(f"Неизвестный режим округления: {rounding}")
+
+
+def _max_exponent(f):
+    return (1 << f.exponent_bits) - 1
+
+
+def default_nan(fmt='binary32'):
+    """Тихий NaN, возвращаемый недопустимыми операциями (0/0, inf - inf, sqrt(-1))"""
+    f = get_format(fmt)
+    return join_fields(0, _max_exponent(f), 1 << (f.mantissa_bits - 1), f)
+
+
+def _overflow(sign, f, rounding):
+    """Результат переполнения: бесконечность или наибольшее конечное число, в зависимости от режима"""
+    to_infinity = (rounding == 'nearest_even'
+                   or (rounding == 'upward' and not sign)
+                   or (rounding == 'downward' and sign))
+    if to_infinity:
+        return join_fields(sign, _max_exponent(f), 0, f)
+    return join_fields(sign, _max_exponent(f) - 1, (1 << f.mantissa_bits) - 1, f)
+
+
+def _round_up(rounding, sign, lsb, guard, round_bit, sticky):
+    if rounding == 'nearest_even':
+        return guard and (round_bit or sticky or lsb)
+    if rounding == 'toward_zero':
+        return False
+    inexact = guard or round_bit or sticky
+    return inexact and (sign == 0 if rounding == 'upward' else sign == 1)
+
+
+def _round_pack(sign, sig, exp, sticky, f, rounding, emit=None):
+    """Округление значения (-1) ** sign * (sig + sticky-хвост) * 2 ** exp до формата f.
+       emit(step, **data), если задан, получает разряды guard/round/sticky и решение об округлении"""
+    m = f.mantissa_bits
+    precision = m + 1
+    lsb_exponent = max(exp + sig.bit_length() - precision, 1 - bias(f) - m)
+    shift = lsb_exponent - exp
+    if shift <= 0:
+        kept = sig << -shift
+        guard = round_bit = 0
+    else:
+        kept = sig >> shift
+        guard = (sig >> (shift - 1)) & 1
+        round_bit = (sig >> (shift - 2)) & 1 if shift >= 2 else 0
+        sticky = sticky or (shift >= 3 and sig & ((1 << (shift - 2)) - 1) != 0)
+
+    rounded_up = _round_up(rounding, sign, kept & 1, guard, round_bit, sticky)
+    if emit is not None:
+        inexact = bool(guard or round_bit or sticky)
+        emit('round', guard=guard, round_bit=round_bit, sticky=bool(sticky), rounded_up=bool(rounded_up))
+        emit('counts', inexact=int(inexact), rounded_up=int(bool(rounded_up)))
+    if rounded_up:
+        kept += 1
+        if kept == 1 << precision:
+            kept >>= 1
+            lsb_exponent += 1
+
+    if kept < 1 << m:
+        return join_fields(sign, 0, kept, f)
+    biased = lsb_exponent + m + bias(f)
+    if biased >= _max_exponent(f):
+        return _overflow(sign, f, rounding)
+    return join_fields(sign, biased, kept - (1 << m), f)
+
+
+def _unpack(bits, f):
+    """(знак, мантисса-целое, порядок младшего разряда, класс) для разрядов числа"""
+    sign, exponent, mantissa = split_fields(bits, f)
+    if exponent == _max_exponent(f):
+        return sign, 0, 0, 'nan' if mantissa else 'infinite'
+    if exponent == 0:
+        return sign, mantissa, 1 - bias(f) - f.mantissa_bits, 'finite'
+    return sign, mantissa | (1 << f.mantissa_bits), exponent - bias(f) - f.mantissa_bits, 'finite'
+
+
+def _quiet(bits, f):
+    return bits | (1 << (f.mantissa_bits - 1))
+
+
+def add(a, b, fmt='binary32', rounding='nearest_even', emit=None):
+    """Сумма a + b; emit(step, **data), если задан, получает шаги выравнивания,
+       сложения мантисс, нормализации и округления (см. tracing)"""
+    f = get_format(fmt)
+    _check_rounding(rounding)
+    sa, siga, ea, ka = _unpack(a, f)
+    sb, sigb, eb, kb = _unpack(b, f)
+    if ka == 'nan':
+        return _quiet(a, f)
+    if kb == 'nan':
+        return _quiet(b, f)
+    if ka == 'infinite' or kb == 'infinite':
+        if ka == kb and sa != sb:
+            return default_nan(f)
+        return join_fields(sa if ka == 'infinite' else sb, _max_exponent(f), 0, f)
+
+    # Слагаемые выравниваются по меньшему порядку, поэтому сумма вычисляется точно
+    exp = min(ea, eb)
+    total = (-1) ** sa * (siga << (ea - exp)) + (-1) ** sb * (sigb << (eb - exp))
+    if emit is not None:
+        _trace_add(emit, siga, ea, sigb, eb, total, exp)
+    if total == 0:
+        sign = sa if sa == sb else int(rounding == 'downward')
+        return join_fields(sign, 0, 0, f)
+    return _round_pack(int(total < 0), abs(total), exp, False, f, rounding, emit)
+
+
+def _trace_add(emit, siga, ea, sigb, eb, total, exp):
+    """События сложения мантисс: сдвиг выравнивания и сдвиг нормализации суммы"""
+    distance = abs(ea - eb)
+    emit('align', distance=distance, exponent=exp)
+    emit('add', significand=total, exponent=exp)
+    # Нормализация: насколько старший разряд суммы сместился относительно старшего разряда большего слагаемого
+    # (> 0 – сдвиг влево после взаимного уничтожения разрядов, -1 – сдвиг вправо после переноса)
+    top = max(ea + siga.bit_length(), eb + sigb.bit_length())
+    shift = top - (exp + abs(total).bit_length()) if total else 0
+    emit('normalize', shift=shift)
+    emit('counts', additions=1, alignment_shift_bits=distance, normalization_shifts=abs(shift))
+
+
+def sub(a, b, fmt='binary32', rounding='nearest_even'):
+    """Разность a - b = a + (-b)"""
+    f = get_format(fmt)
+    return add(a, b ^ (1 << (f.exponent_bits + f.mantissa_bits)), f, rounding)
+
+
+def mul(a, b, fmt='binary32', rounding='nearest_even'):
+    """Произведение a * b"""
+    f = get_format(fmt)
+    _check_rounding(rounding)
+    sa, siga, ea, ka = _unpack(a, f)
+    sb, sigb, eb, kb = _unpack(b, f)
+    sign = sa ^ sb
+    if ka == 'nan':
+        return _quiet(a, f)
+    if kb == 'nan':
+        return _quiet(b, f)
+    if ka == 'infinite' or kb == 'infinite':
+        if (ka == 'finite' and siga == 0) or (kb == 'finite' and sigb == 0):
+            return default_nan(f)
+        return join_fields(sign, _max_exponent(f), 0, f)
+    return _round_pack(sign, siga * sigb, ea + eb, False, f, rounding)
+
+
+def div(a, b, fmt='binary32', rounding='nearest_even'):
+    """Частное a / b"""
+    f = get_format(fmt)
+    _check_rounding(rounding)
+    sa, siga, ea, ka = _unpack(a, f)
+    sb, sigb, eb, kb = _unpack(b, f)
+    sign = sa ^ sb
+    if ka == 'nan':
+        return _quiet(a, f)
+    if kb == 'nan':
+        return _quiet(b, f)
+    if ka == 'infinite':
+        return default_nan(f) if kb == 'infinite' else join_fields(sign, _max_exponent(f), 0, f)
+    if kb == 'infinite':
+        return join_fields(sign, 0, 0, f)
+    if sigb == 0:
+        return default_nan(f) if siga == 0 else join_fields(sign, _max_exponent(f), 0, f)
+    # Частное с запасом в несколько разрядов сверх точности формата, остаток – в sticky
+    extra = max(0, f.mantissa_bits + 4 - siga.bit_length() + sigb.bit_length())
+    quotient, remainder = divmod(siga << extra, sigb)
+    return _round_pack(sign, quotient, ea - eb - extra, remainder != 0, f, rounding)
+
+
+def sqrt(a, fmt='binary32', rounding='nearest_even'):
+    """Квадратный корень"""
+    f = get_format(fmt)
+    _check_rounding(rounding)
+    sign, sig, exp, kind = _unpack(a, f)
+    if kind == 'nan':
+        return _quiet(a, f)
+    if sig == 0 and kind == 'finite':
+        return a
+    if sign:
+        return default_nan(f)
+    if kind == 'infinite':
+        return a
+    if exp & 1:
+        sig <<= 1
+        exp -= 1
+    # Подкоренное выражение сдвигается на чётное число разрядов, чтобы у корня был запас разрядов под округление
+    extra = max(0, 2 * (f.mantissa_bits + 3) - sig.bit_length() + 1)
+    extra += extra & 1
+    radicand = sig << extra
+    root = isqrt(radicand)
+    return _round_pack(0, root, (exp - extra) // 2, root * root != radicand, f, rounding)
+
+
+# Пакетный режим: все величины хранятся в полосах uint64, значимые части не шире 60 бит
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("Пакетные функции требуют NumPy")
+
+
+def _u64(value):
+    return np.uint64(value)
+
+
+def _bit_length(x):
+    """Поэлементная длина в битах для uint64 < 2 ** 60"""
+    n = np.frexp(x.astype(np.float64))[1].astype(np.int64)
+    # Преобразование во float может округлить вверх до следующей степени двойки
+    overshoot = (n > 0) & ((x >> np.clip(n - 1, 0, 63).astype(np.uint64)) == 0)
+    return n - overshoot
+
+
+def _round_pack_batch(sign, sig, exp, sticky, f, rounding):
+    """Векторный аналог _round_pack: sign, sig – uint64, exp – int64, sticky – bool"""
+    m = f.mantissa_bits
+    precision = m + 1
+    one = _u64(1)
+    lsb_exponent = np.maximum(exp + _bit_length(sig) - precision, 1 - bias(f) - m)
+    shift = lsb_exponent - exp
+    # sig < 2 ** 60, поэтому сдвиг вправо на 62 уже сбрасывает все разряды в sticky
+    right = np.clip(shift, 0, 62).astype(np.uint64)
+    left = np.clip(-shift, 0, 63).astype(np.uint64)
+    kept = (sig >> right) << left
+    dropped = sig & ((one << right) - one)
+    guard = (right >= 1) & (((dropped >> (np.maximum(right, one) - one)) & one) != 0)
+    below_round = np.maximum(right, _u64(2)) - _u64(2)
+    round_bit = (right >= 2) & (((dropped >> below_round) & one) != 0)
+    sticky = sticky | ((dropped & ((one << below_round) - one)) != 0)
+
+    if rounding == 'nearest_even':
+        increment = guard & (round_bit | sticky | ((kept & one) != 0))
+    elif rounding == 'toward_zero':
+        increment = np.zeros(kept.shape, dtype=bool)
+    else:
+        inexact = guard | round_bit | sticky
+        increment = inexact & (sign == (0 if rounding == 'upward' else 1))
+    kept = kept + increment.astype(np.uint64)
+    carry = kept == (one << _u64(precision))
+    kept = np.where(carry, kept >> one, kept)
+    lsb_exponent = lsb_exponent + carry
+
+    normal = kept >= (one << _u64(m))
+    biased = np.where(normal, lsb_exponent + m + bias(f), 0)
+    overflowed = biased >= _max_exponent(f)
+    biased = np.clip(biased, 0, _max_exponent(f)).astype(np.uint64)
+    result = ((sign << _u64(f.exponent_bits + m)) | (biased << _u64(m))
+              | (kept & _u64((1 << m) - 1)))
+    to_infinity = np.full(kept.shape, rounding == 'nearest_even')
+    if rounding == 'upward':
+        to_infinity = sign == 0
+    elif rounding == 'downward':
+        to_infinity = sign == 1
+    largest = _u64(join_fields(0, _max_exponent(f) - 1, (1 << m) - 1, f))
+    infinity = _u64(join_fields(0, _max_exponent(f), 0, f))
+    saturated = (sign << _u64(f.exponent_bits + m)) | np.where(to_infinity, infinity, largest)
+    return np.where(overflowed, saturated, result)
+
+
+def _unpack_batch(bits, f):
+    """Поля пакета: знак, мантисса-целое, порядок младшего разряда, маски NaN и бесконечностей"""
+    m = f.mantissa_bits
+    bits = np.asarray(bits, dtype=f.uint_dtype).astype(np.uint64)
+    sign = bits >> _u64(f.exponent_bits + m)
+    exponent = (bits >> _u64(m)) & _u64(_max_exponent(f))
+    mantissa = bits & _u64((1 << m) - 1)
+    special = exponent == _max_exponent(f)
+    sig = np.where(exponent == 0, mantissa, mantissa | _u64(1 << m))
+    sig = np.where(special, _u64(0), sig)
+    exp = np.maximum(exponent.astype(np.int64), 1) - bias(f) - m
+    return bits, sign, sig, exp, special & (mantissa != 0), special & (mantissa == 0)
+
+
+def _normalize_batch(sig, exp, f):
+    """Денормализованные мантиссы сдвигаются так, чтобы старший разряд стоял в позиции mantissa_bits"""
+    n = _bit_length(sig)
+    shift = np.where(sig == 0, 0, f.mantissa_bits + 1 - n)
+    return sig << shift.astype(np.uint64), exp - shift
+
+
+def _finish_batch(result, nan_result, nan_mask, f):
+    return np.where(nan_mask, nan_result, result).astype(f.uint_dtype)
+
+
+def _propagated_nan(a_bits, a_nan, b_bits, f):
+    quiet = _u64(1 << (f.mantissa_bits - 1))
+    return np.where(a_nan, a_bits | quiet, b_bits | quiet)
+
+
+def add_batch(a, b, fmt='binary32', rounding='nearest_even'):
+    """Поэлементная сумма массивов разрядов a + b"""
+    _require_numpy()
+    f = get_format(fmt)
+    _check_rounding(rounding)
+    a_bits, sa, siga, ea, a_nan, a_inf = _unpack_batch(a, f)
+    b_bits, sb, sigb, eb, b_nan, b_inf = _unpack_batch(b, f)
+
+    # Первым операндом становится больший по модулю, тогда разность мантисс неотрицательна
+    swap = (eb > ea) | ((eb == ea) & (sigb > siga))
+    big_sign, small_sign = np.where(swap, sb, sa), np.where(swap, sa, sb)
+    big_sig, small_sig = np.where(swap, sigb, siga), np.where(swap, siga, sigb)
+    big_exp, small_exp = np.where(swap, eb, ea), np.where(swap, ea, eb)
+
+    # Три дополнительных разряда (guard, round, sticky); выдвинутые за них биты собираются в sticky
+    one = _u64(1)
+    distance = np.clip(big_exp - small_exp, 0, 63).astype(np.uint64)
+    aligned = small_sig << _u64(3)
+    lost = (aligned & ((one << distance) - one)) != 0
+    aligned = (aligned >> distance) | lost.astype(np.uint64)
+    same_sign = big_sign == small_sign
+    big_sig = big_sig << _u64(3)
+    total = np.where(same_sign, big_sig + aligned, big_sig - aligned)
+
+    zero_sign = np.where(same_sign, big_sign, _u64(int(rounding == 'downward')))
+    sign = np.where(total == 0, zero_sign, big_sign)
+    result = _round_pack_batch(sign, total, big_exp - 3, np.zeros(total.shape, dtype=bool), f, rounding)
+
+    infinity = _u64(join_fields(0, _max_exponent(f), 0, f))
+    sign_shift = _u64(f.exponent_bits + f.mantissa_bits)
+    result = np.where(a_inf, (sa << sign_shift) | infinity, result)
+    result = np.where(b_inf & ~a_inf, (sb << sign_shift) | infinity, result)
+    invalid = a_inf & b_inf & (sa != sb)
+    nan_result = np.where(a_nan | b_nan, _propagated_nan(a_bits, a_nan, b_bits, f), _u64(default_nan(f)))
+    return _finish_batch(result, nan_result, a_nan | b_nan | invalid, f)
+
+
+def sub_batch(a, b, fmt='binary32', rounding='nearest_even'):
+    """Поэлементная разность a - b = a + (-b)"""
+    _require_numpy()
+    f = get_format(fmt)
+    negated = np.asarray(b, dtype=f.uint_dtype) ^ np.dtype(f.uint_dtype).type(1 << (f.exponent_bits + f.mantissa_bits))
+    return add_batch(a, negated, f, rounding)
+
+
+def _wide_product(siga, sigb, f):
+    """Произведение нормализованных мантисс как (старшая часть с запасом, sticky, сдвиг порядка)"""
+    m = f.mantissa_bits
+    if 2 * (m + 1) <= 60:
+        return siga * sigb, np.zeros(siga.shape, dtype=bool), 0
+    # Мантиссы binary64 делятся на половины по 26 бит, частичные произведения не превышают 2 ** 54
+    half = _u64(26)
+    low_mask = _u64((1 << 26) - 1)
+    a_high, a_low = siga >> half, siga & low_mask
+    b_high, b_low = sigb >> half, sigb & low_mask
+    middle = a_high * b_low + a_low * b_high
+    low = a_low * b_low + ((middle & low_mask) << half)
+    high = a_high * b_high + (middle >> half) + (low >> _u64(2 * 26))
+    low &= _u64((1 << (2 * 26)) - 1)
+    # Оставляем 3 разряда младшей части над sticky
+    tail = 2 * 26 - 3
+    sig = (high << _u64(3)) | (low >> _u64(tail))
+    sticky = (low & _u64((1 << tail) - 1)) != 0
+    return sig, sticky, tail
+
+
+def mul_batch(a, b, fmt='binary32', rounding='nearest_even'):
+    """Поэлементное произведение a * b"""
+    _require_numpy()
+    f = get_format(fmt)
+    _check_rounding(rounding)
+    a_bits, sa, siga, ea, a_nan, a_inf = _unpack_batch(a, f)
+    b_bits, sb, sigb, eb, b_nan, b_inf = _unpack_batch(b, f)
+    sign = sa ^ sb
+    siga, ea = _normalize_batch(siga, ea, f)
+    sigb, eb = _normalize_batch(sigb, eb, f)
+    sig, sticky, tail = _wide_product(siga, sigb, f)
+    result = _round_pack_batch(sign, sig, ea + eb + tail, sticky, f, rounding)
+
+    infinity = _u64(join_fields(0, _max_exponent(f), 0, f))
+    sign_shift = _u64(f.exponent_bits + f.mantissa_bits)
+    result = np.where(a_inf | b_inf, (sign << sign_shift) | infinity, result)
+    invalid = (a_inf & (sigb == 0) & ~b_inf & ~b_nan) | (b_inf & (siga == 0) & ~a_inf & ~a_nan)
+    nan_result = np.where(a_nan | b_nan, _propagated_nan(a_bits, a_nan, b_bits, f), _u64(default_nan(f)))
+    return _finish_batch(result, nan_result, a_nan | b_nan | invalid, f)
+
+
+def div_batch(a, b, fmt='binary32', rounding='nearest_even'):
+    """Поэлементное частное a / b"""
+    _require_numpy()
+    f = get_format(fmt)
+    _check_rounding(rounding)
+    m = f.mantissa_bits
+    a_bits, sa, siga, ea, a_nan, a_inf = _unpack_batch(a, f)
+    b_bits, sb, sigb, eb, b_nan, b_inf = _unpack_batch(b, f)
+    sign = sa ^ sb
+    siga, ea = _normalize_batch(siga, ea, f)
+    sigb, eb = _normalize_batch(sigb, eb, f)
+    a_zero = (siga == 0) & ~a_inf & ~a_nan
+    b_zero = (sigb == 0) & ~b_inf & ~b_nan
+    divisor = np.where(sigb == 0, _u64(1 << m), sigb)
+
+    # Частное floor(siga * 2 ** (m + 3) / sigb) имеет m + 3 или m + 4 разряда
+    if 2 * m + 5 <= 63:
+        dividend = siga << _u64(m + 3)
+        quotient, remainder = dividend // divisor, dividend % divisor
+    else:
+        quotient = np.zeros(siga.shape, dtype=np.uint64)
+        remainder = siga.copy()
+        for _ in range(m + 4):
+            fits = remainder >= divisor
+            quotient = (quotient << _u64(1)) | fits.astype(np.uint64)
+            remainder = np.where(fits, remainder - divisor, remainder) << _u64(1)
+    result = _round_pack_batch(sign, quotient, ea - eb - (m + 3), remainder != 0, f, rounding)
+
+    sign_shift = _u64(f.exponent_bits + f.mantissa_bits)
+    infinity = _u64(join_fields(0, _max_exponent(f), 0, f))
+    result = np.where(a_inf | (b_zero & ~a_zero), (sign << sign_shift) | infinity, result)
+    result = np.where(b_inf | a_zero, sign << sign_shift, result)
+    invalid = (a_inf & b_inf) | (a_zero & b_zero)
+    nan_result = np.where(a_nan | b_nan, _propagated_nan(a_bits, a_nan, b_bits, f), _u64(default_nan(f)))
+    return _finish_batch(result, nan_result, a_nan | b_nan | invalid, f)
+
+
+def sqrt_batch(a, fmt='binary32', rounding='nearest_even'):
+    """Поэлементный квадратный корень"""
+    _require_numpy()
+    f = get_format(fmt)
+    _check_rounding(rounding)
+    m = f.mantissa_bits
+    a_bits, sign, sig, exp, a_nan, a_inf = _unpack_batch(a, f)
+    sig, exp = _normalize_batch(sig, exp, f)
+    odd = (exp & 1) == 1
+    sig = np.where(odd, sig << _u64(1), sig)
+    exp = exp - odd
+
+    # Подкоренное sig * 2 ** pad обрабатывается парами разрядов, начиная со старших
+    width = m + 2 + ((m + 2) & 1)
+    total = 2 * (m + 3)
+    pad = total - width
+    root = np.zeros(sig.shape, dtype=np.uint64)
+    remainder = np.zeros(sig.shape, dtype=np.uint64)
+    for position in range(total - 2, -1, -2):
+        source = position - pad
+        pair = (sig >> _u64(source)) & _u64(3) if source >= 0 else _u64(0)
+        remainder = (remainder << _u64(2)) | pair
+        trial = (root << _u64(2)) | _u64(1)
+        fits = remainder >= trial
+        remainder = np.where(fits, remainder - trial, remainder)
+        root = (root << _u64(1)) | fits.astype(np.uint64)
+    result = _round_pack_batch(np.zeros(sig.shape, dtype=np.uint64), root, (exp - pad) // 2,
+                               remainder != 0, f, rounding)
+
+    zero = (sig == 0) & ~a_inf & ~a_nan
+    result = np.where(zero | (a_inf & (sign == 0)), a_bits, result)
+    invalid = (sign == 1) & ~zero & ~a_nan
+    nan_result = np.where(a_nan, a_bits | _u64(1 << (m - 1)), _u64(default_nan(f)))
+    return _finish_batch(result, nan_result, a_nan | invalid, f)
+
+
+OPERATIONS = {'add': add, 'sub': sub, 'mul': mul, 'div': div}
+BATCH_OPERATIONS = {'add': add_batch, 'sub': sub_batch, 'mul': mul_batch, 'div': div_batch}
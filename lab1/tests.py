@@ -1,5 +1,15 @@
+import io
+import json
+import random
 import unittest
+from fractions import Fraction
 from run import *
+from benchmark import scaling_exponent, percentile, run_suite, compare
+from main import process_pair, run_batch
+import codes
+import ieee754
+import softfloat
+import tracing
 
 class TestBinaryArithmetic(unittest.TestCase):
     def test_decimal_to_binary(self):
@@ -48,6 +58,164 @@ class TestBinaryArithmetic(unittest.TestCase):
         self.assertAlmostEqual(div_dec, -2.3125, places=3)
 
 
+class TestWord(unittest.TestCase):
+    def test_views(self):
+        word = Word(-5, 8)
+        self.assertEqual(word.signed(), -5)
+        self.assertEqual(word.direct_code(), "10000101")
+        self.assertEqual(word.reverse_code(), "11111010")
+        self.assertEqual(word.additional_code(), "11111011")
+        self.assertEqual(Word.from_bits("11111011"), word)
+
+    def test_arithmetic_wraps(self):
+        self.assertEqual((Word(100, 8) + Word(100, 8)).signed(), -56)
+        self.assertEqual((Word(2, 8) - 3).signed(), -1)
+        self.assertEqual((Word(5, 8) * -3).signed(), -15)
+        self.assertEqual((Word(7, 8) // -2).signed(), -3)
+        with self.assertRaises(ValueError):
+            Word(1, 8) + Word(1, 16)
+
+    def test_codes_match_word(self):
+        for n in range(-128, 128):
+            self.assertEqual(get_additional_code(n, 8), format(n & 0xFF, "08b"))
+            self.assertEqual(twos_complement_to_decimal(get_additional_code(n, 8)), n)
+
+
+class TestCodeCache(unittest.TestCase):
+    def test_tables_match_direct_computation(self):
+        cache = CodeCache(table_max_width=8)
+        cache.warm(8)
+        for n in range(-128, 128):
+            self.assertEqual(cache.lookup('additional', n, 8), format(n & 0xFF, "08b"))
+            self.assertEqual(cache.lookup('negative', n, 8), "1" + format(abs(n), "07b"))
+        self.assertEqual(cache.lookup('reverse', -5, 8), "11111010")
+        self.assertEqual(cache.lookup('positive', 200, 8), "011001000")
+        with self.assertRaises(ValueError):
+            cache.lookup('positive', -1, 8)
+
+    def test_stats_and_drop(self):
+        cache = CodeCache(table_max_width=8, lru_size=2)
+        cache.lookup('additional', -5, 8)
+        cache.lookup('additional', -5, 8)
+        stats = cache.stats()
+        self.assertEqual((stats['misses'], stats['table_hits']), (1, 1))
+        self.assertEqual(stats['tables'], [('additional', 8)])
+        cache.drop(8)
+        self.assertEqual(cache.stats()['tables'], [])
+
+    def test_lru_for_wide_words(self):
+        cache = CodeCache(table_max_width=8, lru_size=2)
+        for n in (1, 2, 1, 3, 2):
+            cache.lookup('additional', n, 32)
+        stats = cache.stats()
+        self.assertEqual((stats['lru_hits'], stats['misses'], stats['lru_entries']), (1, 4, 2))
+        with self.assertRaises(ValueError):
+            cache.warm(32)
+
+
+class TestWideBinaryKernels(unittest.TestCase):
+    def test_matches_integer_arithmetic(self):
+        rng = random.Random(7)
+        for width in (1, 63, 64, 65, 4096):
+            x = rng.getrandbits(width) | (1 << (width - 1))
+            y = rng.getrandbits(width - 1) if width > 1 else 0
+            a, b = format(x, 'b'), format(y, 'b')
+            self.assertEqual(binary_add(a, b), format(x + y, f'0{width}b'))
+            self.assertEqual(binary_subtract(a, b), format(x - y, 'b'))
+            self.assertEqual(binary_compare(a, b), 1 if x > y else 0)
+            self.assertEqual(binary_compare(b, a), -1 if x > y else 0)
+            self.assertEqual(binary_to_decimal(a), x)
+
+    def test_keeps_padding_and_carry(self):
+        self.assertEqual(binary_add("0011", "1"), "0100")
+        self.assertEqual(binary_add("1111", "0001"), "10000")
+        self.assertEqual(binary_subtract("0100", "0100"), "0")
+        self.assertEqual(binary_compare("0001", "1"), 0)
+
+    def test_scaling_exponent(self):
+        samples = [(n, 3e-9 * n) for n in (4096, 8192, 16384)]
+        self.assertAlmostEqual(scaling_exponent(samples), 1.0)
+
+
+class TestMultiplicationEngines(unittest.TestCase):
+    def test_methods_agree_with_shift_add(self):
+        for a in range(-40, 41, 3):
+            for b in range(-40, 41, 7):
+                expected = multiply_in_direct_code(a, b, 8, method='shift_add')
+                for method in MULTIPLICATION_METHODS:
+                    self.assertEqual(multiply_in_direct_code(a, b, 8, method=method), expected)
+
+    def test_truncation_and_sign(self):
+        self.assertEqual(multiply_in_direct_code(100, 3, 8), "0" + format(300 % 128, "07b"))
+        self.assertEqual(multiply_in_direct_code(-7, -9, 8), "0" + format(63, "07b"))
+        self.assertEqual(multiply_in_direct_code(0, -9, 8), "10000000")
+
+    def test_wide_operands(self):
+        rng = random.Random(11)
+        x = rng.getrandbits(20000)
+        y = rng.getrandbits(20000)
+        width = 40001
+        expected = "1" + format(x * y, f"0{width - 1}b")
+        for method in ('booth', 'karatsuba'):
+            self.assertEqual(multiply_in_direct_code(x, -y, width, method=method), expected)
+
+    def test_unknown_method(self):
+        with self.assertRaises(ValueError):
+            multiply_in_direct_code(1, 1, 8, method='wallace')
+
+
+class TestDivisionEngines(unittest.TestCase):
+    def test_methods_agree(self):
+        for a in range(-50, 51, 7):
+            for b in (-9, -3, 1, 5, 13):
+                expected = divide_in_direct_code(a, b, 8, method='nonrestoring')
+                for method in DIVISION_METHODS:
+                    self.assertEqual(divide_in_direct_code(a, b, 8, method=method), expected)
+
+    def test_exact_fraction(self):
+        div_bin, div_frac = divide_in_direct_code(7, -3, precision=5, exact=True)
+        self.assertEqual(div_bin, "10000010.01010")
+        self.assertEqual(div_frac, Fraction(-74, 32))
+
+    def test_long_fraction(self):
+        precision = 4000
+        div_bin, div_frac = divide_in_direct_code(1, 3, precision=precision, exact=True)
+        self.assertEqual(div_bin, "00000000." + "01" * (precision // 2))
+        self.assertEqual(div_frac, Fraction((1 << precision) // 3, 1 << precision))
+
+    def test_division_by_zero(self):
+        self.assertEqual(divide_in_direct_code(1, 0), ("Ошибка: деление на ноль", None))
+
+
+@unittest.skipIf(np is None, "NumPy не установлен")
+class TestBatchAdditionalCode(unittest.TestCase):
+    def test_matches_scalar(self):
+        rng = random.Random(3)
+        for bit_length in (4, 8, 64):
+            low, high = -(1 << (bit_length - 1)), (1 << (bit_length - 1)) - 1
+            a = [rng.randint(low, high) for _ in range(200)] + [low, high]
+            b = [rng.randint(low, high) for _ in range(200)] + [low, high]
+            for batch, scalar in ((add_in_additional_code_batch, add_in_additional_code),
+                                  (subtract_in_additional_code_batch, subtract_in_additional_code)):
+                codes, _, bit_matrix = batch(a, b, bit_length, with_bits=True)
+                for i, (x, y) in enumerate(zip(a, b)):
+                    expected = scalar(x, y, bit_length)
+                    self.assertEqual(bit_matrix[i].tobytes().decode(), expected)
+                    self.assertEqual(int(codes[i]), int(expected, 2))
+
+    def test_overflow_flags(self):
+        codes, overflow, bit_matrix = add_in_additional_code_batch([100, -100, 5], [100, -100, -3], 8)
+        self.assertEqual(overflow.tolist(), [True, True, False])
+        self.assertEqual(twos_complement_to_decimal_batch(codes, 8).tolist(), [-56, 56, 2])
+        self.assertIsNone(bit_matrix)
+        _, overflow, _ = subtract_in_additional_code_batch([-128, 0, 127], [1, -128, -1], 8)
+        self.assertEqual(overflow.tolist(), [True, True, True])
+
+    def test_width_limits(self):
+        with self.assertRaises(ValueError):
+            add_in_additional_code_batch([1], [1], 65)
+
+
 class TestIEEE754Functions(unittest.TestCase):
     def test_convert_and_revert(self):
         test_values = [1.0, 3.3, 4.9, 0.15625, 123.456]
@@ -73,3 +241,269 @@ class TestIEEE754Functions(unittest.TestCase):
         self.assertEqual(len(ieee), 32, msg="Представление должно состоять из 32 бит")
         self.assertTrue(all(bit in "01" for bit in ieee),
                         msg="Строка должна содержать только символы '0' и '1'")
+
+
+class TestIEEE754Codec(unittest.TestCase):
+    def test_formats(self):
+        self.assertEqual(convert_float_to_ieee754(1.0, 'binary16'), "0011110000000000")
+        self.assertEqual(convert_float_to_ieee754(-2.0), "1" + "10000000" + "0" * 23)
+        self.assertEqual(ieee754_to_decimal(convert_float_to_ieee754(0.1, 'binary64')), 0.1)
+
+    def test_round_to_nearest_even(self):
+        # 1 + 2**-11 ровно посередине между соседними binary16
+        self.assertEqual(ieee754.encode(1 + 2 ** -11, 'binary16'), 0x3C00)
+        self.assertEqual(ieee754.encode(1 + 3 * 2 ** -11, 'binary16'), 0x3C02)
+        self.assertEqual(ieee754.encode("0.1", 'binary64'), ieee754.encode(0.1, 'binary64'))
+
+    def test_special_values(self):
+        self.assertEqual(ieee754.classify(ieee754.encode(float('inf'))), 'infinite')
+        self.assertEqual(ieee754.classify(ieee754.encode(float('nan'))), 'nan')
+        self.assertEqual(ieee754.classify(ieee754.encode(1e-40)), 'subnormal')
+        self.assertEqual(ieee754.encode(-0.0), 1 << 31)
+        self.assertEqual(ieee754.encode(1e39), 0x7F800000)
+        self.assertEqual(ieee754.decode_exact(1), Fraction(1, 2 ** 149))
+        self.assertEqual(ieee754_to_decimal("0" + "1" * 8 + "0" * 23), float('inf'))
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_batch_matches_scalar(self):
+        rng = random.Random(5)
+        for fmt in ieee754.FORMATS:
+            values = np.array([rng.uniform(-1e4, 1e4) for _ in range(100)] + [0.0, -0.0],
+                              dtype=ieee754.FORMATS[fmt].float_dtype)
+            bits = ieee754.encode_batch(values, fmt)
+            self.assertTrue(np.shares_memory(bits, values))
+            sign, exponent, mantissa = ieee754.unpack_fields(values, fmt)
+            for i, value in enumerate(values):
+                expected = ieee754.encode(float(value), fmt)
+                self.assertEqual(int(bits[i]), expected)
+                self.assertEqual((int(sign[i]), int(exponent[i]), int(mantissa[i])),
+                                 ieee754.split_fields(expected, fmt))
+            np.testing.assert_array_equal(ieee754.pack_fields(sign, exponent, mantissa, fmt), values)
+
+
+class TestSoftFloat(unittest.TestCase):
+    def bits(self, value, fmt='binary32'):
+        return ieee754.encode(value, fmt)
+
+    def test_operations(self):
+        self.assertEqual(softfloat.add(self.bits(1.5), self.bits(2.25)), self.bits(3.75))
+        self.assertEqual(softfloat.sub(self.bits(1.0), self.bits(1.0)), self.bits(0.0))
+        self.assertEqual(softfloat.mul(self.bits(-3.0), self.bits(0.5)), self.bits(-1.5))
+        self.assertEqual(softfloat.div(self.bits(1.0, 'binary64'), self.bits(10.0, 'binary64'), 'binary64'),
+                         self.bits(0.1, 'binary64'))
+        self.assertEqual(softfloat.sqrt(self.bits(2.0, 'binary64'), 'binary64'), self.bits(2 ** 0.5, 'binary64'))
+
+    def test_rounding_modes(self):
+        one, third = self.bits(1.0), self.bits(3.0)
+        up = softfloat.div(one, third, rounding='upward')
+        down = softfloat.div(one, third, rounding='downward')
+        self.assertEqual(up - down, 1)
+        self.assertEqual(softfloat.div(one, third, rounding='toward_zero'), down)
+        self.assertLess(ieee754.decode_exact(down), Fraction(1, 3))
+        self.assertGreater(ieee754.decode_exact(up), Fraction(1, 3))
+        # Точный нуль разности отрицателен только при округлении вниз
+        self.assertEqual(softfloat.sub(one, one, rounding='downward'), 1 << 31)
+        largest = self.bits(3.4028234663852886e38)
+        self.assertEqual(softfloat.add(largest, largest, rounding='toward_zero'), largest)
+        self.assertEqual(softfloat.add(largest, largest), self.bits(float('inf')))
+
+    def test_special_values(self):
+        inf = self.bits(float('inf'))
+        self.assertEqual(softfloat.add(inf, inf ^ (1 << 31)), softfloat.default_nan())
+        self.assertEqual(softfloat.mul(inf, self.bits(0.0)), softfloat.default_nan())
+        self.assertEqual(softfloat.div(self.bits(-1.0), self.bits(0.0)), inf | (1 << 31))
+        self.assertEqual(softfloat.sqrt(self.bits(-0.0)), self.bits(-0.0))
+        self.assertEqual(softfloat.sqrt(self.bits(-4.0)), softfloat.default_nan())
+        tiny = 1
+        self.assertEqual(softfloat.mul(tiny, self.bits(0.5)), 0)
+        self.assertEqual(softfloat.mul(tiny, self.bits(0.5), rounding='upward'), tiny)
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_batch_matches_scalar(self):
+        rng = random.Random(9)
+        for fmt in ('binary32', 'binary64'):
+            f = ieee754.FORMATS[fmt]
+            width = ieee754.width(fmt)
+            a = [rng.getrandbits(width) for _ in range(300)]
+            b = [rng.getrandbits(width) for _ in range(300)]
+            a_arr, b_arr = np.array(a, dtype=f.uint_dtype), np.array(b, dtype=f.uint_dtype)
+            for rounding in softfloat.ROUNDING_MODES:
+                for name, batch in softfloat.BATCH_OPERATIONS.items():
+                    scalar = softfloat.OPERATIONS[name]
+                    expected = [scalar(x, y, fmt, rounding) for x, y in zip(a, b)]
+                    self.assertEqual(batch(a_arr, b_arr, fmt, rounding).tolist(), expected)
+                expected = [softfloat.sqrt(x, fmt, rounding) for x in a]
+                self.assertEqual(softfloat.sqrt_batch(a_arr, fmt, rounding).tolist(), expected)
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_batch_matches_hardware_nearest(self):
+        rng = np.random.default_rng(4)
+        a = rng.standard_normal(1000).astype(np.float32)
+        b = rng.standard_normal(1000).astype(np.float32)
+        for name, expected in (('add', a + b), ('sub', a - b), ('mul', a * b), ('div', a / b)):
+            result = softfloat.BATCH_OPERATIONS[name](a.view(np.uint32), b.view(np.uint32))
+            np.testing.assert_array_equal(result, expected.view(np.uint32))
+
+    def test_add_ieee754_rounding(self):
+        result = add_ieee754(convert_float_to_ieee754(1.0), convert_float_to_ieee754(2 ** -30), 'upward')
+        self.assertEqual(ieee754_to_decimal(result), 1 + 2 ** -23)
+
+
+class TestBatchCli(unittest.TestCase):
+    INPUT = "5 -3\n3.3, 4.9\n\nfoo 1\n7 0\n"
+
+    def test_process_pair(self):
+        record = process_pair(5, -3, 8, 5)
+        self.assertEqual(record['b_additional'], "11111101")
+        self.assertEqual((record['sum'], record['difference'], record['product']), (2, 8, -15))
+        self.assertEqual(record['quotient_code'], "10000001.10101")
+        record = process_pair(3.3, 4.9, 8, 5)
+        self.assertEqual(record['sum_ieee754'], add_ieee754(record['a_ieee754'], record['b_ieee754']))
+
+    def test_jsonl_stream(self):
+        output = io.StringIO()
+        run_batch(io.StringIO(self.INPUT), output, workers=1, chunk_size=2)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual([r['line'] for r in records], [1, 2, 4, 5])
+        self.assertEqual(records[0]['sum'], 2)
+        self.assertEqual(records[1]['kind'], 'float')
+        self.assertIn('error', records[2])
+        self.assertIsNone(records[3]['quotient'])
+
+    def test_pool_keeps_order(self):
+        lines = "".join(f"{n} {n % 7 + 1}\n" for n in range(-60, 60))
+        serial, parallel = io.StringIO(), io.StringIO()
+        run_batch(io.StringIO(lines), serial, output_format='csv', workers=1, chunk_size=16)
+        run_batch(io.StringIO(lines), parallel, output_format='csv', workers=2, chunk_size=16)
+        self.assertEqual(serial.getvalue(), parallel.getvalue())
+        self.assertEqual(len(serial.getvalue().splitlines()), 121)
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+    def test_percentile(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.9), 7)
+
+    def test_suite_and_compare(self):
+        suite = run_suite(widths=[8, 32], batch_sizes=[], min_time=0.001)
+        names = {result['name'] for result in suite['results']}
+        self.assertIn('multiply_in_direct_code', names)
+        for method in MULTIPLICATION_METHODS:
+            self.assertIn(f'multiply_in_direct_code[{method}]', names)
+        self.assertIn('add_ieee754', names)
+        for result in suite['results']:
+            self.assertGreater(result['ops_per_sec'], 0)
+            self.assertLessEqual(result['p50_ns'], result['p99_ns'])
+        self.assertEqual(compare(suite, suite), [])
+        slower = {'results': [dict(r, p50_ns=r['p50_ns'] * 2) for r in suite['results']]}
+        self.assertEqual(len(compare(suite, slower)), len(suite['results']))
+
+
+class TestTracing(unittest.TestCase):
+    def test_no_events_without_hooks(self):
+        recorder = tracing.Recorder()
+        with tracing.traced(recorder):
+            pass
+        self.assertEqual(tracing.HOOKS, [])
+        add_in_additional_code(5, 3, 8)
+        self.assertEqual(recorder.events, [])
+
+    def test_traced_results_match(self):
+        rng = random.Random(11)
+        cases = [(rng.randint(-1000, 1000), rng.randint(1, 1000)) for _ in range(20)]
+        expected = [(add_in_additional_code(a, b, 16),
+                     [multiply_in_direct_code(a, b, 16, m) for m in MULTIPLICATION_METHODS],
+                     [divide_in_direct_code(a, b, 8, 16, m) for m in DIVISION_METHODS]) for a, b in cases]
+        with tracing.traced(tracing.Counters()):
+            traced = [(add_in_additional_code(a, b, 16),
+                       [multiply_in_direct_code(a, b, 16, m) for m in MULTIPLICATION_METHODS],
+                       [divide_in_direct_code(a, b, 8, 16, m) for m in DIVISION_METHODS]) for a, b in cases]
+        self.assertEqual(traced, expected)
+
+    def test_adder_steps(self):
+        recorder, counters = tracing.Recorder(), tracing.Counters()
+        with tracing.traced(recorder), tracing.traced(counters):
+            add_in_additional_code(5, 3, 8)
+        bits = recorder.steps('bit')
+        self.assertEqual(len(bits), 8)
+        self.assertEqual([e.data['carry_out'] for e in bits[:4]], [1, 1, 1, 0])
+        self.assertEqual(counters['adder']['carries_propagated'], 3)
+
+    def test_divider_and_multiplier_counters(self):
+        counters = tracing.Counters()
+        with tracing.traced(counters):
+            divide_in_direct_code(7, 2, 5, 8, method='nonrestoring')
+            multiply_in_direct_code(7, 5, 8, method='shift_add')
+        self.assertEqual(counters['divider']['subtractions'] + counters['divider']['additions'], 8)
+        self.assertEqual(counters['multiplier']['partial_products'], 2)
+
+    def test_ieee_normalization(self):
+        recorder = tracing.Recorder(units=['ieee_adder'])
+        with tracing.traced(recorder):
+            add_ieee754(convert_float_to_ieee754(1.5), convert_float_to_ieee754(-1.25))
+            add_ieee754(convert_float_to_ieee754(1.5), convert_float_to_ieee754(1.5))
+        self.assertEqual([e.data['shift'] for e in recorder.steps('normalize')], [2, -1])
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_batch_counters_match_scalar(self):
+        rng = random.Random(12)
+        a = [rng.randint(-128, 127) for _ in range(200)]
+        b = [rng.randint(-128, 127) for _ in range(200)]
+        scalar, batch = tracing.Counters(), tracing.Counters()
+        with tracing.traced(scalar):
+            for x, y in zip(a, b):
+                add_in_additional_code(x, y, 8)
+        with tracing.traced(batch):
+            add_in_additional_code_batch(np.array(a), np.array(b), 8)
+        self.assertEqual(batch.as_dict(), scalar.as_dict())
+
+
+class TestBcdGrayCodes(unittest.TestCase):
+    def test_scalar_bcd(self):
+        self.assertEqual(decimal_to_bcd(59), '01011001')
+        self.assertEqual(decimal_to_bcd(59, 'excess3'), '10001100')
+        self.assertEqual(decimal_to_bcd(7, digits=3), '000000000111')
+        self.assertEqual(decimal_to_bcd(7, 'excess3', 2), '00111010')
+        self.assertEqual(bcd_to_decimal('10001100', 'excess3'), 59)
+        with self.assertRaises(ValueError):
+            bcd_to_decimal('1010')
+        with self.assertRaises(ValueError):
+            decimal_to_bcd(-1)
+        with self.assertRaises(ValueError):
+            decimal_to_bcd(1234, digits=3)
+
+    def test_scalar_gray(self):
+        self.assertEqual([decimal_to_gray(n, 3) for n in range(4)], ['000', '001', '011', '010'])
+        self.assertEqual(gray_to_decimal('0111'), 5)
+        wide = (1 << 5000) + 12345
+        self.assertEqual(codes.decode_gray(codes.encode_gray(wide)), wide)
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_batch_matches_scalar(self):
+        rng = random.Random(13)
+        values = [rng.randrange(10 ** rng.randint(1, 16)) for _ in range(500)] + [0, 10 ** 16 - 1]
+        for code in codes.BCD_OFFSETS:
+            encoded = codes.encode_bcd_batch(np.array(values, dtype=np.uint64), code)
+            self.assertEqual([int(x) for x in encoded], [codes.encode_bcd(v, code, 16) for v in values])
+            self.assertEqual(codes.decode_bcd_batch(encoded, code).tolist(), values)
+            small = [v % 1000 for v in values]
+            encoded = codes.encode_bcd_batch(small, code, digits=5)
+            self.assertEqual([int(x) for x in encoded], [codes.encode_bcd(v, code, 5) for v in small])
+            self.assertEqual(codes.decode_bcd_batch(encoded, code, digits=5).tolist(), small)
+        with self.assertRaises(ValueError):
+            codes.decode_bcd_batch([0x1A])
+
+    @unittest.skipIf(np is None, "NumPy не установлен")
+    def test_gray_batch(self):
+        values = np.arange(1 << 12, dtype=np.uint64)
+        gray = codes.encode_gray_batch(values, 12)
+        self.assertEqual([int(g) for g in gray[:300]], [codes.encode_gray(n) for n in range(300)])
+        # Соседние коды отличаются ровно одним разрядом
+        self.assertTrue((np.unpackbits((gray[1:] ^ gray[:-1]).view(np.uint8)).reshape(-1, 64).sum(axis=1) == 1).all())
+        self.assertTrue((codes.decode_gray_batch(gray) == values).all())
+        extreme = np.array([2 ** 64 - 1, 2 ** 63 + 1], dtype=np.uint64)
+        self.assertTrue((codes.decode_gray_batch(codes.encode_gray_batch(extreme)) == extreme).all())
+        with self.assertRaises(ValueError):
+            codes.encode_gray_batch([1 << 12], 12)
@@ -0,0 +1,95 @@
+"""Пошаговая трассировка арифметических устройств lab1.
+
+Сумматор, умножитель, делитель и сумматор IEEE-754 сообщают о своих шагах
+(переносы, частичные произведения, остатки, нормализация) только тогда, когда
+зарегистрирован хотя бы один обработчик. Без обработчиков вычисления идут
+по обычному быстрому пути: проверяется лишь пустота списка HOOKS.
+
+Событие – Event(unit, step, data). Шаг 'counts' несёт целочисленные счётчики
+операции; Counters суммирует их по всем операциям, в том числе пакетным.
+"""
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from functools import partial
+
+
+Event = namedtuple('Event', 'unit step data')
+
+UNITS = ('adder', 'multiplier', 'divider', 'ieee_adder')
+
+# Список изменяется только на месте, чтобы проверка tracing.HOOKS всегда видела текущее состояние
+HOOKS = []
+
+
+def add_hook(hook):
+    """Регистрирует обработчик hook(event)"""
+    HOOKS.append(hook)
+    return hook
+
+
+def remove_hook(hook):
+    HOOKS.remove(hook)
+
+
+@contextmanager
+def traced(hook):
+    """Обработчик действует только внутри блока with"""
+    add_hook(hook)
+    try:
+        yield hook
+    finally:
+        remove_hook(hook)
+
+
+def emit(unit, step, **data):
+    event = Event(unit, step, data)
+    for hook in tuple(HOOKS):
+        hook(event)
+
+
+def emitter(unit):
+    """Функция emit(step, **data) для устройства unit или None, если обработчиков нет"""
+    if not HOOKS:
+        return None
+    return partial(emit, unit)
+
+
+class Counters:
+    """Обработчик, накапливающий счётчики шагов 'counts' по устройствам.
+       Экземпляры из разных процессов объединяются через merge()"""
+
+    def __init__(self):
+        self.totals = {}
+
+    def __call__(self, event):
+        if event.step == 'counts':
+            self.totals.setdefault(event.unit, Counter()).update(event.data)
+
+    def __getitem__(self, unit):
+        return self.totals.get(unit, Counter())
+
+    def merge(self, other):
+        for unit, counts in other.totals.items():
+            self.totals.setdefault(unit, Counter()).update(counts)
+        return self
+
+    def reset(self):
+        self.totals.clear()
+
+    def as_dict(self):
+        return {unit: dict(counts) for unit, counts in self.totals.items()}
+
+
+class Recorder:
+    """Обработчик, сохраняющий все события (для пошагового разбора на занятиях)"""
+
+    def __init__(self, units=None):
+        self.units = set(units) if units is not None else None
+        self.events = []
+
+    def __call__(self, event):
+        if self.units is None or event.unit in self.units:
+            self.events.append(event)
+
+    def steps(self, step):
+        return [event for event in self.events if event.step == step]
@@ -1,30 +1,156 @@
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from batching import read_chunks, ordered_map
 from second_lab import *
 
 
-def main():
+def process_expression(expr, max_variables=20, skip_constant=False):
+    """Таблица истинности и формы одного выражения в виде словаря.
+       Вектор значений – столбец результатов от строки 0 к последней (двоичная запись индекса).
+       При skip_constant постоянная функция распознаётся без таблицы (classify_function)
+       и в записи остаются только переменные и поле constant.
+       Таблица берётся из EXPRESSION_CACHE: для повторного выражения столбец не вычисляется заново"""
+    if skip_constant:
+        variables, postfix = EXPRESSION_CACHE.compile(expr)
+        kind = classify_function(postfix, variables)
+        if kind != 'contingent':
+            return {'variables': variables, 'constant': kind}
+    table = EXPRESSION_CACHE.truth_table(expr, max_variables=max_variables)
+    variables = table.variables
+    size = len(table)
+    index = index_value(table.column, size)
+    return {
+        'variables': variables,
+        'truth_vector': decimal_to_binary(index, size),
+        'numeric_sdnf': list(iter_set_bits(table.column, size)),
+        'numeric_sknf': list(iter_set_bits(((1 << size) - 1) ^ table.column, size)),
+        'index': index if len(variables) <= DECIMAL_INDEX_VARIABLES else None,
+    }
+
+
+def process_chunk(chunk, max_variables, skip_constant=False):
+    """Обработка пачки пронумерованных строк ввода в JSON-строки; ошибки попадают в поле error"""
+    lines = []
+    for line_number, line in chunk:
+        expr = line.strip()
+        if not expr or expr.startswith('#'):
+            continue
+        started = time.perf_counter()
+        try:
+            record = process_expression(expr, max_variables, skip_constant)
+        except ValueError as e:
+            record = {'error': str(e)}
+        record = {'line': line_number, 'expression': expr, **record,
+                  'seconds': round(time.perf_counter() - started, 6)}
+        lines.append(json.dumps(record, ensure_ascii=False) + '\n')
+    return ''.join(lines)
+
+
+def process_chunk_shared(chunk, max_variables, skip_constant=False):
+    """process_chunk в процессе пула: вместе с текстом возвращает новые записи кэша,
+       чтобы главный процесс сохранил их в файл кэша"""
+    return process_chunk(chunk, max_variables, skip_constant), EXPRESSION_CACHE.take_new()
+
+
+def use_cache_file(path):
+    """EXPRESSION_CACHE заменяется кэшем, связанным с файлом path (читается, если файл есть)"""
+    global EXPRESSION_CACHE
+    EXPRESSION_CACHE = ExpressionCache(path=path)
+    return EXPRESSION_CACHE
+
+
+def run_batch(input_stream, output_stream, workers=None, chunk_size=100, max_variables=20, skip_constant=False,
+              cache_path=None):
+    """Потоковая обработка выражений из input_stream (по одному в строке) с записью JSON-строк в output_stream.
+       При cache_path процессы пула начинают с содержимого файла кэша, а вычисленные ими записи
+       собираются в EXPRESSION_CACHE главного процесса"""
+    chunks = read_chunks(input_stream, chunk_size)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        job = partial(process_chunk, max_variables=max_variables, skip_constant=skip_constant)
+        for text in map(job, chunks):
+            output_stream.write(text)
+        return
+    if cache_path is None:
+        job = partial(process_chunk, max_variables=max_variables, skip_constant=skip_constant)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            for text in ordered_map(executor, job, chunks, window=2 * workers):
+                output_stream.write(text)
+        return
+    job = partial(process_chunk_shared, max_variables=max_variables, skip_constant=skip_constant)
+    with ProcessPoolExecutor(max_workers=workers, initializer=use_cache_file, initargs=(cache_path,)) as executor:
+        for text, entries in ordered_map(executor, job, chunks, window=2 * workers):
+            EXPRESSION_CACHE.merge(entries)
+            output_stream.write(text)
+
+
+CONSTANT_MESSAGES = {
+    'tautology': "Функция тождественно истинна (тавтология): СКНФ пуста, СДНФ содержит все наборы",
+    'contradiction': "Функция тождественно ложна (противоречие): СДНФ пуста, СКНФ содержит все наборы",
+}
+
+
+def interactive(skip_constant=False):
     expr = input("Введите логическое выражение: ")
-    variables, parsed_expr = parse_expression(expr)
-    postfix = shunting_yard(parsed_expr)
-    table = generate_truth_table(variables, postfix)
-    forms = build_forms(table, variables)
+    variables, postfix = EXPRESSION_CACHE.compile(expr)
+    if skip_constant:
+        kind = classify_function(postfix, variables)
+        if kind != 'contingent':
+            print(CONSTANT_MESSAGES[kind])
+            return
+    column = None
+    if 1 << len(variables) <= EXPRESSION_CACHE.max_bits:
+        column = EXPRESSION_CACHE.truth_table(expr).column
+    # Таблица и формы пишутся в stdout по мере вычисления; столбец, не помещающийся в кэш,
+    # вычисляется блоками заново для каждого раздела, без построения в памяти
+    FormsWriter(sys.stdout, variables, postfix, column=column).write_report()
 
-    print("\nТаблица истинности:")
-    header = ' | '.join(variables) + ' | Результат'
-    print(header)
-    print('-' * len(header))
-    for combo, res in table:
-        print(' | '.join(map(str, combo)) + f' | {res}')
 
-    print("\nСДНФ:")
-    print(forms['sdnf'])
-    print("Числовая форма СДНФ: ∨(", forms['numeric_sdnf'], ")")
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Таблица истинности, СДНФ, СКНФ и числовые формы логических функций")
+    parser.add_argument('--batch', metavar='FILE',
+                        help="пакетный режим: файл с выражениями по строкам ('-' – стандартный ввод)")
+    parser.add_argument('--output', metavar='FILE', help="файл JSON-строк (по умолчанию стандартный вывод)")
+    parser.add_argument('--workers', type=int, default=None, help="число процессов (по умолчанию – число ядер)")
+    parser.add_argument('--chunk-size', type=int, default=100, help="выражений в одной задаче пула")
+    parser.add_argument('--max-variables', type=int, default=20,
+                        help="выражения с большим числом переменных получают запись с ошибкой")
+    parser.add_argument('--skip-constant', action='store_true',
+                        help="не строить таблицу для тавтологий и противоречий (проверка методом DPLL)")
+    parser.add_argument('--cache', metavar='FILE',
+                        help="файл кэша выражений и таблиц: читается при запуске и сохраняется при выходе")
+    args = parser.parse_args(argv)
 
-    print("\nСКНФ:")
-    print(forms['sknf'])
-    print("Числовая форма СКНФ: ∧(", forms['numeric_sknf'], ")")
+    if args.cache is not None:
+        use_cache_file(args.cache)
+    try:
+        run(args)
+    finally:
+        if args.cache is not None:
+            EXPRESSION_CACHE.save()
 
-    print("\nИндексная форма:")
-    print(forms['index'])
+
+def run(args):
+    if args.batch is None:
+        interactive(args.skip_constant)
+        return
+
+    input_stream = sys.stdin if args.batch == '-' else open(args.batch, encoding='utf-8')
+    output_stream = sys.stdout if args.output is None else open(args.output, 'w', encoding='utf-8')
+    try:
+        run_batch(input_stream, output_stream, args.workers, args.chunk_size, args.max_variables,
+                  args.skip_constant, args.cache)
+    finally:
+        if input_stream is not sys.stdin:
+            input_stream.close()
+        if output_stream is not sys.stdout:
+            output_stream.close()
 
 
 if __name__ == "__main__":
@@ -36,5 +162,3 @@ if __name__ == "__main__":
 # ((a∨b)&(c->d))∼e
 #a->(b->c)
 #(a∨b)∧!c
-
-
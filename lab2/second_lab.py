@@ -1,20 +1,76 @@
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+
 def decimal_to_binary(num, length):
-    """Ручное преобразование числа в двоичную строку с ведущими нулями"""
-    binary = ''
-    for _ in range(length):
-        binary = str(num % 2) + binary
-        num = num // 2
-    return binary
+    """Двоичная строка из length младших разрядов числа с ведущими нулями (за линейное время)"""
+    if length <= 0:
+        return ''
+    return format(num & ((1 << length) - 1), f'0{length}b')
+
+
+# Идентификатор переменной: буква или '_', затем буквы, цифры и '_' (a, x0, x63, req_valid)
+_TOKEN_RE = re.compile(r'(?P<name>[^\W\d]\w*)|(?P<symbol>->|[→∨∧¬∼~!&|>=()])')
+_SYMBOL_ALIASES = {
+    '∨': '|', '∧': '&',  # | - дизъюнкция, & - конъюнкция
+    '->': '>', '→': '>',  # > - импликация
+    '~': '=', '∼': '=',  # = - эквивалентность
+    '¬': '!',  # ! - отрицание
+}
+SYMBOLS = frozenset('!&|>=()')
+
+
+def tokenize(expr):
+    """Разбиение выражения на лексемы: имена переменных, знаки операций
+       (в однобуквенной записи '!', '&', '|', '>', '=') и скобки"""
+    tokens = []
+    position = 0
+    while position < len(expr):
+        if expr[position].isspace():
+            position += 1
+            continue
+        match = _TOKEN_RE.match(expr, position)
+        if match is None:
+            raise ValueError(f"Недопустимый символ '{expr[position]}' в позиции {position}")
+        if match.group('name'):
+            tokens.append(match.group('name'))
+        else:
+            symbol = match.group('symbol')
+            tokens.append(_SYMBOL_ALIASES.get(symbol, symbol))
+        position = match.end()
+    return tokens
+
+
+def is_variable(token):
+    return token not in SYMBOLS
+
+
+def variable_sort_key(name):
+    """Естественный порядок имён: числовые части сравниваются как числа (x2 < x10)"""
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
 
 def parse_expression(expr):
-    """Парсинг логического выражения и извлечение переменных"""
-    variables = sorted(set([c for c in expr if c in 'abcde']))
-    expr = expr.replace(' ', '')
-    expr = expr.replace('∨', '|').replace('∧', '&')# | - дизъюнкция,&-конъюнкиция
-    expr = expr.replace('->', '>').replace('→', '>')#-> импликация
-    expr = expr.replace('~', '=').replace('∼', '=')# ->эквивал
-    expr = expr.replace('¬', '!') # !- отрицание
-    return variables, expr
+    """Парсинг логического выражения и извлечение переменных.
+       Переменные упорядочены естественно (variable_sort_key), выражение возвращается
+       в нормализованной записи с однобуквенными знаками операций"""
+    tokens = tokenize(expr)
+    variables = sorted({token for token in tokens if is_variable(token)}, key=variable_sort_key)
+    normalized = []
+    for previous, token in zip([None] + tokens, tokens):
+        # Соседние имена разделяются пробелом, чтобы не слиться в одно
+        if previous is not None and is_variable(previous) and is_variable(token):
+            normalized.append(' ')
+        normalized.append(token)
+    return variables, ''.join(normalized)
 
 
 def evaluate_postfix(postfix, values):
@@ -40,22 +96,66 @@ def evaluate_postfix(postfix, values):
     return stack[0]
 
 
+# Операции над значениями 0/1 в виде выражений Python
+_OPERATION_SOURCE = {
+    '&': '{a} & {b}',
+    '|': '{a} | {b}',
+    '>': '(1 - {a}) | {b}',
+    '=': '1 ^ {a} ^ {b}',
+}
+
+
+def compile_postfix(postfix, variables):
+    """Компиляция постфиксного выражения в функцию Python от значений переменных.
+       Аргументы функции идут в порядке variables; каждая операция становится
+       строкой прямолинейного кода, поэтому при вызове нет разбора токенов"""
+    arguments = {var: f'v{i}' for i, var in enumerate(variables)}
+    lines = []
+    stack = []
+    for token in postfix:
+        if token == '!':
+            if not stack:
+                raise ValueError("Некорректное выражение: не хватает операнда для '!'")
+            lines.append(f't{len(lines)} = 1 - {stack.pop()}')
+        elif token in _OPERATION_SOURCE:
+            if len(stack) < 2:
+                raise ValueError(f"Некорректное выражение: не хватает операндов для '{token}'")
+            b = stack.pop()
+            a = stack.pop()
+            lines.append(f't{len(lines)} = ' + _OPERATION_SOURCE[token].format(a=a, b=b))
+        elif token in arguments:
+            stack.append(arguments[token])
+            continue
+        else:
+            raise ValueError(f"Неизвестная переменная: {token}")
+        stack.append(f't{len(lines) - 1}')
+    if len(stack) != 1:
+        raise ValueError("Некорректное выражение: лишние операнды")
+
+    body = ''.join(f'    {line}\n' for line in lines)
+    source = f"def compiled({', '.join(arguments.values())}):\n{body}    return {stack[0]}\n"
+    namespace = {}
+    exec(compile(source, '<postfix>', 'exec'), namespace)
+    return namespace['compiled']
+
+
 def shunting_yard(expr):
-    """Алгоритм сортировочной станции для преобразования в постфиксную форму"""
+    """Алгоритм сортировочной станции для преобразования в постфиксную форму.
+       expr – строка выражения или уже готовый список лексем"""
     precedence = {'!': 4, '&': 3, '|': 2, '>': 1, '=': 1}
     output = []
     stack = []
 
-    i = 0
-    while i < len(expr):
-        c = expr[i]
-        if c in 'abcde':
+    for c in tokenize(expr) if isinstance(expr, str) else expr:
+        if is_variable(c):
             output.append(c)
         elif c == '(':
             stack.append(c)
         elif c == ')':
-            while stack[-1] != '(':
+            while stack and stack[-1] != '(':
                 output.append(stack.pop())
+            if not stack:
+                raise ValueError("Непарная закрывающая скобка")
             stack.pop()
         elif c == '!':
             stack.append(c)
@@ -63,55 +163,752 @@ def shunting_yard(expr):
             while stack and stack[-1] != '(' and precedence.get(stack[-1], 0) >= precedence.get(c, 0):
                 output.append(stack.pop())
             stack.append(c)
-        i += 1
 
     while stack:
+        if stack[-1] == '(':
+            raise ValueError("Непарная открывающая скобка")
         output.append(stack.pop())
 
     return output
 
 
-def generate_truth_table(variables, postfix):
-    """Генерация таблицы истинности"""
+class TruthTable(Sequence):
+    """Таблица истинности, хранящая только столбец результатов.
+       Столбец – целое число column, разряд i которого равен значению функции в строке i;
+       строки (набор, результат) строятся лениво при обращении или переборе"""
+
+    def __init__(self, variables, column):
+        self.variables = list(variables)
+        self.column = column
+        self._bits = None
+
+    @property
+    def bits(self):
+        """Столбец результатов как байты (младший разряд байта – младшая строка)"""
+        if self._bits is None:
+            self._bits = self.column.to_bytes((len(self) + 7) // 8, 'little')
+        return self._bits
+
+    def __len__(self):
+        return 1 << len(self.variables)
+
+    def result(self, row):
+        return (self.bits[row >> 3] >> (row & 7)) & 1
+
+    def combo(self, row):
+        n = len(self.variables)
+        return [(row >> (n - 1 - j)) & 1 for j in range(n)]
+
+    def __getitem__(self, row):
+        if isinstance(row, slice):
+            return [self[i] for i in range(*row.indices(len(self)))]
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError("Номер строки вне таблицы")
+        return self.combo(row), self.result(row)
+
+    def __iter__(self):
+        n = len(self.variables)
+        bits = self.bits
+        for row in range(len(self)):
+            yield [(row >> (n - 1 - j)) & 1 for j in range(n)], (bits[row >> 3] >> (row & 7)) & 1
+
+    def __eq__(self, other):
+        if isinstance(other, TruthTable):
+            return self.variables == other.variables and self.column == other.column
+        if isinstance(other, (list, tuple)):
+            return len(self) == len(other) and all(
+                (list(combo), res) == (list(other_combo), other_res)
+                for (combo, res), (other_combo, other_res) in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"TruthTable({self.variables}, ones={self.column.bit_count()} из {len(self)})"
+
+
+@lru_cache(maxsize=64)
+def variable_mask(position, n):
+    """Столбец переменной номер position из n: 2 ** n разрядов, разряд i – значение переменной в строке i.
+       Переменная с периодом 2 * 2 ** k (k = n - 1 - position) собирается повторением байтового шаблона"""
+    k = n - 1 - position
+    size = 1 << n
+    if k < 3:
+        # Внутри байта: 0b10101010, 0b11001100, 0b11110000
+        pattern = bytes([(0xAA, 0xCC, 0xF0)[k]])
+    else:
+        half = 1 << (k - 3)
+        pattern = bytes(half) + b'\xff' * half
+    count = max(1, (size // 8) // len(pattern))
+    return int.from_bytes(pattern * count, 'little') & ((1 << size) - 1)
+
+
+def _apply_postfix(postfix, masks, full):
+    """Вычисление постфиксной записи над битовыми масками; full – маска из одних единиц"""
+    stack = []
+    try:
+        for token in postfix:
+            if token == '!':
+                stack.append(full ^ stack.pop())
+            elif token in '&|>=':
+                b = stack.pop()
+                a = stack.pop()
+                if token == '&':
+                    stack.append(a & b)
+                elif token == '|':
+                    stack.append(a | b)
+                elif token == '>':
+                    stack.append((full ^ a) | b)
+                else:
+                    stack.append(full ^ a ^ b)
+            else:
+                stack.append(masks[token])
+    except IndexError:
+        raise ValueError("Некорректное выражение: не хватает операндов") from None
+    if len(stack) != 1:
+        raise ValueError("Некорректное выражение: лишние операнды" if stack else "Пустое выражение")
+    return stack[0]
+
+
+def evaluate_bitsliced(postfix, variables):
+    """Столбец результатов целиком за один проход по постфиксной записи:
+       операции применяются сразу ко всем 2 ** n строкам как к разрядам больших целых"""
     n = len(variables)
-    table = []
-    for i in range(2 ** n):
-        combo = [(i >> (n - 1 - j)) & 1 for j in range(n)]
-        values = dict(zip(variables, combo))
-        result = evaluate_postfix(postfix, values)
-        table.append((combo, result))
-    return table
+    if n > CHUNK_VARIABLES:
+        # Маски всех переменных заняли бы n * 2 ** n разрядов: столбец собирается из блоков,
+        # где маски есть только у младших CHUNK_VARIABLES переменных
+        chunk_bytes = 1 << (CHUNK_VARIABLES - 3)
+        return int.from_bytes(b''.join(chunk.to_bytes(chunk_bytes, 'little')
+                                       for _, chunk in iter_column_chunks(postfix, variables)), 'little')
+    masks = {var: variable_mask(j, n) for j, var in enumerate(variables)}
+    return _apply_postfix(postfix, masks, (1 << (1 << n)) - 1)
 
 
-def build_forms(table, variables):
-    """Построение СДНФ, СКНФ и числовых форм"""
-    sdnf = []
-    sknf = []
-    numeric_sdnf = []
-    numeric_sknf = []
-    index = 0
-
-    for row, (combo, res) in enumerate(table):
-        index = (index << 1) | res
-
-        if res == 1:
-            numeric_sdnf.append(str(row))
-            terms = []
-            for var, val in zip(variables, combo):
-                terms.append(f"{'' if val else '¬'}{var}")
-            sdnf.append('(' + ' ∧ '.join(terms) + ')')
-
-        if res == 0:
-            numeric_sknf.append(str(row))
-            terms = []
-            for var, val in zip(variables, combo):
-                terms.append(f"{'¬' if val else ''}{var}")
-            sknf.append('(' + ' ∨ '.join(terms) + ')')
+# Строк в одном блоке потокового вычисления: 2 ** CHUNK_VARIABLES
+CHUNK_VARIABLES = 16
+
+
+def iter_column_chunks(postfix, variables, chunk_variables=CHUNK_VARIABLES):
+    """Столбец результатов блоками: пары (номер первой строки, разряды блока).
+       Внутри блока меняются только младшие переменные, старшие постоянны и дают маски
+       из одних нулей или единиц, поэтому память не зависит от числа переменных"""
+    n = len(variables)
+    k = min(n, chunk_variables)
+    masks = {var: variable_mask(j, k) for j, var in enumerate(variables[n - k:])}
+    for block in range(1 << (n - k)):
+        yield block << k, _column_block(postfix, variables, k, block, masks)
+
+
+def _column_block(postfix, variables, k, block, masks):
+    """Разряды блока номер block из 2 ** k строк; masks уже содержит маски младших k переменных"""
+    high = variables[:len(variables) - k]
+    full = (1 << (1 << k)) - 1
+    for j, var in enumerate(high):
+        masks[var] = full if (block >> (len(high) - 1 - j)) & 1 else 0
+    return _apply_postfix(postfix, masks, full)
+
+
+# Границы размера блока параллельного вычисления: 2 ** 16 .. 2 ** 20 строк
+MIN_SHARD_VARIABLES = 16
+MAX_SHARD_VARIABLES = 20
+
+
+def shard_variables(n, workers):
+    """Число младших переменных в блоке: около восьми блоков на процесс для выравнивания нагрузки,
+       но не меньше 2 ** 16 строк (иначе пересылка дороже вычисления) и не больше 2 ** 20"""
+    target = n - (8 * workers - 1).bit_length()
+    return min(n, max(MIN_SHARD_VARIABLES, min(MAX_SHARD_VARIABLES, target)))
+
+
+def _evaluate_shard(postfix, variables, k, block):
+    """Задача процесса: разряды одного блока строк в виде байтов"""
+    masks = {var: variable_mask(j, k) for j, var in enumerate(variables[len(variables) - k:])}
+    return _column_block(postfix, variables, k, block, masks).to_bytes(max(1, (1 << k) // 8), 'little')
+
+
+def evaluate_parallel(postfix, variables, workers=None, chunk_variables=None):
+    """Столбец результатов, вычисленный пулом процессов: пространство строк делится на
+       непрерывные блоки по 2 ** chunk_variables строк, блоки собираются по порядку номеров.
+       Если блок всего один, вычисление идёт в текущем процессе"""
+    n = len(variables)
+    workers = workers or os.cpu_count() or 1
+    # Блоки склеиваются побайтно, поэтому в блоке не меньше 8 строк
+    k = min(n, max(3, chunk_variables)) if chunk_variables is not None else shard_variables(n, workers)
+    if k == n:
+        return evaluate_bitsliced(postfix, variables)
+    column = bytearray()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        blocks = range(1 << (n - k))
+        for part in executor.map(_evaluate_shard, *zip(*((postfix, variables, k, block) for block in blocks))):
+            column += part
+    return int.from_bytes(column, 'little')
+
+
+# Номера единичных разрядов каждого значения байта
+_BYTE_BITS = [tuple(i for i in range(8) if (byte >> i) & 1) for byte in range(256)]
+
+
+def iter_set_bits(column, size):
+    """Номера единичных разрядов column (из size разрядов) по возрастанию.
+       Нулевые байты пропускаются целиком, поэтому время пропорционально числу байтов и единиц"""
+    data = column.to_bytes((size + 7) // 8, 'little')
+    for index, byte in enumerate(data):
+        if byte:
+            base = index << 3
+            for bit in _BYTE_BITS[byte]:
+                yield base + bit
+
+
+def iter_truth_table(variables, postfix, chunk_variables=CHUNK_VARIABLES):
+    """Строки таблицы (набор, результат) по одной, без хранения таблицы целиком"""
+    n = len(variables)
+    for start, chunk in iter_column_chunks(postfix, variables, chunk_variables):
+        data = chunk.to_bytes(((1 << min(n, chunk_variables)) + 7) // 8, 'little')
+        for offset in range(1 << min(n, chunk_variables)):
+            row = start + offset
+            yield [(row >> (n - 1 - j)) & 1 for j in range(n)], (data[offset >> 3] >> (offset & 7)) & 1
+
+
+def evaluate_rows(postfix, variables):
+    """Столбец результатов построчным вычислением скомпилированной функции"""
+    n = len(variables)
+    function = compile_postfix(postfix, variables)
+    column = bytearray(((1 << n) + 7) // 8)
+    for i in range(1 << n):
+        if function(*[(i >> (n - 1 - j)) & 1 for j in range(n)]):
+            column[i >> 3] |= 1 << (i & 7)
+    return int.from_bytes(column, 'little')
+
+
+TRUTH_TABLE_METHODS = {
+    'bitsliced': evaluate_bitsliced,
+    'rows': evaluate_rows,
+    'parallel': evaluate_parallel,
+}
+
+
+def generate_truth_table(variables, postfix, method='bitsliced', workers=None):
+    """Генерация таблицы истинности.
+       method – 'bitsliced' (все строки сразу над битовыми масками), 'rows' (построчно)
+       или 'parallel' (блоки строк в workers процессах, по умолчанию – по числу ядер)"""
+    if method not in TRUTH_TABLE_METHODS:
+        raise ValueError(f"Неизвестный метод построения таблицы: {method}")
+    if method == 'parallel':
+        return TruthTable(variables, evaluate_parallel(postfix, variables, workers))
+    return TruthTable(variables, TRUTH_TABLE_METHODS[method](postfix, variables))
+
 
+def tseitin(postfix, variables):
+    """Преобразование Цейтина: КНФ, выполнимая тогда и только тогда, когда выполнима функция.
+       Литералы – ненулевые целые (переменная номер i – литерал i + 1, отрицание – смена знака),
+       каждая двуместная операция получает новую переменную и 3–4 дизъюнкта.
+       Возвращает (дизъюнкты, литерал результата, число переменных)"""
+    numbers = {var: i + 1 for i, var in enumerate(variables)}
+    count = len(variables)
+    clauses = []
+    stack = []
+    for token in postfix:
+        if token == '!':
+            if not stack:
+                raise ValueError("Некорректное выражение: не хватает операндов")
+            stack.append(-stack.pop())
+            continue
+        if token not in '&|>=':
+            if token not in numbers:
+                raise ValueError(f"Неизвестная переменная: {token}")
+            stack.append(numbers[token])
+            continue
+        if len(stack) < 2:
+            raise ValueError("Некорректное выражение: не хватает операндов")
+        b = stack.pop()
+        a = stack.pop()
+        count += 1
+        g = count
+        if token == '>':
+            # a -> b = !a | b
+            token, a = '|', -a
+        if token == '&':
+            clauses += [[-g, a], [-g, b], [g, -a, -b]]
+        elif token == '|':
+            clauses += [[g, -a], [g, -b], [-g, a, b]]
+        else:
+            clauses += [[-g, -a, b], [-g, a, -b], [g, a, b], [g, -a, -b]]
+        stack.append(g)
+    if len(stack) != 1:
+        raise ValueError("Некорректное выражение: лишние операнды" if stack else "Пустое выражение")
+    return clauses, stack[0], count
+
+
+def dpll(clauses, count):
+    """Поиск выполняющего набора КНФ методом DPLL с распространением единичных дизъюнктов
+       (два наблюдаемых литерала на дизъюнкт) и хронологическим возвратом.
+       Возвращает список значений переменных 1..count (индекс 0 не используется) или None"""
+    value = [0] * (count + 1)
+    trail = []
+    watches = {}
+    units = []
+    for index, clause in enumerate(clauses):
+        if not clause:
+            return None
+        if len(clause) == 1:
+            units.append(clause[0])
+        else:
+            watches.setdefault(clause[0], []).append(index)
+            watches.setdefault(clause[1], []).append(index)
+    clauses = [list(clause) for clause in clauses]
+
+    def literal_value(literal):
+        v = value[abs(literal)]
+        return v if literal > 0 else -v
+
+    def assign(literal):
+        value[abs(literal)] = 1 if literal > 0 else -1
+        trail.append(literal)
+
+    def propagate(head):
+        """Распространение с позиции head следа; False при конфликте"""
+        while head < len(trail):
+            false_literal = -trail[head]
+            head += 1
+            watching = watches.get(false_literal, [])
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                if literal_value(clause[0]) == 1:
+                    kept.append(index)
+                    continue
+                for k in range(2, len(clause)):
+                    if literal_value(clause[k]) != -1:
+                        clause[1], clause[k] = clause[k], clause[1]
+                        watches.setdefault(clause[1], []).append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if literal_value(clause[0]) == -1:
+                        kept.extend(watching[position + 1:])
+                        watches[false_literal] = kept
+                        return False
+                    assign(clause[0])
+            watches[false_literal] = kept
+        return True
+
+    for literal in units:
+        current = literal_value(literal)
+        if current == -1:
+            return None
+        if current == 0:
+            assign(literal)
+    decisions = []
+    ok = propagate(0)
+    next_variable = 1
+    while True:
+        if ok:
+            while next_variable <= count and value[next_variable]:
+                next_variable += 1
+            if next_variable > count:
+                return value
+            decisions.append((len(trail), next_variable, False))
+            start = len(trail)
+            assign(next_variable)
+            ok = propagate(start)
+            continue
+        # Конфликт: отмена до последнего решения, которое ещё не пробовали с другим значением
+        while decisions:
+            start, variable, flipped = decisions.pop()
+            for literal in trail[start:]:
+                value[abs(literal)] = 0
+            del trail[start:]
+            next_variable = min(next_variable, variable)
+            if not flipped:
+                decisions.append((start, variable, True))
+                assign(-variable)
+                ok = propagate(start)
+                break
+        else:
+            return None
+
+
+def find_witness(postfix, variables, result=1):
+    """Набор значений переменных, на котором функция равна result, или None, если такого нет"""
+    clauses, output, count = tseitin(postfix, variables)
+    solution = dpll(clauses + [[output if result else -output]], count)
+    if solution is None:
+        return None
+    return [1 if solution[i + 1] == 1 else 0 for i in range(len(variables))]
+
+
+def classify_function(postfix, variables):
+    """'tautology', 'contradiction' или 'contingent' без перебора таблицы истинности:
+       функция постоянна, если КНФ Цейтина для одного из значений невыполнима"""
+    if find_witness(postfix, variables, 0) is None:
+        return 'tautology'
+    if find_witness(postfix, variables, 1) is None:
+        return 'contradiction'
+    return 'contingent'
+
+
+@lru_cache(maxsize=4096)
+def normalize_expression(expr):
+    """(переменные, нормализованная запись, ключ ExpressionCache) выражения.
+       Результат запоминается, поэтому повторная строка не разбирается заново"""
+    variables, parsed_expr = parse_expression(expr)
+    return tuple(variables), parsed_expr, ExpressionCache.key(parsed_expr)
+
+
+class ExpressionCache:
+    """Кэш разобранных выражений, постфиксных программ и столбцов таблиц истинности.
+       Ключ – SHA-256 нормализованной записи выражения, поэтому 'a ∧ b' и 'a&b' делят одну запись.
+       Вытеснение (LRU) ограничивает суммарный объём столбцов max_bits, а не число записей;
+       при заданном path кэш читается из JSON-файла при создании и сохраняется методом save().
+       Переменные и постфиксная запись хранятся кортежами, а наружу отдаются копиями-списками,
+       чтобы вызывающий код не мог испортить запись кэша. Записи, добавленные после последнего
+       take_new(), можно передать в кэш другого процесса методом merge()"""
+
+    # Условная стоимость лексемы постфиксной записи в разрядах
+    TOKEN_BITS = 64
+
+    def __init__(self, max_bits=1 << 30, path=None):
+        self.max_bits = max_bits
+        self.path = path
+        self._entries = OrderedDict()
+        self.bits = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._fresh = set()
+        if path is not None and os.path.exists(path):
+            self.load(path)
+
+    @staticmethod
+    def key(parsed_expr):
+        return hashlib.sha256(parsed_expr.encode('utf-8')).hexdigest()
+
+    @classmethod
+    def _cost(cls, entry):
+        cost = cls.TOKEN_BITS * (len(entry['postfix']) + len(entry['variables']))
+        if entry['column'] is not None:
+            cost += 1 << len(entry['variables'])
+        return cost
+
+    def _store(self, key, entry):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bits -= self._cost(old)
+        cost = self._cost(entry)
+        if cost > self.max_bits and entry['column'] is not None:
+            # Столбец не помещается в кэш целиком – сохраняются только разбор и постфиксная запись
+            entry = dict(entry, column=None)
+            cost = self._cost(entry)
+        if cost > self.max_bits:
+            return
+        self._entries[key] = entry
+        self._fresh.add(key)
+        self.bits += cost
+        while self.bits > self.max_bits:
+            _, evicted = self._entries.popitem(last=False)
+            self.bits -= self._cost(evicted)
+            self.evictions += 1
+
+    def _lookup(self, expr):
+        variables, parsed_expr, key = normalize_expression(expr)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return key, entry, variables, parsed_expr
+
+    def compile(self, expr):
+        """(переменные, постфиксная запись) выражения – новые списки при каждом вызове"""
+        key, entry, variables, parsed_expr = self._lookup(expr)
+        if entry is not None:
+            self.hits += 1
+        else:
+            self.misses += 1
+            entry = {'variables': tuple(variables), 'postfix': tuple(shunting_yard(parsed_expr)), 'column': None}
+            self._store(key, entry)
+        return list(entry['variables']), list(entry['postfix'])
+
+    def truth_table(self, expr, method='bitsliced', max_variables=None):
+        """Таблица истинности выражения; столбец вычисляется один раз.
+           Выражение с числом переменных больше max_variables отвергается до вычисления (ValueError)"""
+        key, entry, variables, parsed_expr = self._lookup(expr)
+        if entry is not None and entry['column'] is not None:
+            self.hits += 1
+            return TruthTable(list(entry['variables']), entry['column'])
+        if max_variables is not None and len(variables) > max_variables:
+            raise ValueError(f"слишком много переменных: {len(variables)} (не больше {max_variables})")
+        self.misses += 1
+        postfix = list(entry['postfix']) if entry is not None else shunting_yard(parsed_expr)
+        table = generate_truth_table(list(variables), postfix, method)
+        self._store(key, {'variables': tuple(variables), 'postfix': tuple(postfix), 'column': table.column})
+        return table
+
+    def stats(self):
+        """Статистика обращений и занятого места"""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._entries),
+            'bits': self.bits,
+            'max_bits': self.max_bits,
+        }
+
+    def clear(self):
+        self._entries.clear()
+        self._fresh.clear()
+        self.bits = 0
+
+    def take_new(self):
+        """Пары (ключ, запись), добавленные после предыдущего вызова и ещё не вытесненные"""
+        entries = [(key, self._entries[key]) for key in self._fresh if key in self._entries]
+        self._fresh.clear()
+        return entries
+
+    def merge(self, entries):
+        """Добавление записей, полученных take_new() в другом процессе"""
+        for key, entry in entries:
+            self._store(key, entry)
+
+    def save(self, path=None):
+        """Запись кэша в JSON-файл (столбцы – шестнадцатеричными строками); запись атомарна"""
+        path = path or self.path
+        if path is None:
+            raise ValueError("Не задан файл для сохранения кэша")
+        entries = [{'key': key, 'variables': entry['variables'], 'postfix': entry['postfix'],
+                    'column': format(entry['column'], 'x') if entry['column'] is not None else None}
+                   for key, entry in self._entries.items()]
+        temporary = f"{path}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as f:
+            json.dump({'version': 1, 'entries': entries}, f, ensure_ascii=False)
+        os.replace(temporary, path)
+
+    def load(self, path=None):
+        """Чтение записей из файла, созданного save(); порядок LRU сохраняется"""
+        with open(path or self.path, encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') != 1:
+            raise ValueError("Неподдерживаемая версия файла кэша")
+        for item in data['entries']:
+            column = int(item['column'], 16) if item['column'] is not None else None
+            self._store(item['key'], {'variables': tuple(item['variables']), 'postfix': tuple(item['postfix']),
+                                      'column': column})
+        self._fresh.clear()
+
+
+EXPRESSION_CACHE = ExpressionCache()
+
+
+def decimal_index_variables(limit=None):
+    """Наибольшее число переменных n, при котором десятичная запись индекса (числа меньше
+       2 ** 2 ** n, не длиннее ceil(2 ** n * log10(2)) цифр) укладывается в лимит
+       преобразования int -> str; limit по умолчанию – sys.get_int_max_str_digits().
+       Без лимита (0 или Python до 3.11) ограничения нет"""
+    if limit is None:
+        get_limit = getattr(sys, 'get_int_max_str_digits', None)
+        limit = get_limit() if get_limit is not None else 0
+    if not limit:
+        return sys.maxsize
+    n = 0
+    while math.ceil(2 ** (n + 1) * math.log10(2)) <= limit:
+        n += 1
+    return n
+
+
+# Десятичная запись индексной формы выводится, пока число помещается в лимит преобразования int -> str
+DECIMAL_INDEX_VARIABLES = decimal_index_variables()
+
+# Байт с обратным порядком разрядов
+_REVERSED_BYTES = bytes(int(format(byte, '08b')[::-1], 2) for byte in range(256))
+
+
+def table_column(table):
+    """Упакованный столбец результатов таблицы: готовый у TruthTable, иначе собирается из строк"""
+    if isinstance(table, TruthTable):
+        return table.column
+    column = bytearray((len(table) + 7) // 8)
+    for row, (_, res) in enumerate(table):
+        if res:
+            column[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(column, 'little')
+
+
+def index_value(column, size):
+    """Индекс функции – столбец, прочитанный от строки 0 (старший разряд) к последней.
+       Разряды разворачиваются побайтно по таблице, затем одно преобразование bytes -> int"""
+    length = (size + 7) // 8
+    data = column.to_bytes(length, 'little').translate(_REVERSED_BYTES)
+    return int.from_bytes(data, 'big') >> (8 * length - size)
+
+
+def _row_formatter(variables, literal, joiner):
+    """Функция row -> текст набора через joiner; literal(j, bit) – текст переменной номер j.
+       Текст младших (до 8) переменных берётся из таблицы, текст старших меняется раз в 256 строк"""
+    n = len(variables)
+    low = min(n, 8)
+    suffixes = [joiner.join(literal(n - low + j, (s >> (low - 1 - j)) & 1) for j in range(low))
+                for s in range(1 << low)]
+    low_mask = (1 << low) - 1
+    cache = [None, '']
+
+    def text(row):
+        high = row >> low
+        if cache[0] != high:
+            cache[0] = high
+            cache[1] = ''.join(literal(j, (high >> (n - low - 1 - j)) & 1) + joiner for j in range(n - low))
+        return cache[1] + suffixes[row & low_mask]
+    return text
+
+
+def _form_terms(variables, rows, value):
+    """Конституенты СДНФ (value = 1) или СКНФ (value = 0) для строк rows"""
+    # В СДНФ переменная с нулевым значением входит с отрицанием, в СКНФ – с единичным
+    negated = 0 if value else 1
+    text = _row_formatter(variables, lambda j, bit: f"{'¬' if bit == negated else ''}{variables[j]}",
+                          ' ∧ ' if value else ' ∨ ')
+    for row in rows:
+        yield '(' + text(row) + ')'
+
+
+def build_forms(table, variables):
+    """Построение СДНФ, СКНФ и числовых форм.
+       Номера строк берутся перебором единичных разрядов упакованного столбца, а не всех строк"""
+    size = len(table)
+    column = table_column(table)
+    zeros = ((1 << size) - 1) ^ column
+    index = index_value(column, size)
+    bits = decimal_to_binary(index, size)
     return {
-        'sdnf': ' ∨ '.join(sdnf),
-        'sknf': ' ∧ '.join(sknf),
-        'numeric_sdnf': ', '.join(numeric_sdnf),
-        'numeric_sknf': ', '.join(numeric_sknf),
-        'index': f"{index} ({decimal_to_binary(index, len(table))})"
-    }
\ No newline at end of file
+        'sdnf': ' ∨ '.join(_form_terms(variables, iter_set_bits(column, size), 1)),
+        'sknf': ' ∧ '.join(_form_terms(variables, iter_set_bits(zeros, size), 0)),
+        'numeric_sdnf': ', '.join(map(str, iter_set_bits(column, size))),
+        'numeric_sknf': ', '.join(map(str, iter_set_bits(zeros, size))),
+        'index': f"{index} ({bits})" if len(variables) <= DECIMAL_INDEX_VARIABLES else f"({bits})",
+    }
+
+
+class FormsWriter:
+    """Потоковая запись таблицы истинности, СДНФ, СКНФ, числовых и индексной форм в файл.
+       Каждый раздел заново вычисляет столбец блоками (iter_column_chunks) и пишет текст
+       порциями по buffer_size элементов, так что память не растёт с числом переменных.
+       Если уже вычисленный столбец передан в column (например, из ExpressionCache),
+       блоки нарезаются из него и выражение не вычисляется вовсе"""
+
+    def __init__(self, out, variables, postfix, chunk_variables=CHUNK_VARIABLES, buffer_size=4096, column=None):
+        self.out = out
+        self.variables = list(variables)
+        self.postfix = postfix
+        self.chunk_variables = chunk_variables
+        self.buffer_size = buffer_size
+        self.column = column
+
+    def _chunks(self):
+        if self.column is None:
+            return iter_column_chunks(self.postfix, self.variables, self.chunk_variables)
+        return self._column_chunks()
+
+    def _column_chunks(self):
+        """Блоки (номер первой строки, разряды блока) готового столбца"""
+        total = 1 << len(self.variables)
+        size = self._chunk_size()
+        if size == total:
+            yield 0, self.column
+        elif size % 8:
+            mask = (1 << size) - 1
+            for start in range(0, total, size):
+                yield start, (self.column >> start) & mask
+        else:
+            # Срезы байтов вместо сдвигов: каждый блок стоит O(size), а не O(длины столбца)
+            data = self.column.to_bytes(total // 8, 'little')
+            step = size // 8
+            for offset in range(0, len(data), step):
+                yield offset * 8, int.from_bytes(data[offset:offset + step], 'little')
+
+    def _chunk_size(self):
+        return 1 << min(len(self.variables), self.chunk_variables)
+
+    def _write_joined(self, items, separator):
+        """Запись элементов через separator без построения общей строки"""
+        buffer = []
+        first = True
+        for item in items:
+            if first:
+                first = False
+            else:
+                buffer.append(separator)
+            buffer.append(item)
+            if len(buffer) >= self.buffer_size:
+                self.out.write(''.join(buffer))
+                buffer.clear()
+        self.out.write(''.join(buffer))
+
+    def rows(self, value):
+        """Номера строк, в которых функция равна value"""
+        size = self._chunk_size()
+        full = (1 << size) - 1
+        for start, chunk in self._chunks():
+            for offset in iter_set_bits(chunk if value else full ^ chunk, size):
+                yield start + offset
+
+    def _terms(self, value):
+        return _form_terms(self.variables, self.rows(value), value)
+
+    def write_table(self):
+        header = ' | '.join(self.variables) + ' | Результат'
+        self.out.write(header + '\n' + '-' * len(header) + '\n')
+        text = _row_formatter(self.variables, lambda j, bit: str(bit), ' | ')
+        size = self._chunk_size()
+        buffer = []
+        for start, chunk in self._chunks():
+            data = chunk.to_bytes((size + 7) // 8, 'little')
+            for offset in range(size):
+                buffer.append(f"{text(start + offset)} | {(data[offset >> 3] >> (offset & 7)) & 1}\n")
+                if len(buffer) >= self.buffer_size:
+                    self.out.write(''.join(buffer))
+                    buffer.clear()
+        self.out.write(''.join(buffer))
+
+    def write_sdnf(self):
+        self._write_joined(self._terms(1), ' ∨ ')
+        self.out.write('\n')
+
+    def write_sknf(self):
+        self._write_joined(self._terms(0), ' ∧ ')
+        self.out.write('\n')
+
+    def write_numeric(self, value):
+        self._write_joined(map(str, self.rows(value)), ', ')
+
+    def write_index(self):
+        """Индексная форма: разряды столбца от строки 0 к последней; десятичное значение –
+           только для не более DECIMAL_INDEX_VARIABLES переменных"""
+        size = self._chunk_size()
+        parts = (format(chunk, f'0{size}b')[::-1] for _, chunk in self._chunks())
+        if len(self.variables) <= DECIMAL_INDEX_VARIABLES:
+            binary = ''.join(parts)
+            self.out.write(f"{int(binary, 2)} ({binary})\n")
+            return
+        self.out.write("(")
+        for part in parts:
+            self.out.write(part)
+        self.out.write(")\n")
+
+    def write_report(self):
+        """Полный отчёт в том же виде, что выводит main.py"""
+        self.out.write("\nТаблица истинности:\n")
+        self.write_table()
+        self.out.write("\nСДНФ:\n")
+        self.write_sdnf()
+        self.out.write("Числовая форма СДНФ: ∨( ")
+        self.write_numeric(1)
+        self.out.write(" )\n")
+        self.out.write("\nСКНФ:\n")
+        self.write_sknf()
+        self.out.write("Числовая форма СКНФ: ∧( ")
+        self.write_numeric(0)
+        self.out.write(" )\n")
+        self.out.write("\nИндексная форма:\n")
+        self.write_index()
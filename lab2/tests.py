@@ -1,4 +1,11 @@
 from second_lab import *
+from main import process_expression, run_batch
+import main as cli
+import io
+import json
+import os
+import sys
+import tempfile
 import unittest
 
 
@@ -15,6 +22,30 @@ class TestLogicFunctions(unittest.TestCase):
         self.assertEqual(parse_expression('a→b∼c'), (['a', 'b', 'c'], 'a>b=c'))
         self.assertEqual(parse_expression('a ∧ (b | c)'), (['a', 'b', 'c'], 'a&(b|c)'))
 
+    def test_identifiers(self):
+        self.assertEqual(tokenize('req_valid ∧ ¬x10 -> x2'), ['req_valid', '&', '!', 'x10', '>', 'x2'])
+        variables, parsed_expr = parse_expression('x10 | x2 & x0 | req_valid')
+        self.assertEqual(variables, ['req_valid', 'x0', 'x2', 'x10'])
+        self.assertEqual(shunting_yard(parsed_expr), ['x10', 'x2', 'x0', '&', '|', 'req_valid', '|'])
+        with self.assertRaises(ValueError):
+            tokenize('a # b')
+        with self.assertRaises(ValueError):
+            shunting_yard('(a&b')
+        with self.assertRaises(ValueError):
+            shunting_yard('a&b)')
+
+    def test_many_variables(self):
+        # Цепочка x0 -> x1 -> ... -> x19 (импликации вправо через скобки) ложна только
+        # при x0..x18 = 1 и x19 = 0, то есть в одной строке из 2 ** 20
+        expr = 'x19'
+        for i in range(18, -1, -1):
+            expr = f'x{i} -> ({expr})'
+        variables, parsed_expr = parse_expression(expr)
+        self.assertEqual(variables, [f'x{i}' for i in range(20)])
+        table = generate_truth_table(variables, shunting_yard(parsed_expr))
+        self.assertEqual(len(table), 1 << 20)
+        self.assertEqual(((1 << len(table)) - 1) ^ table.column, 1 << ((1 << 20) - 2))
+
     def test_evaluate_postfix(self):
         postfix = ['a', 'b', '|']
         values = {'a': 1, 'b': 0}
@@ -24,6 +55,19 @@ class TestLogicFunctions(unittest.TestCase):
         values = {'a': 1, 'b': 1}
         self.assertEqual(evaluate_postfix(postfix, values), 0)
 
+    def test_compile_postfix(self):
+        postfix = shunting_yard('(a>b)=!c|a&b')
+        function = compile_postfix(postfix, ['a', 'b', 'c'])
+        for i in range(8):
+            combo = [(i >> 2) & 1, (i >> 1) & 1, i & 1]
+            values = dict(zip(['a', 'b', 'c'], combo))
+            self.assertEqual(function(*combo), evaluate_postfix(postfix, values))
+
+        with self.assertRaises(ValueError):
+            compile_postfix(['a', '&'], ['a'])
+        with self.assertRaises(ValueError):
+            compile_postfix(['a', 'b', '|'], ['a'])
+
     def test_shunting_yard(self):
         self.assertEqual(shunting_yard('a|b'), ['a', 'b', '|'])
         self.assertEqual(shunting_yard('!a&b'), ['a', '!', 'b', '&'])
@@ -43,6 +87,100 @@ class TestLogicFunctions(unittest.TestCase):
             ([1], 0)
         ])
 
+    def test_bitsliced_truth_table(self):
+        variables, parsed_expr = parse_expression('((a->b)&(b->c))->(a->c)|d~!e')
+        postfix = shunting_yard(parsed_expr)
+        table = generate_truth_table(variables, postfix)
+        self.assertIsInstance(table, TruthTable)
+        self.assertEqual(table, generate_truth_table(variables, postfix, method='rows'))
+        for row in (0, 7, 31):
+            combo, res = table[row]
+            self.assertEqual(res, evaluate_postfix(postfix, dict(zip(variables, combo))))
+        self.assertEqual(table[-1], table[31])
+        self.assertEqual(sum(res for _, res in table), table.column.bit_count())
+
+    def test_parallel_truth_table(self):
+        variables, parsed_expr = parse_expression('(x0 | !x1) & (x2 -> x3) ~ x4 | x5 & x6')
+        postfix = shunting_yard(parsed_expr)
+        serial = evaluate_bitsliced(postfix, variables)
+        for chunk_variables in (1, 3, 5):
+            self.assertEqual(evaluate_parallel(postfix, variables, workers=2, chunk_variables=chunk_variables), serial)
+        self.assertEqual(generate_truth_table(variables, postfix, 'parallel', workers=2).column, serial)
+        self.assertEqual(shard_variables(30, 16), 20)
+        self.assertEqual(shard_variables(24, 4), 19)
+        self.assertEqual(shard_variables(10, 4), 10)
+
+    def test_variable_mask(self):
+        self.assertEqual(variable_mask(0, 1), 0b10)
+        self.assertEqual(variable_mask(0, 3), 0b11110000)
+        self.assertEqual(variable_mask(2, 3), 0b10101010)
+        mask = variable_mask(3, 12)
+        self.assertTrue(all(((mask >> i) & 1) == ((i >> 8) & 1) for i in range(1 << 12)))
+
+    def test_forms_writer(self):
+        variables, parsed_expr = parse_expression('((a∨b)&(c->d))∼e')
+        postfix = shunting_yard(parsed_expr)
+        forms = build_forms(generate_truth_table(variables, postfix), variables)
+        reports = set()
+        column = generate_truth_table(variables, postfix).column
+        for chunk_variables in (1, 3, 16):
+            for cached in (None, column):
+                out = io.StringIO()
+                FormsWriter(out, variables, postfix, chunk_variables=chunk_variables, column=cached).write_report()
+                reports.add(out.getvalue())
+        self.assertEqual(len(reports), 1)
+        report = reports.pop()
+        for key in ('sdnf', 'sknf', 'index'):
+            self.assertIn(forms[key] + '\n', report)
+        self.assertIn(f"∨( {forms['numeric_sdnf']} )", report)
+        self.assertIn(f"∧( {forms['numeric_sknf']} )", report)
+        self.assertEqual(list(iter_truth_table(variables, postfix, 2)), generate_truth_table(variables, postfix))
+
+    def test_expression_cache(self):
+        cache = ExpressionCache()
+        table = cache.truth_table('(a ∨ b) → c')
+        self.assertEqual(cache.truth_table('(a|b)->c'), table)
+        self.assertEqual(cache.compile('(a|b) -> c'), (['a', 'b', 'c'], ['a', 'b', '|', 'c', '>']))
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['entries'], 1)
+
+        # Вытеснение по суммарному размеру столбцов: таблица на 2 ** 12 разрядов вытесняет прежние записи
+        cache = ExpressionCache(max_bits=6500)
+        cache.truth_table('a&b')
+        cache.truth_table(' & '.join(f'x{i}' for i in range(12)))
+        self.assertEqual(cache.stats()['entries'], 1)
+        self.assertLessEqual(cache.stats()['bits'], 6500)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache.json')
+            cache.save(path)
+            warm = ExpressionCache(max_bits=6500, path=path)
+            self.assertEqual(warm.truth_table(' & '.join(f'x{i}' for i in range(12))).column, 1 << 4095)
+            self.assertEqual(warm.stats()['hits'], 1)
+
+    def test_classify_function(self):
+        cases = {
+            '((a->b)&(b->c))->(a->c)': 'tautology',
+            'a & !a | b & !b': 'contradiction',
+            '(a∨b)∧!c': 'contingent',
+        }
+        for expr, kind in cases.items():
+            variables, parsed_expr = parse_expression(expr)
+            postfix = shunting_yard(parsed_expr)
+            self.assertEqual(classify_function(postfix, variables), kind)
+            column = generate_truth_table(variables, postfix).column
+            for result in (0, 1):
+                witness = find_witness(postfix, variables, result)
+                if witness is None:
+                    self.assertEqual(column, ((1 << (1 << len(variables))) - 1) * (1 - result))
+                else:
+                    self.assertEqual(evaluate_postfix(postfix, dict(zip(variables, witness))), result)
+
+        # 60 переменных: таблица из 2 ** 60 строк не строится
+        chain = ' & '.join(f'(x{i} -> x{i + 1})' for i in range(59))
+        variables, parsed_expr = parse_expression(f'({chain}) & x0 -> x59')
+        self.assertEqual(classify_function(shunting_yard(parsed_expr), variables), 'tautology')
+
     def test_build_forms(self):
         table = [([0], 0), ([1], 1)]
         forms = build_forms(table, ['a'])
@@ -50,6 +188,32 @@ class TestLogicFunctions(unittest.TestCase):
         self.assertEqual(forms['sknf'], '(a)')
         self.assertEqual(forms['index'], '1 (01)')  # 1 в двоичном виде с длиной 2
 
+    def test_index_form_from_column(self):
+        # Строки 1 и 2 истинны: индекс 0110
+        self.assertEqual(index_value(0b0110, 4), 0b0110)
+        self.assertEqual(index_value(0b0001, 4), 0b1000)
+        self.assertEqual(index_value(1, 1 << 16), 1 << ((1 << 16) - 1))
+        self.assertEqual(decimal_to_binary(1 << 20, 21), '1' + '0' * 20)
+
+        variables, parsed_expr = parse_expression('(a->b)&c')
+        table = generate_truth_table(variables, shunting_yard(parsed_expr))
+        forms = build_forms(table, variables)
+        self.assertEqual(forms, build_forms(list(table), variables))
+        self.assertEqual(forms['numeric_sdnf'], '1, 3, 7')
+        self.assertEqual(forms['index'], '81 (01010001)')
+
+    def test_decimal_index_limit(self):
+        # 2 ** 2 ** n < 10 ** ceil(2 ** n * log10(2)): 13 переменных – 2467 цифр, 14 – 4932
+        self.assertEqual(decimal_index_variables(4300), 13)
+        self.assertEqual(decimal_index_variables(2466), 12)
+        self.assertEqual(decimal_index_variables(2467), 13)
+        if hasattr(sys, 'get_int_max_str_digits') and sys.get_int_max_str_digits() == 4300:
+            self.assertEqual(DECIMAL_INDEX_VARIABLES, 13)
+        variables = [f'x{i}' for i in range(DECIMAL_INDEX_VARIABLES)]
+        table = TruthTable(variables, (1 << (1 << len(variables))) - 1)
+        index = build_forms(table, variables)['index']
+        self.assertEqual(index.split(' ')[0], str((1 << (1 << len(variables))) - 1))
+
     def test_full_flow(self):
         variables, parsed_expr = parse_expression('a')
         postfix = shunting_yard(parsed_expr)
@@ -61,5 +225,71 @@ class TestLogicFunctions(unittest.TestCase):
         self.assertEqual(forms['index'], '1 (01)')
 
 
+class TestBatchMode(unittest.TestCase):
+    def test_process_expression(self):
+        record = process_expression('(a∨b)∧!c')
+        self.assertEqual(record['truth_vector'], '00101010')
+        self.assertEqual(record['numeric_sdnf'], [2, 4, 6])
+        self.assertEqual(record['index'], 42)
+        with self.assertRaises(ValueError):
+            process_expression('a & b & c', max_variables=2)
+
+    def test_run_batch_order_and_errors(self):
+        source = '\n'.join(['a->(b->c)', '# комментарий', '', 'a b', '(a∨b)∧!c'] * 5) + '\n'
+        outputs = []
+        for workers in (1, 2):
+            out = io.StringIO()
+            run_batch(io.StringIO(source), out, workers=workers, chunk_size=3)
+            records = [json.loads(line) for line in out.getvalue().splitlines()]
+            for record in records:
+                self.assertGreaterEqual(record.pop('seconds'), 0)
+            outputs.append(records)
+        self.assertEqual(outputs[0], outputs[1])
+        self.assertEqual([r['line'] for r in outputs[0]][:3], [1, 4, 5])
+        self.assertIn('error', outputs[0][1])
+        self.assertEqual(outputs[0][0]['index'], 253)
+
+    def test_repeated_expression_cache_hit(self):
+        EXPRESSION_CACHE.clear()
+        before = EXPRESSION_CACHE.stats()
+        output = io.StringIO()
+        run_batch(io.StringIO('(a|b)->c\n(a ∨ b) → c\n(a|b)->c\n'), output, workers=1)
+        stats = EXPRESSION_CACHE.stats()
+        self.assertEqual(stats['misses'] - before['misses'], 1)
+        self.assertEqual(stats['hits'] - before['hits'], 2)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        self.assertEqual(len({record['truth_vector'] for record in records}), 1)
+
+        # Изменение возвращённых списков не портит запись кэша
+        variables, postfix = EXPRESSION_CACHE.compile('(a|b)->c')
+        variables.append('z')
+        postfix.clear()
+        self.assertEqual(EXPRESSION_CACHE.compile('(a|b)->c'), (['a', 'b', 'c'], ['a', 'b', '|', 'c', '>']))
+
+    def test_cache_file(self):
+        self.addCleanup(setattr, cli, 'EXPRESSION_CACHE', cli.EXPRESSION_CACHE)
+        with tempfile.TemporaryDirectory() as directory:
+            source = os.path.join(directory, 'input.txt')
+            path = os.path.join(directory, 'cache.json')
+            with open(source, 'w', encoding='utf-8') as f:
+                f.write('(a|b)->c\na&b\n(a ∨ b) → c\n')
+            # Записи процессов пула попадают в файл, сохранённый главным процессом
+            for workers in ('2', '1'):
+                cli.main(['--batch', source, '--output', os.path.join(directory, 'out.jsonl'),
+                          '--workers', workers, '--cache', path])
+            self.assertEqual(cli.EXPRESSION_CACHE.stats()['misses'], 0)
+            warm = ExpressionCache(path=path)
+            self.assertEqual(warm.stats()['entries'], 2)
+            self.assertEqual(warm.truth_table('a & b').column, 0b1000)
+            self.assertEqual(warm.stats()['hits'], 1)
+
+    def test_skip_constant(self):
+        wide = ' & '.join(f'x{i}' for i in range(40)) + ' -> x39'
+        self.assertEqual(process_expression(wide, skip_constant=True)['constant'], 'tautology')
+        with self.assertRaises(ValueError):
+            process_expression(wide)
+        self.assertNotIn('constant', process_expression('a & b', skip_constant=True))
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""Замеры проходов анализа формул lab3 на глубоких формулах.
+
+Для цепочек импликаций глубиной от 100 до 100000 узлов (левых a->b->c->...
+и правых a->(b->(c->...))) набор измеряет число узлов в секунду для
+mark_subtrees, calculate_depth, gather_subtrees и evaluate_ast, пиковую
+память одного прохода и сравнивает их с прежними рекурсивными реализациями.
+Рекурсивный вариант на глубине больше предела рекурсии падает с
+RecursionError – это отмечается в отчёте.
+
+Запуск: python -m lab3.benchmark [--quick] [--min-time 0.2]
+"""
+import argparse
+import sys
+import time
+import tracemalloc
+
+from lab3.views.formula_analysis_tools import mark_subtrees, calculate_depth, gather_subtrees, evaluate_ast
+from lab3.views.expression_nodes import ExpressionNode
+from lab3.views.formula_tree_generator import build_formula_tree
+
+
+DEPTHS = [100, 500, 2000, 5000, 20000, 100000]
+QUICK_DEPTHS = [100, 2000]
+VARIABLES = 'abcdefgh'
+
+
+def left_chain(depth):
+    """a->b->c->... : импликация левоассоциативна, глубина дерева растёт влево"""
+    return '->'.join(VARIABLES[i % len(VARIABLES)] for i in range(depth))
+
+
+def right_chain(depth):
+    """a->(b->(c->...)) : глубина дерева растёт вправо"""
+    names = [VARIABLES[i % len(VARIABLES)] for i in range(depth)]
+    return '->('.join(names) + ')' * (depth - 1)
+
+
+def tree_nodes(root):
+    """Все узлы дерева (для сброса аннотаций между замерами)"""
+    nodes, stack, seen = [], [root], set()
+    while stack:
+        node = stack.pop()
+        if node is None or node in seen:
+            continue
+        seen.add(node)
+        nodes.append(node)
+        stack.append(node.lhs)
+        stack.append(node.rhs)
+    return nodes
+
+
+# Прежние рекурсивные реализации (с теми же проверками входных данных) – точка отсчёта для сравнения
+
+_OPERATORS = {'conjunction': '∧', 'disjunction': '∨', 'implication': '→', 'equivalence': '↔'}
+
+
+def _check_children(node, binary):
+    if not hasattr(node, 'lhs') or node.lhs is None:
+        raise ValueError("Node must have a left child")
+    if binary and (not hasattr(node, 'rhs') or node.rhs is None):
+        raise ValueError("Node must have both left and right children")
+
+
+def recursive_mark_subtrees(root):
+    if not isinstance(root, ExpressionNode):
+        raise TypeError("Root must be an ExpressionNode")
+    if root.operation == 'variable':
+        if not hasattr(root, 'variable') or not isinstance(root.variable, str):
+            raise ValueError("Variable node must have a string variable attribute")
+        root.formula = root.variable
+    elif root.operation == 'negation':
+        _check_children(root, False)
+        recursive_mark_subtrees(root.lhs)
+        wrap = root.lhs.operation != 'variable'
+        root.formula = f"¬({root.lhs.formula})" if wrap else f"¬{root.lhs.formula}"
+    else:
+        _check_children(root, True)
+        recursive_mark_subtrees(root.lhs)
+        recursive_mark_subtrees(root.rhs)
+        wrapped = {'disjunction' if root.operation == 'conjunction' else 'implication', 'equivalence'}
+        lhs = f"({root.lhs.formula})" if root.lhs.operation in wrapped else root.lhs.formula
+        rhs = f"({root.rhs.formula})" if root.rhs.operation in wrapped else root.rhs.formula
+        root.formula = f"{lhs}{_OPERATORS[root.operation]}{rhs}"
+
+
+def recursive_calculate_depth(node):
+    if not isinstance(node, ExpressionNode):
+        raise TypeError("Node must be an ExpressionNode")
+    if node.operation == 'variable':
+        return 1
+    if node.operation == 'negation':
+        _check_children(node, False)
+        return recursive_calculate_depth(node.lhs) + 1
+    _check_children(node, True)
+    return max(recursive_calculate_depth(node.lhs), recursive_calculate_depth(node.rhs)) + 1
+
+
+def recursive_gather_subtrees(root):
+    components = []
+    visited = set()
+
+    def traverse(node):
+        if not isinstance(node, ExpressionNode):
+            raise TypeError("All nodes must be ExpressionNode instances")
+        if node.operation in _OPERATORS:
+            _check_children(node, True)
+            traverse(node.lhs)
+            if node.formula not in visited:
+                visited.add(node.formula)
+                components.append(node)
+            traverse(node.rhs)
+        else:
+            if node.operation == 'negation':
+                _check_children(node, False)
+                traverse(node.lhs)
+            if node.formula not in visited:
+                visited.add(node.formula)
+                components.append(node)
+
+    traverse(root)
+    return components
+
+
+def recursive_evaluate_ast(node, env):
+    if not isinstance(node, ExpressionNode):
+        raise TypeError("Node must be an ExpressionNode")
+    if not isinstance(env, dict):
+        raise TypeError("Environment must be a dictionary")
+    if node.operation == 'variable':
+        if node.variable not in env:
+            raise ValueError(f"Variable {node.variable} not found in environment")
+        return env[node.variable]
+    if node.operation == 'negation':
+        _check_children(node, False)
+        return not recursive_evaluate_ast(node.lhs, env)
+    _check_children(node, True)
+    if node.operation == 'conjunction':
+        return recursive_evaluate_ast(node.lhs, env) and recursive_evaluate_ast(node.rhs, env)
+    if node.operation == 'disjunction':
+        return recursive_evaluate_ast(node.lhs, env) or recursive_evaluate_ast(node.rhs, env)
+    if node.operation == 'implication':
+        return (not recursive_evaluate_ast(node.lhs, env)) or recursive_evaluate_ast(node.rhs, env)
+    return recursive_evaluate_ast(node.lhs, env) == recursive_evaluate_ast(node.rhs, env)
+
+
+def measure(func, reset=None, min_time=0.2, max_runs=1000):
+    """Медианное время одного вызова func(); reset() выполняется перед каждым вызовом вне замера"""
+    timings = []
+    total = 0.0
+    while len(timings) < max_runs and (total < min_time or len(timings) < 3):
+        if reset:
+            reset()
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        timings.append(elapsed)
+        total += elapsed
+    timings.sort()
+    return timings[len(timings) // 2]
+
+
+def peak_memory(func, reset=None):
+    """Пиковый объём памяти, выделенной за один вызов func(), в байтах"""
+    if reset:
+        reset()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def pass_cases(root, env):
+    """Кортежи (имя, новая реализация, рекурсивная реализация, сброс аннотаций перед
+       каждым вызовом или None, подготовка рекурсивного замера или None) и сам сброс"""
+    nodes = tree_nodes(root)
+
+    def clear():
+        for node in nodes:
+            node.rope = None
+            node.formula = None
+
+    # Прежний gather_subtrees сравнивал готовые строки formula, построенные прежней разметкой
+    eager = lambda: recursive_mark_subtrees(root)
+    return [
+        ('mark_subtrees', lambda: mark_subtrees(root), lambda: recursive_mark_subtrees(root), clear, None),
+        ('calculate_depth', lambda: calculate_depth(root), lambda: recursive_calculate_depth(root), None, None),
+        ('gather_subtrees', lambda: gather_subtrees(root), lambda: recursive_gather_subtrees(root), None, eager),
+        ('evaluate_ast', lambda: evaluate_ast(root, env), lambda: recursive_evaluate_ast(root, env), None, None),
+    ], clear
+
+
+def run_suite(depths=DEPTHS, min_time=0.2, progress=None):
+    """Прогон всех проходов на левых и правых цепочках; возвращает список результатов"""
+    results = []
+    for shape, make in (('left', left_chain), ('right', right_chain)):
+        for depth in depths:
+            root = build_formula_tree(make(depth))
+            size = len(tree_nodes(root))
+            # При истинных переменных цепочку импликаций приходится вычислять целиком
+            env = dict.fromkeys(VARIABLES, True)
+            cases, clear = pass_cases(root, env)
+            mark_subtrees(root)
+            for name, func, recursive, reset, prepare in cases:
+                result = {'pass': name, 'shape': shape, 'depth': depth, 'nodes': size}
+                result['seconds'] = measure(func, reset, min_time)
+                result['nodes_per_sec'] = size / result['seconds']
+                result['peak_bytes'] = peak_memory(func, reset)
+                try:
+                    if prepare:
+                        prepare()
+                    result['recursive_seconds'] = measure(recursive, reset, min_time)
+                except RecursionError:
+                    result['recursive_seconds'] = None
+                # Возврат к ленивой разметке для следующих проходов
+                clear()
+                mark_subtrees(root)
+                results.append(result)
+                if progress:
+                    progress(result)
+    return results
+
+
+def format_result(result):
+    line = (f"{result['pass']:<16} {result['shape']:<6} глубина {result['depth']:>6}"
+            f"  {result['nodes_per_sec']:>12.0f} узлов/с  память {result['peak_bytes']:>10} Б")
+    if result['recursive_seconds'] is None:
+        return line + "  рекурсия: RecursionError"
+    speedup = result['recursive_seconds'] / result['seconds']
+    return line + f"  рекурсия: {result['nodes'] / result['recursive_seconds']:>12.0f} узлов/с  x{speedup:.2f}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры проходов анализа формул lab3 на глубоких формулах")
+    parser.add_argument('--quick', action='store_true', help="сокращённый набор глубин")
+    parser.add_argument('--min-time', type=float, default=0.2, help="минимальное время замера одного случая, с")
+    args = parser.parse_args(argv)
+
+    depths = QUICK_DEPTHS if args.quick else DEPTHS
+    print(f"Предел рекурсии: {sys.getrecursionlimit()}")
+    run_suite(depths, args.min_time, progress=lambda r: print(format_result(r)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,8 +4,11 @@ from lab3.views.formula_analysis_tools import (
     calculate_depth,
     gather_subtrees,
     evaluate_ast,
+    compile_columns,
+    evaluate_columns,
 )
 from lab3.views.expression_nodes import ExpressionNode
+from lab3.views.formula_tree_generator import build_formula_tree
 
 
 class TestFormulaAnalysisTools(unittest.TestCase):
@@ -62,6 +65,17 @@ class TestFormulaAnalysisTools(unittest.TestCase):
         expected = {'P', 'Q', 'P∧Q', 'R', 'P∧Q∨R'}
         self.assertTrue(expected.issubset(formulas))
 
+    def test_gather_subtrees_shared(self):
+        p = ExpressionNode(operation='variable', variable='P')
+        q = ExpressionNode(operation='variable', variable='Q')
+        left = ExpressionNode(operation='conjunction', lhs=p, rhs=q)
+        right = ExpressionNode(operation='conjunction', lhs=p, rhs=q)
+        root = ExpressionNode(operation='equivalence', lhs=left, rhs=right)
+        self.assertIs(left, right)
+        mark_subtrees(root)
+        subs = gather_subtrees(root)
+        self.assertEqual([node.formula for node in subs], ['P', 'P∧Q', 'Q', 'P∧Q↔P∧Q'])
+
     def test_evaluate_ast(self):
         p = ExpressionNode(operation='variable', variable='P')
         q = ExpressionNode(operation='variable', variable='Q')
@@ -74,6 +88,42 @@ class TestFormulaAnalysisTools(unittest.TestCase):
         env['R'] = True
         self.assertFalse(evaluate_ast(and_node, env))
 
+    def test_depth_stored_in_node(self):
+        tree = build_formula_tree("!(a & b) -> c")
+        self.assertEqual(tree.depth, 4)
+        self.assertEqual(calculate_depth(tree), 4)
+        broken = ExpressionNode(operation='negation', lhs=ExpressionNode(operation='conjunction', lhs=tree))
+        self.assertIsNone(broken.depth)
+        with self.assertRaises(ValueError):
+            calculate_depth(broken)
+
+    def test_deep_chain(self):
+        # Цепочка из 3000 импликаций глубже предела рекурсии
+        names = 'abcdefgh'
+        text = '->'.join(names[i % len(names)] for i in range(3000))
+        tree = build_formula_tree(text)
+        mark_subtrees(tree)
+        # Текст формулы строится только при обращении и только для запрошенного узла
+        self.assertIsNone(tree.cached_formula)
+        self.assertEqual(tree.rope, ('(', tree.lhs, ')', '→', tree.rhs))
+        self.assertEqual(calculate_depth(tree), 3000)
+        self.assertEqual(len(gather_subtrees(tree)), 2999 + len(names))
+        self.assertTrue(tree.formula.startswith('(' * 2998 + 'a→b)→c)'))
+        self.assertIsNone(tree.lhs.cached_formula)
+        self.assertTrue(evaluate_ast(tree, dict.fromkeys(names, True)))
+        self.assertFalse(evaluate_ast(tree, dict(dict.fromkeys(names, True), h=False)))
+
+    def test_evaluate_columns(self):
+        tree = build_formula_tree("!(a & b) ~ (a -> b)")
+        a, b = tree.lhs.lhs.lhs, tree.lhs.lhs.rhs
+        columns = [a, b, tree.lhs.lhs, tree.lhs, tree.rhs, tree]
+        program = compile_columns(columns)
+        self.assertEqual(program[2], ('conjunction', 0, 1))
+        for env in ({'a': x, 'b': y} for x in (False, True) for y in (False, True)):
+            self.assertEqual(evaluate_columns(program, env), [evaluate_ast(node, env) for node in columns])
+        with self.assertRaises(ValueError):
+            compile_columns([tree.lhs, a, b])
+
     # Новые тесты для валидации
     def test_mark_subtrees_invalid_root(self):
         with self.assertRaises(TypeError):
@@ -1,3 +1,4 @@
+import copy
 import unittest
 from lab3.views.expression_nodes import ExpressionNode, clean_input, parse_symbols
 from lab3.views.formula_tree_generator import dijkstra_algorithm, convert_to_tree, build_formula_tree
@@ -96,3 +97,16 @@ class TestExpressionParser(unittest.TestCase):
         self.assertEqual(tree.operation, 'equivalence')
         self.assertEqual(tree.rhs.variable, 'c')
 
+    def test_shared_subformulas(self):
+        # Одинаковые подформулы представлены одним узлом с общим структурным хэшем
+        tree = build_formula_tree("(a & b) | (a & b)")
+        self.assertIs(tree.lhs, tree.rhs)
+        self.assertIs(tree.lhs.lhs, build_formula_tree("a"))
+        self.assertIs(build_formula_tree("!(a -> b)"), build_formula_tree("!(a->b)"))
+        self.assertEqual(hash(tree), tree.structural_hash)
+        self.assertIsNot(build_formula_tree("a -> b"), build_formula_tree("b -> a"))
+        with self.assertRaises(AttributeError):
+            tree.extra = 1
+        with self.assertRaises(AttributeError):
+            tree.lhs = tree.rhs
+        self.assertIs(copy.deepcopy(tree), tree)
@@ -41,3 +41,19 @@ class TestComputeTruthTable(unittest.TestCase):
         self.assertEqual(result['cnf_formula'], expected_cnf)
         self.assertEqual(result['index_value'], 1)
         self.assertEqual(result['binary_pattern'], '0001')
+
+    def test_headers_name_one_column(self):
+        # Структурно разные подформулы с одинаковым текстом без скобок получают разные заголовки
+        for expression, headers in (
+                ('(a|b)|c|(a|(b|c))', ['a∨b∨c', 'a∨(b∨c)', 'a∨b∨c∨(a∨(b∨c))']),
+                ('(a&b)->c ~ a&(b->c)', ['a∧b→c', 'a∧(b→c)', '(a∧b→c)↔a∧(b→c)'])):
+            buf = io.StringIO()
+            sys_stdout = sys.stdout
+            sys.stdout = buf
+            try:
+                compute_truth_table(expression)
+            finally:
+                sys.stdout = sys_stdout
+            labels = buf.getvalue().splitlines()[0].split(' | ')
+            self.assertEqual(len(labels), len(set(labels)))
+            self.assertEqual(labels[-3:], headers)
@@ -1,10 +1,151 @@
+from weakref import WeakValueDictionary
+
+
+BINARY_OPERATIONS = frozenset({'conjunction', 'disjunction', 'implication', 'equivalence'})
+
+OPERATORS = {
+    'conjunction': '∧',
+    'disjunction': '∨',
+    'implication': '→',
+    'equivalence': '↔'
+}
+
+# Операции левого потомка, которые под данной бинарной операцией берутся в скобки:
+# связывающие слабее (приоритеты ¬ > ∧ > ∨ > → > ↔), а также → и ↔ под самими собой
+WRAPPED_OPERATIONS = {
+    'conjunction': frozenset({'disjunction', 'implication', 'equivalence'}),
+    'disjunction': frozenset({'implication', 'equivalence'}),
+    'implication': frozenset({'implication', 'equivalence'}),
+    'equivalence': frozenset({'implication', 'equivalence'}),
+}
+
+# Правый потомок с той же операцией тоже берётся в скобки: все бинарные операции
+# левоассоциативны, и a∨(b∨c) без скобок читалось бы как (a∨b)∨c. Поэтому разные
+# подформулы никогда не получают одинаковую запись
+RIGHT_WRAPPED_OPERATIONS = {
+    operation: wrapped | {operation} for operation, wrapped in WRAPPED_OPERATIONS.items()
+}
+
+# Таблица уникальных узлов: структурно одинаковые подформулы представлены одним узлом.
+# Значения слабые, поэтому узлы, на которые никто не ссылается, удаляются из таблицы сами
+_UNIQUE_NODES = WeakValueDictionary()
+
+# Аннотации, которые можно менять у созданного узла: они зависят только от структуры
+# (formula – свойство, записывающее cached_formula)
+_ANNOTATIONS = frozenset({'rope', 'cached_formula', 'formula'})
+
+
+def formula_rope(node) -> tuple:
+    """Запись формулы узла как верёвки (rope): кортеж строк и узлов-потомков,
+       на место которых подставляется их собственная запись. Зависит только от
+       операций потомков, поэтому строится за O(1) и не копирует их текст"""
+    operation = node.operation
+    if operation == 'variable':
+        return (node.variable,)
+    lhs = node.lhs
+    if operation == 'negation':
+        return ('¬', lhs) if lhs.operation == 'variable' else ('¬(', lhs, ')')
+    rhs = node.rhs
+    left = ('(', lhs, ')') if lhs.operation in WRAPPED_OPERATIONS[operation] else (lhs,)
+    right = ('(', rhs, ')') if rhs.operation in RIGHT_WRAPPED_OPERATIONS[operation] else (rhs,)
+    return left + (OPERATORS[operation],) + right
+
+
+def render_rope(node) -> str:
+    """Текст формулы размеченного узла: обход верёвок явным стеком за O(длины текста).
+       Уже вычисленный текст потомка подставляется целиком"""
+    pieces = []
+    stack = [node.rope]
+    while stack:
+        segments = stack.pop()
+        for position, segment in enumerate(segments):
+            if segment.__class__ is str:
+                pieces.append(segment)
+            elif segment.cached_formula is not None:
+                pieces.append(segment.cached_formula)
+            else:
+                # Остаток текущей верёвки дописывается после записи потомка
+                stack.append(segments[position + 1:])
+                stack.append(segment.rope)
+                break
+    return ''.join(pieces)
+
+
+def _node_depth(operation, lhs, rhs):
+    """Глубина нового узла по глубинам потомков; None, если поддерево некорректно"""
+    if operation == 'variable':
+        return 1
+    children = (lhs,) if operation == 'negation' else (lhs, rhs)
+    depths = [child.depth if isinstance(child, ExpressionNode) else None for child in children]
+    if None in depths:
+        return None
+    return max(depths) + 1
+
+
 class ExpressionNode:
-    def __init__(self, operation, lhs=None, rhs=None, variable=None):
-        self.operation = operation
-        self.lhs = lhs
-        self.rhs = rhs
-        self.variable = variable
-        self.formula = None
+    """Узел дерева формулы с разделением одинаковых поддеревьев (hash-consing).
+
+    Конструктор сначала ищет узел с той же операцией, переменной и теми же
+    потомками в таблице уникальных узлов и возвращает его, поэтому дерево
+    формулы фактически является DAG. Потомки сравниваются по тождеству, а
+    структурный хэш вычисляется один раз из хэшей потомков, так что построение
+    и поиск узла стоят O(1). Узлы нельзя изменять после создания, кроме аннотаций
+    rope и formula, которые зависят только от структуры. Глубина depth вычисляется
+    при создании из глубин потомков; у узла с недостающим или неверным потомком она None.
+
+    mark_subtrees сохраняет в rope запись формулы через потомков (см. formula_rope);
+    текст formula собирается из неё только при первом обращении и запоминается."""
+
+    __slots__ = ('operation', 'lhs', 'rhs', 'variable', 'rope', 'cached_formula', 'structural_hash',
+                 'depth', '__weakref__')
+
+    def __new__(cls, operation, lhs=None, rhs=None, variable=None):
+        key = (operation, lhs, rhs, variable)
+        try:
+            node = _UNIQUE_NODES.get(key)
+        except TypeError:  # нехэшируемая переменная: узел не разделяется
+            key = None
+            node = None
+        if node is not None:
+            return node
+
+        node = object.__new__(cls)
+        init = object.__setattr__
+        init(node, 'operation', operation)
+        init(node, 'lhs', lhs)
+        init(node, 'rhs', rhs)
+        init(node, 'variable', variable)
+        init(node, 'rope', None)
+        init(node, 'cached_formula', None)
+        init(node, 'structural_hash', hash(key) if key is not None else object.__hash__(node))
+        init(node, 'depth', _node_depth(operation, lhs, rhs))
+        if key is not None:
+            _UNIQUE_NODES[key] = node
+        return node
+
+    def __setattr__(self, name, value):
+        if name not in _ANNOTATIONS:
+            raise AttributeError(f"ExpressionNode is immutable: cannot set '{name}'")
+        object.__setattr__(self, name, value)
+
+    def __reduce__(self):
+        # Копия и распакованный узел снова проходят через таблицу уникальных узлов
+        return ExpressionNode, (self.operation, self.lhs, self.rhs, self.variable)
+
+    def __hash__(self):
+        return self.structural_hash
+
+    @property
+    def formula(self):
+        """Текст формулы; None, пока узел не размечен mark_subtrees"""
+        if self.cached_formula is None and self.rope is not None:
+            self.cached_formula = render_rope(self)
+        return self.cached_formula
+
+    @formula.setter
+    def formula(self, text):
+        self.cached_formula = text
+
 
 def clean_input(expression: str) -> str:
     if not isinstance(expression, str):
@@ -1,156 +1,311 @@
 # formula_analysis_tools.py
-from .expression_nodes import ExpressionNode
+from .expression_nodes import ExpressionNode, BINARY_OPERATIONS, formula_rope
+
+
+# Все проходы ниже обходят дерево явным стеком, а не рекурсией: цепочки импликаций
+# глубиной в тысячи узлов не упираются в предел рекурсии. Маркер, положенный на стек
+# над узлом, означает, что его потомки уже обработаны и узел можно завершить;
+# маркеры избавляют от создания кортежа (узел, шаг) на каждый узел.
+_CHILDREN_DONE = object()
+_RIGHT_DONE = object()
+
+# Словари и множества узлов ниже ключуются по id(узла): тождество узла совпадает со
+# структурным равенством (см. ExpressionNode), а хэш id не вызывает ExpressionNode.__hash__.
+# Формулы не глубже _RECURSION_DEPTH evaluate_ast вычисляет обычной рекурсией:
+# на неглубоких формулах вызов функции дешевле работы со стеком
+_RECURSION_DEPTH = 200
 
 
 def mark_subtrees(root: ExpressionNode) -> None:
-    """Рекурсивно аннотирует подформулы для всех узлов дерева"""
+    """Аннотирует подформулы для всех узлов дерева (обход в обратном порядке).
+       Каждый узел получает верёвку rope из своих потомков, а текст formula
+       собирается лениво при первом обращении, поэтому разметка линейна по числу
+       узлов и не строит промежуточных строк. Общие поддеревья размечаются один раз"""
     if not isinstance(root, ExpressionNode):
         raise TypeError("Root must be an ExpressionNode")
 
-    if root.operation == 'variable':
-        if not hasattr(root, 'variable') or not isinstance(root.variable, str):
-            raise ValueError("Variable node must have a string variable attribute")
-        root.formula = root.variable
+    stack = [root]
+    push, pop = stack.append, stack.pop
+    while stack:
+        node = pop()
+        if node is _CHILDREN_DONE:
+            node = pop()
+            node.rope = formula_rope(node)
+            continue
 
-    elif root.operation == 'negation':
-        if not hasattr(root, 'lhs') or root.lhs is None:
-            raise ValueError("Negation node must have a left child")
-        mark_subtrees(root.lhs)
-        wrap = root.lhs.operation != 'variable'
-        root.formula = f"¬({root.lhs.formula})" if wrap else f"¬{root.lhs.formula}"
-
-    elif root.operation in {'conjunction', 'disjunction', 'implication', 'equivalence'}:
-        if not hasattr(root, 'lhs') or root.lhs is None or not hasattr(root, 'rhs') or root.rhs is None:
-            raise ValueError(f"Binary operation {root.operation} must have both left and right children")
-
-        mark_subtrees(root.lhs)
-        mark_subtrees(root.rhs)
-
-        # Определение необходимости скобок для левой части
-        lhs_needs_wrap = root.lhs.operation in {
-            'disjunction' if root.operation == 'conjunction' else 'implication',
-            'equivalence'
-        }
-
-        # Определение необходимости скобок для правой части
-        rhs_needs_wrap = root.rhs.operation in {
-            'disjunction' if root.operation == 'conjunction' else 'implication',
-            'equivalence'
-        }
-
-        # Формирование строкового представления
-        operators = {
-            'conjunction': '∧',
-            'disjunction': '∨',
-            'implication': '→',
-            'equivalence': '↔'
-        }
-
-        lhs = f"({root.lhs.formula})" if lhs_needs_wrap else root.lhs.formula
-        rhs = f"({root.rhs.formula})" if rhs_needs_wrap else root.rhs.formula
-        root.formula = f"{lhs}{operators[root.operation]}{rhs}"
-
-    else:
-        raise ValueError(f"Неподдерживаемая операция: {root.operation}")
-
-
-def calculate_depth(node: ExpressionNode) -> int:
-    """Вычисляет глубину поддерева"""
+        if not isinstance(node, ExpressionNode):
+            raise TypeError("Root must be an ExpressionNode")
+        if node.rope is not None:
+            continue
+        operation = node.operation
+
+        if operation == 'variable':
+            if not isinstance(node.variable, str):
+                raise ValueError("Variable node must have a string variable attribute")
+            node.rope = formula_rope(node)
+
+        elif operation == 'negation':
+            if node.lhs is None:
+                raise ValueError("Negation node must have a left child")
+            push(node)
+            push(_CHILDREN_DONE)
+            push(node.lhs)
+
+        elif operation in BINARY_OPERATIONS:
+            if node.lhs is None or node.rhs is None:
+                raise ValueError(f"Binary operation {operation} must have both left and right children")
+            push(node)
+            push(_CHILDREN_DONE)
+            push(node.rhs)
+            push(node.lhs)
+
+        else:
+            raise ValueError(f"Неподдерживаемая операция: {operation}")
+
+
+def calculate_depth(node: ExpressionNode, memo: dict = None) -> int:
+    """Вычисляет глубину поддерева.
+       Глубина корректного поддерева хранится в узле (ExpressionNode.depth) и возвращается
+       сразу; обход нужен только некорректному поддереву, чтобы сообщить об ошибке.
+       Общий словарь memo (id узла -> глубина) позволяет не пересчитывать глубины при вызовах
+       для многих узлов одного дерева; дерево должно жить, пока используется memo"""
     if not isinstance(node, ExpressionNode):
         raise TypeError("Node must be an ExpressionNode")
+    if node.depth is not None:
+        return node.depth
+    depths = {} if memo is None else memo
+
+    stack = [node]
+    push, pop = stack.append, stack.pop
+    while stack:
+        current = pop()
+        if current is _CHILDREN_DONE:
+            current = pop()
+            if current.operation == 'negation':
+                depths[id(current)] = depths[id(current.lhs)] + 1
+            else:
+                depths[id(current)] = max(depths[id(current.lhs)], depths[id(current.rhs)]) + 1
+            continue
+
+        if not isinstance(current, ExpressionNode):
+            raise TypeError("Node must be an ExpressionNode")
+        if id(current) in depths:
+            continue
+        if current.depth is not None:
+            # Корректное поддерево (в том числе переменная): глубина уже известна
+            depths[id(current)] = current.depth
+        elif current.operation == 'negation':
+            if current.lhs is None:
+                raise ValueError("Negation node must have a left child")
+            push(current)
+            push(_CHILDREN_DONE)
+            push(current.lhs)
+        else:
+            if current.lhs is None or current.rhs is None:
+                raise ValueError(f"Binary operation {current.operation} must have both left and right children")
+            push(current)
+            push(_CHILDREN_DONE)
+            push(current.rhs)
+            push(current.lhs)
 
-    if node.operation == 'variable':
-        return 1
-    if node.operation == 'negation':
-        if not hasattr(node, 'lhs') or node.lhs is None:
-            raise ValueError("Negation node must have a left child")
-        return calculate_depth(node.lhs) + 1
-
-    if not hasattr(node, 'lhs') or node.lhs is None or not hasattr(node, 'rhs') or node.rhs is None:
-        raise ValueError(f"Binary operation {node.operation} must have both left and right children")
-    return max(calculate_depth(node.lhs), calculate_depth(node.rhs)) + 1
+    return depths[id(node)]
 
 
 def gather_subtrees(root: ExpressionNode) -> list:
-    """Собирает все уникальные подформулы дерева"""
+    """Собирает все уникальные подформулы дерева (в порядке симметричного обхода).
+       Одинаковые подформулы – это один и тот же узел (см. ExpressionNode), поэтому
+       повторы отсекаются по тождеству узла, а уже пройденное поддерево не обходится заново"""
     if not isinstance(root, ExpressionNode):
         raise TypeError("Root must be an ExpressionNode")
 
     components = []
     visited = set()
 
-    def traverse(node):
-        if not node:
-            return
+    # Для бинарного узла маркер лежит между узлом и правым потомком: узел
+    # добавляется после левого поддерева, но до правого
+    stack = [root]
+    push, pop = stack.append, stack.pop
+    while stack:
+        node = pop()
+        if node is _CHILDREN_DONE:
+            node = pop()
+            visited.add(id(node))
+            components.append(node)
+            continue
 
         if not isinstance(node, ExpressionNode):
             raise TypeError("All nodes must be ExpressionNode instances")
+        if id(node) in visited:
+            continue
 
-        if node.operation in {'conjunction', 'disjunction', 'implication', 'equivalence'}:
-            if not hasattr(node, 'lhs') or node.lhs is None or not hasattr(node, 'rhs') or node.rhs is None:
+        if node.operation in BINARY_OPERATIONS:
+            if node.lhs is None or node.rhs is None:
                 raise ValueError(f"Binary operation {node.operation} must have both left and right children")
-            traverse(node.lhs)
-            if node.formula not in visited:
-                visited.add(node.formula)
-                components.append(node)
-            traverse(node.rhs)
+            push(node.rhs)
+            push(node)
+            push(_CHILDREN_DONE)
+            push(node.lhs)
 
         elif node.operation == 'negation':
-            if not hasattr(node, 'lhs') or node.lhs is None:
+            if node.lhs is None:
                 raise ValueError("Negation node must have a left child")
-            traverse(node.lhs)
-            if node.formula not in visited:
-                visited.add(node.formula)
-                components.append(node)
+            push(node)
+            push(_CHILDREN_DONE)
+            push(node.lhs)
 
         else:
-            if node.operation != 'variable' or not hasattr(node, 'variable') or not isinstance(node.variable, str):
+            if node.operation != 'variable' or not isinstance(node.variable, str):
                 raise ValueError("Invalid variable node")
-            if node.formula not in visited:
-                visited.add(node.formula)
-                components.append(node)
+            visited.add(id(node))
+            components.append(node)
 
-    traverse(root)
     return components
 
 
-def evaluate_ast(node: ExpressionNode, env: dict) -> bool:
-    """Вычисляет значение формулы для заданных значений переменных"""
+def _recursive_evaluate(node, env):
     if not isinstance(node, ExpressionNode):
         raise TypeError("Node must be an ExpressionNode")
-    if not isinstance(env, dict):
-        raise TypeError("Environment must be a dictionary")
-
-    if node.operation == 'variable':
-        if not hasattr(node, 'variable') or not isinstance(node.variable, str):
+    operation = node.operation
+    if operation == 'variable':
+        if not isinstance(node.variable, str):
             raise ValueError("Variable node must have a string variable attribute")
         if node.variable not in env:
             raise ValueError(f"Variable {node.variable} not found in environment")
         return env[node.variable]
-
-    if node.operation == 'negation':
-        if not hasattr(node, 'lhs') or node.lhs is None:
+    if operation == 'negation':
+        if node.lhs is None:
             raise ValueError("Negation node must have a left child")
-        return not evaluate_ast(node.lhs, env)
+        return not _recursive_evaluate(node.lhs, env)
+    if operation not in BINARY_OPERATIONS:
+        raise ValueError(f"Неизвестная операция: {operation}")
+    if node.lhs is None or node.rhs is None:
+        raise ValueError(f"{operation.capitalize()} must have both left and right children")
+    left = _recursive_evaluate(node.lhs, env)
+    if operation == 'conjunction':
+        return left and _recursive_evaluate(node.rhs, env)
+    if operation == 'disjunction':
+        return left or _recursive_evaluate(node.rhs, env)
+    if operation == 'implication':
+        return (not left) or _recursive_evaluate(node.rhs, env)
+    return left == _recursive_evaluate(node.rhs, env)
 
-    if node.operation == 'conjunction':
-        if not hasattr(node, 'lhs') or node.lhs is None or not hasattr(node, 'rhs') or node.rhs is None:
-            raise ValueError("Conjunction must have both left and right children")
-        return evaluate_ast(node.lhs, env) and evaluate_ast(node.rhs, env)
 
-    if node.operation == 'disjunction':
-        if not hasattr(node, 'lhs') or node.lhs is None or not hasattr(node, 'rhs') or node.rhs is None:
-            raise ValueError("Disjunction must have both left and right children")
-        return evaluate_ast(node.lhs, env) or evaluate_ast(node.rhs, env)
+def evaluate_ast(node: ExpressionNode, env: dict) -> bool:
+    """Вычисляет значение формулы для заданных значений переменных.
+       Конъюнкция, дизъюнкция и импликация вычисляются по короткой схеме, как операторы Python:
+       правый операнд не вычисляется, если значение определено левым.
+       Корректные формулы не глубже _RECURSION_DEPTH вычисляются рекурсией,
+       остальные – явным стеком"""
+    if not isinstance(node, ExpressionNode):
+        raise TypeError("Node must be an ExpressionNode")
+    if not isinstance(env, dict):
+        raise TypeError("Environment must be a dictionary")
+    if node.depth is not None and node.depth <= _RECURSION_DEPTH:
+        return _recursive_evaluate(node, env)
+
+    values = []
+    stack = [node]
+    push, pop = stack.append, stack.pop
+    while stack:
+        current = pop()
+
+        if current is _CHILDREN_DONE:
+            # Вычислен левый операнд (или единственный операнд отрицания)
+            current = pop()
+            operation = current.operation
+            left = values[-1]
+            if operation == 'negation':
+                values[-1] = not left
+            elif operation == 'equivalence':
+                push(current)
+                push(_RIGHT_DONE)
+                push(current.rhs)
+            elif operation == 'implication' and not left:
+                values[-1] = True
+            elif operation == 'implication' or (operation == 'conjunction') == bool(left):
+                # Значение a and b, a or b или (not a) or b равно значению правого операнда
+                values.pop()
+                push(current.rhs)
+            continue
+
+        if current is _RIGHT_DONE:
+            pop()
+            right = values.pop()
+            values[-1] = values[-1] == right
+            continue
+
+        if not isinstance(current, ExpressionNode):
+            raise TypeError("Node must be an ExpressionNode")
+        operation = current.operation
+
+        if operation == 'variable':
+            if not isinstance(current.variable, str):
+                raise ValueError("Variable node must have a string variable attribute")
+            if current.variable not in env:
+                raise ValueError(f"Variable {current.variable} not found in environment")
+            values.append(env[current.variable])
+        elif operation == 'negation':
+            if current.lhs is None:
+                raise ValueError("Negation node must have a left child")
+            push(current)
+            push(_CHILDREN_DONE)
+            push(current.lhs)
+        elif operation in BINARY_OPERATIONS:
+            if current.lhs is None or current.rhs is None:
+                raise ValueError(f"{operation.capitalize()} must have both left and right children")
+            push(current)
+            push(_CHILDREN_DONE)
+            push(current.lhs)
+        else:
+            raise ValueError(f"Неизвестная операция: {operation}")
 
-    if node.operation == 'implication':
-        if not hasattr(node, 'lhs') or node.lhs is None or not hasattr(node, 'rhs') or node.rhs is None:
-            raise ValueError("Implication must have both left and right children")
-        return (not evaluate_ast(node.lhs, env)) or evaluate_ast(node.rhs, env)
+    return values[0]
 
-    if node.operation == 'equivalence':
-        if not hasattr(node, 'lhs') or node.lhs is None or not hasattr(node, 'rhs') or node.rhs is None:
-            raise ValueError("Equivalence must have both left and right children")
-        return evaluate_ast(node.lhs, env) == evaluate_ast(node.rhs, env)
 
-    raise ValueError(f"Неизвестная операция: {node.operation}")
\ No newline at end of file
+def compile_columns(columns: list) -> list:
+    """Переводит список узлов, в котором каждый потомок стоит раньше родителя, в программу
+       вычисления строки: для переменной ('variable', имя, None), для операции
+       (операция, индекс левого столбца, индекс правого столбца или None)"""
+    positions = {}
+    program = []
+    for index, node in enumerate(columns):
+        if not isinstance(node, ExpressionNode):
+            raise TypeError("All columns must be ExpressionNode instances")
+        operation = node.operation
+        if operation == 'variable':
+            if not isinstance(node.variable, str):
+                raise ValueError("Variable node must have a string variable attribute")
+            program.append((operation, node.variable, None))
+        elif operation == 'negation' or operation in BINARY_OPERATIONS:
+            children = (node.lhs,) if operation == 'negation' else (node.lhs, node.rhs)
+            if any(id(child) not in positions for child in children):
+                raise ValueError(f"Columns are not topologically ordered: operand of {operation} is missing")
+            program.append((operation, positions[id(node.lhs)],
+                            positions[id(node.rhs)] if node.rhs is not None else None))
+        else:
+            raise ValueError(f"Неизвестная операция: {operation}")
+        positions[id(node)] = index
+    return program
+
+
+def evaluate_columns(program: list, env: dict) -> list:
+    """Значения всех столбцов за один проход по программе compile_columns:
+       операнды берутся из уже вычисленных столбцов, поэтому строка стоит O(числа столбцов)"""
+    values = []
+    append = values.append
+    for operation, left, right in program:
+        if operation == 'variable':
+            if left not in env:
+                raise ValueError(f"Variable {left} not found in environment")
+            append(env[left])
+        elif operation == 'negation':
+            append(not values[left])
+        elif operation == 'conjunction':
+            append(values[left] and values[right])
+        elif operation == 'disjunction':
+            append(values[left] or values[right])
+        elif operation == 'implication':
+            append((not values[left]) or values[right])
+        else:
+            append(values[left] == values[right])
+    return values
@@ -62,7 +62,9 @@ def dijkstra_algorithm(symbol_list: list) -> list:
 
 
 def convert_to_tree(rpn_elements: list) -> ExpressionNode:
-    """Преобразует RPN-выражение в дерево выражений"""
+    """Преобразует RPN-выражение в дерево выражений.
+       Узлы создаются через таблицу уникальных узлов, поэтому повторяющиеся подвыражения
+       становятся одним общим узлом"""
     if not isinstance(rpn_elements, list):
         raise TypeError("rpn_elements must be a list")
 
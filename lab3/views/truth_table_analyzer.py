@@ -1,6 +1,6 @@
 import itertools
 
-from .formula_analysis_tools import evaluate_ast, mark_subtrees, gather_subtrees, calculate_depth
+from .formula_analysis_tools import mark_subtrees, gather_subtrees, calculate_depth, compile_columns, evaluate_columns
 from .formula_tree_generator import build_formula_tree
 
 
@@ -48,8 +48,9 @@ def compute_truth_table(logic_expression: str) -> dict:
     # Подготовка столбцов таблицы
     if syntax_tree.operation != 'variable':
         non_root_components = [c for c in composite_components if c is not syntax_tree]
+        depths = {}
         try:
-            ordered_components = sorted(non_root_components, key=lambda x: calculate_depth(x))
+            ordered_components = sorted(non_root_components, key=lambda x: calculate_depth(x, depths))
         except Exception as e:
             raise RuntimeError(f"Error calculating component depths: {str(e)}") from e
         table_columns = sorted_variables + ordered_components + [syntax_tree]
@@ -57,7 +58,7 @@ def compute_truth_table(logic_expression: str) -> dict:
         table_columns = sorted_variables
 
     # Проверка формул перед выводом
-    if any(not hasattr(c, 'formula') or c.formula is None for c in table_columns):
+    if any(c.rope is None for c in table_columns):
         raise RuntimeError("Some components are missing formula annotations")
 
     # Вывод заголовка таблицы
@@ -65,6 +66,14 @@ def compute_truth_table(logic_expression: str) -> dict:
     print(header_labels)
     print("-" * len(header_labels))
 
+    # Столбцы упорядочены по глубине, поэтому операнды каждого столбца стоят левее него
+    # и строка вычисляется за один проход с повторным использованием значений подформул
+    try:
+        column_program = compile_columns(table_columns)
+    except Exception as e:
+        raise RuntimeError(f"Error compiling table columns: {str(e)}") from e
+    root_position = table_columns.index(syntax_tree)
+
     # Генерация всех возможных комбинаций значений переменных
     truth_combinations = []
     binary_index = []
@@ -73,8 +82,9 @@ def compute_truth_table(logic_expression: str) -> dict:
         context = {var: bool(val) for var, val in zip(sorted_variable_names, combination)}
 
         try:
-            row_data = ["1" if evaluate_ast(node, context) else "0" for node in table_columns]
-            func_value = 1 if evaluate_ast(syntax_tree, context) else 0
+            column_values = evaluate_columns(column_program, context)
+            row_data = ["1" if value else "0" for value in column_values]
+            func_value = 1 if column_values[root_position] else 0
         except Exception as e:
             raise RuntimeError(f"Error evaluating expression for combination {combination}: {str(e)}") from e
 